@@ -1,54 +1,173 @@
 #!/usr/bin/env python3
-"""Sync instructions.md into copilot-instructions.md between SYNC markers.
+"""Sync instructions.md into every tool-specific instruction file.
 
-The target file (copilot-instructions.md) contains two zones:
-  1. Project-specific content above the SYNC:INSTRUCTIONS START marker
-  2. Auto-synced content from instructions.md between the markers
+With --all, instructions.md is parsed once and written to each target that
+config.yaml lists for it under `symlinks`, plus the Cursor rules file:
 
-The base file's H1 heading is stripped; everything from the first
-non-blank line after the H1 onward is injected between the markers.
+  .github/copilot-instructions.md     merged between SYNC markers (below)
+  CLAUDE.md, .cursorrules, ...        verbatim copies
+  .cursor/rules/ai-instructions.mdc   Cursor frontmatter + body after the H1
+
+Only the copilot target, which this repo tracks, is created when missing.
+The others are project-root files (normally symlinks to the source) that
+belong to whoever set the project up, so they are updated when present and
+otherwise skipped; --create PATH creates one anyway (`make sync-cursor` does
+this for the Cursor rules file). Targets that are symlinks to the source are
+left alone.
+
+The source hash and each target's size/mtime are kept in
+.instructions-sync.json; when neither changed, the run ends after hashing
+the source.
+
+The copilot target holds project-specific content plus any number of named
+regions, each between its own markers and fed from its own source file:
+
+  <!-- SYNC:INSTRUCTIONS START - Do not edit below this line -->
+  <!-- SYNC:INSTRUCTIONS END -->
+  <!-- SYNC:PANEL:security-review START -->
+  <!-- SYNC:PANEL:security-review END -->
+  <!-- SYNC:PROMPTS START source=prompts/commit.md -->
+  <!-- SYNC:PROMPTS END -->
+
+A `source=` attribute on the START marker names the file (relative to the
+working directory, or to config.yaml with --all); without one the source
+comes from REGION_SOURCES. Each source's H1 heading is stripped; everything
+from the first non-blank line after the H1 onward is injected between the
+markers. A source that itself contains SYNC marker text is rejected: copied
+into the target, it would break the next scan.
+
+Every file is read once, line by line: one scan over the target indexes all
+markers and hashes each region as it goes. When every region already
+matches its source the target is left untouched (not even its mtime
+changes, so `git add` has nothing to do). Otherwise all regions are replaced
+in a single atomic write via a temporary file in the same directory. Every
+other target is likewise only rewritten when its content hash differs.
 
 Usage:
-    python3 merge-instructions.py <base> <target>
+    python3 merge-instructions.py --all [--config config.yaml] [--force] [--create PATH]...
+    python3 merge-instructions.py [--stdout] <base> <target>
 
-Writes merged output to stdout.
+The second form syncs one target in place, or writes the merged output to
+stdout with --stdout.
 """
 
+import hashlib
+import json
+import os
+import re
 import sys
+import tempfile
+from collections import namedtuple
 
 SYNC_START = "<!-- SYNC:INSTRUCTIONS START"
 SYNC_END = "<!-- SYNC:INSTRUCTIONS END -->"
 
+# Cheap substring test before the regex, so ordinary lines cost one `in`
+MARKER_PREFIX = "<!-- SYNC:"
+MARKER = re.compile(r"<!-- SYNC:(?P<name>[\w.:-]+?) (?P<kind>START|END)\b(?P<attrs>.*?)-->")
+SOURCE_ATTR = re.compile(r"\bsource=(\S+)")
 
-def strip_h1_preamble(text):
-    """Remove the H1 heading line and leading blanks after it."""
-    lines = text.split("\n")
-    result = []
-    skipped_h1 = False
-    for line in lines:
-        if not skipped_h1 and line.startswith("# "):
-            skipped_h1 = True
-            continue
-        result.append(line)
-    # Strip leading blank lines after H1 removal
-    while result and result[0].strip() == "":
-        result.pop(0)
-    return "\n".join(result)
-
-
-def sync(base_text, target_text):
-    """Replace content between SYNC markers with base instructions."""
-    lines = target_text.split("\n")
-
-    start_line = None
-    end_line = None
-    for i, line in enumerate(lines):
-        if SYNC_START in line and start_line is None:
-            start_line = i
-        if SYNC_END in line:
-            end_line = i
-
-    if start_line is None or end_line is None:
+# Default source per region name (or "PREFIX:*" family) when the START
+# marker has no source= attribute; INSTRUCTIONS is the base file
+REGION_SOURCES = {
+    "PERSONAS": "personas/index.md",
+    "PANEL:*": "personas/panels/{}.md",
+}
+
+# Merged between SYNC markers rather than copied
+COPILOT_TARGET = ".github/copilot-instructions.md"
+
+CURSOR_RULES = ".cursor/rules/ai-instructions.mdc"
+CURSOR_FRONTMATTER = (
+    "---\n"
+    "description: Core AI instructions synced from instructions.md\n"
+    "globs: **/*\n"
+    "alwaysApply: true\n"
+    "---\n"
+    "\n"
+)
+
+STATE_FILE = ".instructions-sync.json"
+
+# text: the whole file; h1: its H1 line (or ""); body: the synced content;
+# marker_line: first line number holding SYNC marker text (or None)
+Base = namedtuple("Base", "text h1 body digest marker_line")
+
+# A named region in a target; source is the START marker's source= (or None)
+Region = namedtuple("Region", "name source digest")
+
+
+def read_base(path):
+    """Parse the base file once: full text, H1 line and body without the H1."""
+    lines = []
+    body = []
+    h1 = ""
+    marker_line = None
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            lines.append(line)
+            if marker_line is None and MARKER_PREFIX in line and MARKER.search(line):
+                marker_line = lineno
+            if not h1 and line.startswith("# "):
+                h1 = line
+                continue
+            # Strip leading blank lines after H1 removal
+            if not body and line.strip() == "":
+                continue
+            body.append(line)
+    text = "".join(lines)
+    return Base(
+        text, h1, "".join(body).rstrip("\n"),
+        hashlib.sha256(text.encode()).hexdigest(), marker_line,
+    )
+
+
+def _fail(message):
+    print(f"Error: {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def scan_target(path):
+    """Index every SYNC region of the target in a single pass.
+
+    Returns a list of parts in file order: lists of literal lines (marker
+    lines included) alternating with a Region for each region's content,
+    whose digest is the sha256 of the lines currently between its markers.
+    """
+    parts = [[]]
+    open_region = None
+    digest = None
+    seen = set()
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            match = MARKER.search(line) if MARKER_PREFIX in line else None
+            if open_region is None:
+                parts[-1].append(line)
+                if match is None:
+                    continue
+                name = match.group("name")
+                if match.group("kind") == "END":
+                    _fail(f"SYNC:{name} END marker on line {lineno} has no START "
+                          "marker before it (START marker must appear before END marker).")
+                if name in seen:
+                    _fail(f"SYNC:{name} region appears more than once (line {lineno}).")
+                seen.add(name)
+                source = SOURCE_ATTR.search(match.group("attrs"))
+                open_region = (name, source.group(1) if source else None, lineno)
+                digest = hashlib.sha256()
+            elif match is not None and match.group("name") == open_region[0] and match.group("kind") == "END":
+                parts.append(Region(open_region[0], open_region[1], digest.hexdigest()))
+                parts.append([line])
+                open_region = None
+            elif match is not None:
+                _fail(f"SYNC:{match.group('name')} marker on line {lineno} is inside "
+                      f"the SYNC:{open_region[0]} region (regions cannot nest).")
+            else:
+                digest.update(line.encode())
+
+    if open_region is not None:
+        _fail(f"SYNC:{open_region[0]} START marker on line {open_region[2]} has no END marker.")
+    if not seen:
         print(
             "Error: SYNC markers not found in target file.",
             file=sys.stderr,
@@ -56,43 +175,294 @@ def sync(base_text, target_text):
         print(f"  Expected start containing: {SYNC_START}", file=sys.stderr)
         print(f"  Expected end: {SYNC_END}", file=sys.stderr)
         sys.exit(1)
+    return parts
 
-    if start_line >= end_line:
-        print(
-            "Error: START marker must appear before END marker.",
-            file=sys.stderr,
-        )
-        sys.exit(1)
 
-    # Build output
-    before = lines[: start_line + 1]
-    after = lines[end_line:]
+def region_source(region):
+    """Source path for a region: its source= attribute, else REGION_SOURCES."""
+    if region.source:
+        return region.source
+    if region.name in REGION_SOURCES:
+        return REGION_SOURCES[region.name]
+    family, _, member = region.name.partition(":")
+    pattern = REGION_SOURCES.get(f"{family}:*")
+    if member and pattern:
+        return pattern.format(member)
+    _fail(f"SYNC:{region.name} has no source; add source=<path> to its START marker.")
+
+
+def render_region(content):
+    """Text placed between the markers: the content padded by blank lines."""
+    return "\n" + content + "\n\n"
+
+
+def write_atomic(path, chunks):
+    """Replace path with the concatenated chunks, keeping its permissions."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def sync(base_path, target_path, stdout=False):
+    """Sync base into target; returns True if the target was rewritten."""
+    return merge_target(read_base(base_path), target_path, stdout=stdout)
+
 
-    content = strip_h1_preamble(base_text).rstrip("\n")
+def merge_target(base, target_path, stdout=False, root=".", sources=None):
+    """Replace every SYNC region of target that differs from its source.
 
-    output = before + [""] + content.split("\n") + [""] + after
-    return "\n".join(output) + "\n"
+    base feeds the INSTRUCTIONS region; other regions read their source
+    relative to root. sources caches parsed sources across targets and
+    collects them for the caller.
+    """
+    sources = {} if sources is None else sources
+    parts = scan_target(target_path)
+
+    stale = False
+    chunks = []
+    for part in parts:
+        if not isinstance(part, Region):
+            chunks.extend(part)
+            continue
+        if part.name == "INSTRUCTIONS" and not part.source:
+            path, parsed = None, base
+        else:
+            path = region_source(part)
+            if path not in sources:
+                try:
+                    sources[path] = read_base(os.path.join(root, path))
+                except FileNotFoundError:
+                    _fail(f"SYNC:{part.name} source not found: {path}")
+            parsed = sources[path]
+        if parsed.marker_line is not None:
+            where = f"source {path}" if path else "base file"
+            _fail(f"SYNC:{part.name} {where} has SYNC marker text on line "
+                  f"{parsed.marker_line}; remove it, or it would nest regions in the target.")
+        region = render_region(parsed.body)
+        stale = stale or hashlib.sha256(region.encode()).hexdigest() != part.digest
+        chunks.append(region)
+
+    if stdout:
+        sys.stdout.writelines(chunks)
+        return False
+    if not stale:
+        return False
+    write_atomic(target_path, chunks)
+    return True
+
+
+def file_digest(path):
+    """sha256 of a file's text, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path) as f:
+            for line in f:
+                digest.update(line.encode())
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def write_if_changed(path, text):
+    """Write text to path (creating directories) unless it already matches."""
+    if file_digest(path) == hashlib.sha256(text.encode()).hexdigest():
+        return False
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path):
+        write_atomic(path, [text])
+    else:
+        with open(path, "w") as f:
+            f.write(text)
+    return True
+
+
+def render_target(base, relpath):
+    """Full content of a non-merged target."""
+    if relpath.endswith(".mdc"):
+        # Everything after the first line, as `tail -n +2` did
+        text = base.text
+        return CURSOR_FRONTMATTER + (text.split("\n", 1)[1] if "\n" in text else "")
+    return base.text
+
+
+def first_sync(base, path):
+    """Create a copilot target: project section above freshly inserted markers."""
+    h1 = base.h1 or "# AI Instructions\n"
+    head = [
+        h1,
+        "\n",
+        "## Project Specific Instructions\n",
+        "\n",
+        f"{SYNC_START} - Do not edit below this line -->\n",
+    ]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        f.writelines(head)
+        f.write(render_region(base.body))
+        f.write(SYNC_END + "\n")
+
+
+def _scalar(value):
+    return value.strip().strip("'\"")
+
+
+def read_config_targets(config_path, source):
+    """Targets config.yaml lists for `source` under `symlinks`.
+
+    A minimal reader for that one block, so the hook needs only the stdlib.
+    """
+    targets = []
+    in_symlinks = False
+    in_targets = False
+    current = None
+    with open(config_path) as f:
+        for raw in f:
+            line = raw.split(" #", 1)[0].rstrip()
+            text = line.strip()
+            if not text or text.startswith("#"):
+                continue
+            if not line[0].isspace():
+                in_symlinks = text == "symlinks:"
+                continue
+            if not in_symlinks:
+                continue
+            if text.startswith("- source:"):
+                current = _scalar(text[len("- source:"):])
+                in_targets = False
+            elif text == "targets:":
+                in_targets = True
+            elif in_targets and text.startswith("- ") and current == source:
+                targets.append(_scalar(text[2:]))
+    return targets
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def sync_all(config_path, source="instructions.md", force=False, create=()):
+    """Write every configured target from one parse of the source.
+
+    Targets other than the copilot file are only written when they exist or
+    are listed in create. Returns the targets that were rewritten (relative
+    to the config's directory).
+    """
+    root = os.path.dirname(os.path.abspath(config_path))
+    targets = read_config_targets(config_path, source) + [CURSOR_RULES]
+    source_path = os.path.join(root, source)
+    state_path = os.path.join(root, STATE_FILE)
+
+    base = read_base(source_path)
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    recorded = state.get("targets", {})
+    if (
+        not force
+        and state.get("source") == base.digest
+        and all(
+            t in recorded and recorded[t] == _stat_key(os.path.join(root, t))
+            for t in targets
+        )
+        and all(os.path.exists(os.path.join(root, t)) for t in create)
+        and all(
+            file_digest(os.path.join(root, path)) == digest
+            for path, digest in state.get("regions", {}).items()
+        )
+    ):
+        return []
+
+    changed = []
+    sources = {}
+    real_source = os.path.realpath(source_path)
+    for relpath in targets:
+        path = os.path.join(root, relpath)
+        real = os.path.realpath(path)
+        if real == real_source:
+            continue  # a symlink to the source is always current
+        if relpath == COPILOT_TARGET:
+            if not os.path.exists(real):
+                first_sync(base, real)
+                rewritten = True
+            else:
+                rewritten = merge_target(base, real, root=root, sources=sources)
+        elif os.path.exists(real) or relpath in create:
+            rewritten = write_if_changed(real, render_target(base, relpath))
+        else:
+            continue  # not set up in this checkout; creating it would leave an untracked file
+        if rewritten:
+            changed.append(relpath)
+
+    state = {
+        "source": base.digest,
+        "regions": {path: parsed.digest for path, parsed in sources.items()},
+        "targets": {t: _stat_key(os.path.join(root, t)) for t in targets},
+    }
+    write_if_changed(state_path, json.dumps(state, indent=2, sort_keys=True) + "\n")
+    return changed
 
 
 def main():
-    if len(sys.argv) != 3:
+    args = sys.argv[1:]
+    if "--all" in args:
+        force = "--force" in args
+        create = [
+            os.path.normpath(args[i + 1]) for i, arg in enumerate(args[:-1]) if arg == "--create"
+        ]
+        config = "config.yaml"
+        if "--config" in args:
+            i = args.index("--config")
+            if i + 1 >= len(args):
+                print("Error: --config requires a path.", file=sys.stderr)
+                sys.exit(1)
+            config = args[i + 1]
+        changed = sync_all(config, force=force, create=create)
+        for relpath in changed:
+            print(f"{relpath} synced.")
+        if not changed:
+            print("Instruction files already up to date.")
+        return
+
+    stdout = "--stdout" in args
+    args = [arg for arg in args if arg != "--stdout"]
+    if len(args) != 2:
         print(
-            f"Usage: {sys.argv[0]} <base> <target>",
+            f"Usage: {sys.argv[0]} --all [--config config.yaml] [--force] [--create PATH]...",
             file=sys.stderr,
         )
         print(
-            "Syncs base content into target between SYNC markers, "
-            "writes to stdout.",
+            f"       {sys.argv[0]} [--stdout] <base> <target>",
+            file=sys.stderr,
+        )
+        print(
+            "Syncs base content into every configured target (--all), or "
+            "into one target between SYNC markers, in place (or to stdout "
+            "with --stdout).",
             file=sys.stderr,
         )
         sys.exit(1)
 
-    with open(sys.argv[1]) as f:
-        base_text = f.read()
-    with open(sys.argv[2]) as f:
-        target_text = f.read()
-
-    sys.stdout.write(sync(base_text, target_text))
+    base, target = args
+    changed = sync(base, target, stdout=stdout)
+    if not stdout:
+        name = os.path.basename(target)
+        print(f"{name} merged." if changed else f"{name} already up to date.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+"""
+Tests for merge-instructions.py.
+
+Run from the repository root:
+    python3 -m pytest .githooks/tests
+"""
+
+import os
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "merge-instructions.py")
+
+TARGET = """# Target
+
+<!-- SYNC:INSTRUCTIONS START - Do not edit below this line -->
+<!-- SYNC:INSTRUCTIONS END -->
+<!-- SYNC:NOTES START source=notes.md -->
+<!-- SYNC:NOTES END -->
+"""
+
+
+def _merge(tmp_path):
+    return subprocess.run(
+        [sys.executable, SCRIPT, "base.md", "target.md"],
+        cwd=tmp_path, capture_output=True, text=True,
+    )
+
+
+def test_regions_synced_and_second_run_is_noop(tmp_path):
+    """Every region is filled from its source; an unchanged rerun leaves the file alone."""
+    (tmp_path / "base.md").write_text("# Base\n\nShared rules.\n")
+    (tmp_path / "notes.md").write_text("# Notes\n\nA note.\n")
+    target = tmp_path / "target.md"
+    target.write_text(TARGET)
+
+    assert _merge(tmp_path).returncode == 0
+    merged = target.read_text()
+    assert "\nShared rules.\n" in merged and "\nA note.\n" in merged
+
+    mtime = target.stat().st_mtime_ns
+    result = _merge(tmp_path)
+    assert "already up to date" in result.stdout
+    assert target.stat().st_mtime_ns == mtime
+
+
+def test_source_with_marker_text_rejected(tmp_path):
+    """A source quoting SYNC markers fails before the target is written."""
+    (tmp_path / "base.md").write_text("# Base\n\nShared rules.\n")
+    (tmp_path / "notes.md").write_text(
+        "# Notes\n\n```markdown\n<!-- SYNC:PERSONAS START -->\n<!-- SYNC:PERSONAS END -->\n```\n"
+    )
+    target = tmp_path / "target.md"
+    target.write_text(TARGET)
+
+    result = _merge(tmp_path)
+
+    assert result.returncode == 1
+    assert "source notes.md has SYNC marker text on line 4" in result.stderr
+    assert target.read_text() == TARGET
+
+
+def test_cursor_rules_match_tail(tmp_path):
+    """The .mdc body is everything after the first line, as `tail -n +2` gave."""
+    (tmp_path / "config.yaml").write_text("symlinks:\n  - source: instructions.md\n    targets:\n      - CLAUDE.md\n")
+    rules = tmp_path / ".cursor" / "rules" / "ai-instructions.mdc"
+    for source, body in [("# Only a title", ""), ("# Title\n\nRules.\n", "\nRules.\n")]:
+        (tmp_path / "instructions.md").write_text(source)
+        result = subprocess.run(
+            [sys.executable, SCRIPT, "--all", "--config", "config.yaml", "--force",
+             "--create", ".cursor/rules/ai-instructions.mdc"],
+            cwd=tmp_path, capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert rules.read_text().split("---\n\n", 1)[1] == body
@@ -2,12 +2,22 @@
 Pytest configuration and shared fixtures for MCP server tests.
 """
 
+import json
 import os
 import shutil
 import sys
 import pytest
 
-from mcp_client import MCPClient, check_server_available
+import mcp_durations
+import mcp_latency
+from mcp_client import VALIDATION_MODES, MCPClient, check_server_available
+from mcp_metrics import ClientMetrics
+from mcp_tools_cache import ToolsCache
+from server_pool import ServerPool
+from snow_standin import SnowStandIn
+
+# --mcp-timing: per-test spawn/initialize/call/close attribution
+pytest_plugins = ["mcp_timing_plugin"]
 
 
 # Get the venv path for servicenow-mcp (installed in server dir)
@@ -33,6 +43,105 @@ SERVERS = {
 }
 
 
+def pytest_addoption(parser):
+    """Options for running servicenow tests against the offline stand-in."""
+    group = parser.getgroup("servicenow stand-in")
+    group.addoption(
+        "--snow-standin", action="store_true",
+        default=bool(os.environ.get("MCP_SNOW_STANDIN")),
+        help="Point SERVICENOW_INSTANCE at a local Table API stand-in (or set MCP_SNOW_STANDIN=1)",
+    )
+    group.addoption(
+        "--snow-latency", type=float, default=0.0,
+        help="Seconds of latency the stand-in adds to each response",
+    )
+    group.addoption(
+        "--snow-page-size", type=int, default=None,
+        help="Cap the stand-in applies to sysparm_limit, to force paging",
+    )
+
+    group = parser.getgroup("mcp server pool")
+    group.addoption(
+        "--mcp-spares", type=int, default=int(os.environ.get("MCP_SPARES", "0")),
+        help="Initialized spare processes to prefork per available server (or set MCP_SPARES)",
+    )
+    group.addoption(
+        "--mcp-tools-cache", default=os.environ.get("MCP_TOOLS_CACHE", "off"), metavar="DIR",
+        help="Persist tools/list results across runs in DIR, or 'off' "
+             "(default: $MCP_TOOLS_CACHE, else off)",
+    )
+    group.addoption(
+        "--mcp-validation", choices=VALIDATION_MODES,
+        default=os.environ.get("MCP_VALIDATION", "off"),
+        help="Client-side tool argument checks against inputSchema (default: off, "
+             "so every call reaches the server)",
+    )
+    group.addoption(
+        "--mcp-timeout", type=float,
+        default=float(os.environ["MCP_TIMEOUT"]) if os.environ.get("MCP_TIMEOUT") else None,
+        help="Default per-request deadline in seconds for pooled clients (default: none)",
+    )
+    group.addoption(
+        "--mcp-metrics", default=None, metavar="FILE",
+        help="Write request metrics for every client to FILE at session end "
+             "(Prometheus text format if FILE ends in .prom, else JSON)",
+    )
+
+    group = parser.getgroup("test sharding")
+    group.addoption(
+        "--mcp-durations", default=os.environ.get("MCP_DURATIONS"), metavar="FILE",
+        help="Record each test's duration into FILE at session end (or set MCP_DURATIONS)",
+    )
+    group.addoption(
+        "--shard", default=None, metavar="i/N",
+        help="Run only shard i of N, balanced by the durations recorded in the "
+             "--mcp-durations file (default: .test_durations.json)",
+    )
+
+    group = parser.getgroup("mcp latency budgets")
+    group.addoption(
+        "--mcp-latency", choices=("check", "refresh"), default=None,
+        help="Time each tool in the baseline file: fail on budget regressions (check) "
+             "or rewrite the budgets from this run (refresh)",
+    )
+    group.addoption(
+        "--mcp-latency-baselines", default=mcp_latency.BASELINE_FILE, metavar="FILE",
+        help="Latency baseline file (default: latency_baselines.json next to conftest.py)",
+    )
+    group.addoption(
+        "--mcp-latency-tolerance", type=float, default=None, metavar="FRACTION",
+        help="Allowed slowdown over baseline, e.g. 0.25 for +25%% (default: from the file)",
+    )
+    group.addoption(
+        "--mcp-latency-repeat", type=int, default=None, metavar="N",
+        help="Timed calls per tool (default: from the file)",
+    )
+
+
+def _start_snow_standin(config):
+    """Start the stand-in for this process and point the servicenow server at it."""
+    kwargs = {"latency": config.getoption("snow_latency")}
+    if config.getoption("snow_page_size"):
+        kwargs["max_page_size"] = config.getoption("snow_page_size")
+    standin = SnowStandIn(**kwargs).start()
+    config._snow_standin = standin
+
+    os.environ["SERVICENOW_INSTANCE"] = standin.url
+    os.environ.setdefault("SERVICENOW_USERNAME", "standin")
+    os.environ.setdefault("SERVICENOW_PASSWORD", "standin")
+    SERVERS["servicenow"]["env"] = {
+        "SERVICENOW_INSTANCE": standin.url,
+        "SERVICENOW_USERNAME": os.environ["SERVICENOW_USERNAME"],
+        "SERVICENOW_PASSWORD": os.environ["SERVICENOW_PASSWORD"],
+    }
+
+
+def pytest_unconfigure(config):
+    standin = getattr(config, "_snow_standin", None)
+    if standin is not None:
+        standin.stop()
+
+
 def pytest_configure(config):
     """Register custom markers."""
     config.addinivalue_line(
@@ -41,17 +150,68 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "requires_env(*vars): skip if environment variables are not set"
     )
+    config.addinivalue_line(
+        "markers", "dirties_server: changes server state; pooled server is recycled afterwards"
+    )
+
+    shard = config.getoption("--shard")
+    if shard:
+        try:
+            config._mcp_shard = mcp_durations.parse_shard(shard)
+        except ValueError as e:
+            raise pytest.UsageError(f"--shard: {e}")
+
+    # Every client created in the session reports to one shared instance
+    if config.getoption("--mcp-metrics") and MCPClient.default_metrics is None:
+        MCPClient.default_metrics = ClientMetrics()
+
+    # Before any skip decisions, so requires_env("SERVICENOW_INSTANCE") sees it
+    if config.getoption("snow_standin"):
+        _start_snow_standin(config)
+
+
+def _compute_skip_context():
+    """Snapshot what the skip markers depend on: server binaries and set env vars."""
+    return {
+        "servers": {
+            name: check_server_available(config["command"])
+            for name, config in SERVERS.items()
+        },
+        "env": sorted(var for var, value in os.environ.items() if value),
+    }
+
+
+def _skip_context(config):
+    """Skip context for this process.
+
+    Under pytest-xdist the controller computes it once and hands it to every
+    worker, so all workers make the same skip decisions.
+    """
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput and "mcp_skip_context" in workerinput:
+        return workerinput["mcp_skip_context"]
+    if not hasattr(config, "_mcp_skip_context"):
+        config._mcp_skip_context = _compute_skip_context()
+    return config._mcp_skip_context
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """xdist controller hook: share the skip context with a new worker."""
+    node.workerinput["mcp_skip_context"] = _skip_context(node.config)
 
 
 def pytest_collection_modifyitems(config, items):
     """Apply skip markers based on server availability."""
+    context = _skip_context(config)
+    available_env = set(context["env"])
     for item in items:
         # Check requires_server marker
         for marker in item.iter_markers(name="requires_server"):
             server_name = marker.args[0]
             if server_name in SERVERS:
                 command = SERVERS[server_name]["command"]
-                if not check_server_available(command):
+                if not context["servers"][server_name]:
                     item.add_marker(
                         pytest.mark.skip(
                             reason=f"Server binary not found: {command[0]}"
@@ -61,47 +221,175 @@ def pytest_collection_modifyitems(config, items):
         # Check requires_env marker
         for marker in item.iter_markers(name="requires_env"):
             for var in marker.args:
-                if not os.environ.get(var):
+                if var not in available_env:
                     item.add_marker(
                         pytest.mark.skip(
                             reason=f"Environment variable not set: {var}"
                         )
                     )
 
+    shard = getattr(config, "_mcp_shard", None)
+    if shard:
+        _select_shard(config, items, *shard)
+
+
+def _select_shard(config, items, index, total):
+    """Keep only the tests in shard `index` of `total`, balanced by recorded duration."""
+    path = config.getoption("--mcp-durations") or mcp_durations.DEFAULT_FILE
+    shards = mcp_durations.split([item.nodeid for item in items], mcp_durations.load(path), total)
+    selected = set(shards[index - 1])
+    deselected = [item for item in items if item.nodeid not in selected]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item.nodeid in selected]
+
 
 @pytest.fixture
 def temp_dir(tmp_path):
-    """Provide a temporary directory for tests that modify files."""
+    """Provide a temporary directory for tests that modify files.
+
+    tmp_path lives under a per-worker base directory when run with xdist.
+    """
     yield tmp_path
 
 
+@pytest.fixture(scope="session")
+def server_pool(pytestconfig):
+    """Session-wide pool of warm, initialized server processes.
+
+    Session scope is per process, so under pytest-xdist every worker gets
+    its own pool and its own server processes. With --mcp-spares K, K spares
+    per available server are preforked in the background so recycled
+    clients are replaced without a cold start. With --mcp-tools-cache DIR,
+    list_tools() results are cached on disk per server binary and version.
+    """
+    cache_dir = pytestconfig.getoption("--mcp-tools-cache")
+    tools_cache = None if cache_dir == "off" else ToolsCache(cache_dir)
+    pool = ServerPool(
+        SERVERS, tools_cache=tools_cache,
+        validation=pytestconfig.getoption("--mcp-validation"),
+        default_timeout=pytestconfig.getoption("--mcp-timeout"),
+    )
+    spares = pytestconfig.getoption("--mcp-spares")
+    if spares > 0:
+        for name, available in _skip_context(pytestconfig)["servers"].items():
+            if available:
+                pool.prefork(name, spares)
+    yield pool
+    pool.close()
+
+
+# setup + call + teardown seconds per test, for --mcp-durations
+_test_durations = {}
+_skipped_tests = set()
+
+
+def pytest_runtest_logreport(report):
+    _test_durations[report.nodeid] = _test_durations.get(report.nodeid, 0.0) + report.duration
+    if report.skipped:
+        _skipped_tests.add(report.nodeid)
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    path = config.getoption("--mcp-metrics")
+    if path and MCPClient.default_metrics is not None:
+        _write_metrics(MCPClient.default_metrics, path)
+
+    # Under xdist the controller sees every worker's reports and writes the file
+    path = config.getoption("--mcp-durations")
+    if path and getattr(config, "workeroutput", None) is None:
+        # A skipped test's near-zero time says nothing about what it costs when it runs
+        measured = {n: d for n, d in _test_durations.items() if n not in _skipped_tests}
+        if measured:
+            mcp_durations.update(path, measured)
+
+    measured = getattr(config, "_mcp_latency_measured", None)
+    if measured is not None and config.getoption("--mcp-latency") == "refresh":
+        workeroutput = getattr(config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput["mcp_latency"] = json.dumps(measured)
+        elif measured:
+            path = config.getoption("--mcp-latency-baselines")
+            mcp_latency.write_baselines(mcp_latency.refreshed(mcp_latency.load_baselines(path), measured), path)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """xdist controller hook: collect a worker's latency measurements for refresh."""
+    output = getattr(node, "workeroutput", None) or {}
+    if "mcp_latency" in output:
+        measured = getattr(node.config, "_mcp_latency_measured", None)
+        if measured is None:
+            measured = node.config._mcp_latency_measured = {}
+        for server, entries in json.loads(output["mcp_latency"]).items():
+            measured.setdefault(server, {}).update(entries)
+
+
+def _write_metrics(metrics, path):
+    # One file per xdist worker; each has its own clients
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker:
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{worker}{ext}"
+    if path.endswith(".prom"):
+        with open(path, "w") as f:
+            f.write(metrics.prometheus_text())
+    else:
+        metrics.dump_json(path)
+
+
+def _is_dirty(request):
+    return request.node.get_closest_marker("dirties_server") is not None
+
+
 @pytest.fixture
-def gitignore_client_factory():
-    """Factory fixture for creating gitignore clients with custom cwd."""
+def gitignore_client_factory(server_pool, request):
+    """Factory fixture for borrowing gitignore clients with custom cwd.
+
+    Clients for the default cwd are shared across tests. Clients rooted in a
+    per-test directory (e.g. temp_dir) are never shared and are closed on
+    teardown.
+    """
     clients = []
 
     def _create(cwd=None):
-        config = SERVERS["gitignore"]
-        client = MCPClient(config["command"], config["env"], cwd=str(cwd) if cwd else None)
-        clients.append(client)
+        client = server_pool.acquire("gitignore", cwd=cwd)
+        clients.append((client, cwd is not None))
         return client
 
     yield _create
 
-    for client in clients:
-        client.close()
+    for client, rooted in clients:
+        server_pool.release(client, dirty=rooted or _is_dirty(request))
 
 
 @pytest.fixture
 def gitignore_client(gitignore_client_factory):
-    """Create a gitignore MCP client (default working directory)."""
+    """Borrow a gitignore MCP client (default working directory)."""
     return gitignore_client_factory()
 
 
+@pytest.fixture(scope="session")
+def latency_baselines(pytestconfig):
+    """The --mcp-latency mode and baseline file; skips the test without --mcp-latency."""
+    mode = pytestconfig.getoption("--mcp-latency")
+    if not mode:
+        pytest.skip("latency budgets are timed with --mcp-latency check|refresh")
+    pytestconfig._mcp_latency_measured = getattr(pytestconfig, "_mcp_latency_measured", {})
+    return mode, mcp_latency.load_baselines(pytestconfig.getoption("--mcp-latency-baselines"))
+
+
+@pytest.fixture(scope="session")
+def servicenow_instance(pytestconfig):
+    """Instance the integration tests configure: the stand-in when enabled, else jmfe."""
+    standin = getattr(pytestconfig, "_snow_standin", None)
+    return standin.url if standin is not None else "jmfe.service-now.com"
+
+
 @pytest.fixture
-def servicenow_client():
-    """Create a servicenow MCP client."""
-    config = SERVERS["servicenow"]
-    client = MCPClient(config["command"], config["env"])
+def servicenow_client(server_pool, request):
+    """Borrow a servicenow MCP client."""
+    client = server_pool.acquire("servicenow")
     yield client
-    client.close()
+    server_pool.release(client, dirty=_is_dirty(request))
@@ -0,0 +1,271 @@
+"""
+Minimal stdio MCP server used to exercise MCPClient without real server binaries.
+
+Each request is handled on its own thread, so replies can arrive out of order
+the same way they can from a real server that does remote I/O.
+
+Tools:
+    fake_echo   - returns its arguments as JSON text
+    fake_sleep  - sleeps for `seconds` then returns; used for concurrency tests
+    fake_error  - fails with a JSON-RPC error
+    fake_log    - writes `lines` lines of `width` characters to stderr
+    fake_exit   - writes `message` to stderr and exits
+    fake_notify - sends a `method` notification with `params`, then returns;
+                  with `request`, sends it as a request and returns the reply
+    fake_progress - sends `steps` progress notifications (with `content` when
+                  `partial` is set) `delay` seconds apart, if given a progressToken
+    fake_records - one page (`offset`, `limit`) of `count` records, shaped like
+                  the snow_* query tools' {"records": [...], "total_fetched": n};
+                  `max_limit` caps `limit` the way a server page-size cap does
+
+Options:
+    --no-batch  reject JSON-RPC batch arrays with an id-less error, as servers
+                without batch support do
+    --drop-batch  ignore JSON-RPC batch arrays without replying
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+SERVER_INFO = {"name": "fake", "version": "0.0.1"}
+
+TOOLS = [
+    {
+        "name": "fake_echo",
+        "description": "Echo arguments back as JSON text",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+    {
+        "name": "fake_sleep",
+        "description": "Sleep for a number of seconds",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"seconds": {"type": "number"}},
+            "required": ["seconds"],
+        },
+    },
+    {
+        "name": "fake_log",
+        "description": "Write lines to stderr",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"lines": {"type": "integer"}, "width": {"type": "integer"}},
+        },
+    },
+    {
+        "name": "fake_exit",
+        "description": "Write a message to stderr and exit",
+        "inputSchema": {"type": "object", "properties": {"message": {"type": "string"}}},
+    },
+    {
+        "name": "fake_notify",
+        "description": "Send a notification to the client",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "method": {"type": "string"},
+                "params": {"type": "object"},
+                "request": {"type": "boolean"},
+            },
+            "required": ["method"],
+        },
+    },
+    {
+        "name": "fake_progress",
+        "description": "Report progress before returning",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "steps": {"type": "integer"},
+                "delay": {"type": "number"},
+                "partial": {"type": "boolean"},
+            },
+        },
+    },
+    {
+        "name": "fake_records",
+        "description": "Page through a synthetic record set",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer"},
+                "offset": {"type": "integer"},
+                "limit": {"type": "integer"},
+                "max_limit": {"type": "integer"},
+            },
+        },
+    },
+    {
+        "name": "fake_error",
+        "description": "Always fails with a JSON-RPC error",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+]
+
+NO_BATCH = "--no-batch" in sys.argv[1:]
+DROP_BATCH = "--drop-batch" in sys.argv[1:]
+
+_write_lock = threading.Lock()
+
+# Replies to server-initiated requests, by request id
+_replies: Dict[Any, Dict[str, Any]] = {}
+_reply_events: Dict[Any, threading.Event] = {}
+
+
+def _write(message: Any) -> None:
+    with _write_lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+
+def _text(value: Any) -> Dict[str, Any]:
+    return {"content": [{"type": "text", "text": json.dumps(value)}]}
+
+
+def _call_tool(params: Dict[str, Any]) -> Dict[str, Any]:
+    name = params.get("name")
+    args = params.get("arguments") or {}
+    if name == "fake_echo":
+        return _text(args)
+    if name == "fake_sleep":
+        time.sleep(float(args.get("seconds", 0)))
+        return _text({"slept": args.get("seconds", 0)})
+    if name == "fake_log":
+        lines, width = int(args.get("lines", 1)), int(args.get("width", 80))
+        for i in range(lines):
+            sys.stderr.write(f"{i:08d} " + "x" * max(width - 9, 0) + "\n")
+        sys.stderr.flush()
+        return _text({"lines": lines})
+    if name == "fake_exit":
+        sys.stderr.write(str(args.get("message", "")) + "\n")
+        sys.stderr.flush()
+        os._exit(3)
+    if name == "fake_notify":
+        message = {"jsonrpc": "2.0", "method": args["method"], "params": args.get("params") or {}}
+        if not args.get("request"):
+            _write(message)
+            return _text({"sent": args["method"]})
+        request_id = f"srv-{threading.get_ident()}"
+        answered = _reply_events[request_id] = threading.Event()
+        _write(dict(message, id=request_id))
+        if not answered.wait(5):
+            raise _RPCError(-32001, "client did not answer")
+        return _text(_replies.pop(request_id))
+    if name == "fake_progress":
+        token = (params.get("_meta") or {}).get("progressToken")
+        steps = int(args.get("steps", 3))
+        for step in range(1, steps + 1):
+            time.sleep(float(args.get("delay", 0)))
+            if token is None:
+                continue
+            progress = {"progressToken": token, "progress": step, "total": steps}
+            if args.get("partial"):
+                progress["content"] = [{"type": "text", "text": f"chunk {step}"}]
+            _write({"jsonrpc": "2.0", "method": "notifications/progress", "params": progress})
+        return _text({"steps": steps})
+    if name == "fake_records":
+        count, offset, limit = int(args.get("count", 0)), int(args.get("offset", 0)), int(args.get("limit", 10))
+        limit = min(limit, int(args.get("max_limit", limit)))
+        records = [{"sys_id": f"{i:032x}", "name": f"ci-{i}"} for i in range(offset, min(offset + limit, count))]
+        return _text({"records": records, "total_fetched": len(records)})
+    if name == "fake_error":
+        raise _RPCError(-32000, "fake failure")
+    raise _RPCError(-32602, f"Unknown tool: {name}")
+
+
+class _RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        self.code = code
+        self.message = message
+        super().__init__(message)
+
+
+def handle(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Handle one JSON-RPC message; return the response (None for notifications)."""
+    method = message.get("method")
+    msg_id = message.get("id")
+    params = message.get("params") or {}
+
+    if method is None:
+        # The client's reply to a request we sent
+        if msg_id in _reply_events:
+            _replies[msg_id] = message
+            _reply_events.pop(msg_id).set()
+        return None
+
+    try:
+        if method == "initialize":
+            result = {
+                "protocolVersion": params.get("protocolVersion", "2024-11-05"),
+                "capabilities": {"tools": {"listChanged": True}},
+                "serverInfo": SERVER_INFO,
+            }
+        elif method == "tools/list":
+            result = {"tools": TOOLS}
+        elif method == "tools/call":
+            result = _call_tool(params)
+        elif method == "ping":
+            result = {}
+        elif msg_id is None:
+            return None
+        else:
+            raise _RPCError(-32601, f"Method not found: {method}")
+    except _RPCError as e:
+        return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": e.code, "message": e.message}}
+
+    if msg_id is None:
+        return None
+    return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+
+def _handle_and_write(message: Dict[str, Any]) -> None:
+    response = handle(message)
+    if response is not None:
+        _write(response)
+
+
+def _handle_batch(messages: List[Any]) -> None:
+    responses: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+
+    def run(i: int, message: Dict[str, Any]) -> None:
+        responses[i] = handle(message)
+
+    threads = [threading.Thread(target=run, args=(i, m)) for i, m in enumerate(messages)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    replies = [r for r in responses if r is not None]
+    if replies:
+        _write(replies)
+
+
+def main() -> None:
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            _write({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            continue
+        if isinstance(message, list):
+            if DROP_BATCH:
+                continue
+            if NO_BATCH:
+                _write({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}})
+            else:
+                threading.Thread(target=_handle_batch, args=(message,), daemon=True).start()
+            continue
+        threading.Thread(target=_handle_and_write, args=(message,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
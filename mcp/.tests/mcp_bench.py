@@ -0,0 +1,559 @@
+"""
+Latency and throughput benchmark for stdio MCP servers.
+
+Reports spawn time, initialize latency, per-tool p50/p95/p99 latency,
+throughput at one or more concurrency levels, and server RSS. Output is a
+human-readable table plus an optional JSON report for comparing releases.
+
+Usage:
+    python mcp_client.py bench [options] -- <command> [args...]
+
+    python mcp_client.py bench --scenario scenarios/gitignore.json \
+        --concurrency 1,4,16 --json gitignore-bench.json -- gitignore serve
+
+Scenario file (JSON):
+    {
+        "calls": [
+            {"tool": "gitignore_search", "arguments": {"pattern": "go"}},
+            {"tool": "gitignore_list", "repeat": 2}
+        ]
+    }
+
+Each iteration runs every call `repeat` times (default 1). Without a
+scenario, the benchmark measures `ping` round-trips only.
+
+Codec mode needs no server; it measures client-side per-message cost of
+framing plus decoding/encoding for each installed JSON codec, against the
+old text-mode readline + json.loads path:
+
+    python mcp_client.py bench --codecs [--sizes 1024,65536,4194304]
+
+Startup mode spawns the server repeatedly and splits cold start into exec,
+first byte on stdout, the initialize response and the first tools/list, then
+compares it with acquiring a preforked warm spare from ServerPool:
+
+    python mcp_client.py bench --startup [--runs 10] [--spares 2] -- gitignore serve
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp_client import MCPClient, MCPError
+from mcp_codec import LineFramer, available_codecs, get_codec
+from server_pool import ServerPool
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of values (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies_ms: List[float]) -> Dict[str, float]:
+    """Count, mean, p50/p95/p99 and max of a list of latencies."""
+    if not latencies_ms:
+        return {"count": 0}
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Resident set size of a process in KiB, or None if it cannot be read."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        out = subprocess.run(
+            ["ps", "-o", "rss=", "-p", str(pid)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return int(out) if out else None
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def load_scenario(path: Optional[str]) -> List[Dict[str, Any]]:
+    """Load a scenario file into a flat list of {"tool", "arguments"} calls."""
+    if path is None:
+        return [{"tool": "ping", "arguments": None}]
+
+    with open(path) as f:
+        data = json.load(f)
+    entries = data["calls"] if isinstance(data, dict) else data
+
+    calls = []
+    for entry in entries:
+        call = {"tool": entry["tool"], "arguments": entry.get("arguments")}
+        calls.extend([call] * int(entry.get("repeat", 1)))
+    if not calls:
+        raise ValueError(f"Scenario {path} has no calls")
+    return calls
+
+
+def _submit(client: MCPClient, call: Dict[str, Any]):
+    if call["tool"] == "ping":
+        return client.submit_ping()
+    return client.submit_tool(call["tool"], call["arguments"])
+
+
+def run_load(client: MCPClient, calls: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """
+    Run calls with at most `concurrency` requests in flight.
+
+    Returns wall time, throughput and per-tool latency summaries.
+    """
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    slots = threading.Semaphore(concurrency)
+
+    def record(tool: str, started: float, future) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            if future.exception() is not None:
+                errors[tool] = errors.get(tool, 0) + 1
+            else:
+                latencies.setdefault(tool, []).append(elapsed_ms)
+        slots.release()
+
+    wall_start = time.perf_counter()
+    for call in calls:
+        slots.acquire()
+        started = time.perf_counter()
+        try:
+            future = _submit(client, call)
+        except MCPError:
+            slots.release()
+            raise
+        future.add_done_callback(lambda f, t=call["tool"], s=started: record(t, s, f))
+    # Done callbacks run after result() wakes us; each frees its slot once
+    # recorded, so holding every slot means every call has been counted
+    for _ in range(concurrency):
+        slots.acquire()
+    wall_s = time.perf_counter() - wall_start
+
+    tools = {}
+    for tool in sorted(set(latencies) | set(errors)):
+        tools[tool] = summarize(latencies.get(tool, []))
+        tools[tool]["errors"] = errors.get(tool, 0)
+
+    return {
+        "concurrency": concurrency,
+        "calls": len(calls),
+        "errors": sum(errors.values()),
+        "wall_s": round(wall_s, 4),
+        "throughput_rps": round(len(calls) / wall_s, 2) if wall_s > 0 else 0.0,
+        "tools": tools,
+    }
+
+
+def _tool_response(size: int) -> bytes:
+    """A tools/call response whose text content is roughly `size` bytes of table records."""
+    record = {
+        "sys_id": "0" * 32,
+        "name": "lnx-prod-app-0001",
+        "operational_status": "1",
+        "u_lob": "SET",
+        "ip_address": "10.0.0.1",
+        "sys_updated_on": "2025-01-01 00:00:00",
+    }
+    per_record = len(json.dumps(record)) + 2
+    records = [dict(record, name=f"lnx-prod-app-{i:04d}") for i in range(max(size // per_record, 1))]
+    text = json.dumps({"records": records, "total_fetched": len(records)})
+    message = {"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": text}]}}
+    return json.dumps(message).encode() + b"\n"
+
+
+def _time_per_message(fn, payload: bytes, rounds: int) -> float:
+    fn(payload)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def _chunks(payload: bytes, chunk_size: int = 256 * 1024) -> List[memoryview]:
+    view = memoryview(payload)
+    return [view[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+
+
+def run_codec_bench(sizes: List[int], min_bytes: int = 64 * 1024 * 1024) -> Dict[str, Any]:
+    """
+    Measure client-side framing + decode and encode cost per message.
+
+    "text+json" is the previous transport: a text-mode stream (UTF-8 decode),
+    readline, strip and stdlib json.loads on a str. The others frame raw
+    bytes with LineFramer and decode with the named codec.
+    """
+    results = []
+    for size in sizes:
+        payload = _tool_response(size)
+        chunks = _chunks(payload)
+        message = json.loads(payload)
+        rounds = max(min_bytes // len(payload), 5)
+
+        def text_decode(data: bytes) -> Any:
+            stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+            for line in stream:
+                json.loads(line.strip())
+
+        row = {
+            "size_bytes": len(payload),
+            "rounds": rounds,
+            "codecs": {
+                "text+json": {
+                    "decode_us": round(_time_per_message(text_decode, payload, rounds), 2),
+                    "encode_us": round(_time_per_message(
+                        lambda _: (json.dumps(message) + "\n").encode(), payload, rounds), 2),
+                },
+            },
+        }
+        for name in available_codecs():
+            codec = get_codec(name)
+
+            def framed_decode(_: bytes, codec=codec) -> Any:
+                framer = LineFramer()
+                for chunk in chunks:
+                    for line in framer.feed(chunk):
+                        codec.loads(line)
+
+            row["codecs"][name] = {
+                "decode_us": round(_time_per_message(framed_decode, payload, rounds), 2),
+                "encode_us": round(_time_per_message(
+                    lambda _, codec=codec: codec.dumps(message) + b"\n", payload, rounds), 2),
+            }
+        results.append(row)
+
+    return {
+        "host": {"python": platform.python_version(), "platform": platform.platform()},
+        "baseline": "text+json",
+        "sizes": results,
+    }
+
+
+def format_codec_report(report: Dict[str, Any]) -> str:
+    """Render a codec benchmark report as a human-readable table."""
+    header = f"{'size':>10} {'codec':<10} {'decode us':>12} {'encode us':>12} {'decode MB/s':>12} {'vs baseline':>12}"
+    lines = [header, "-" * len(header)]
+    for row in report["sizes"]:
+        baseline = row["codecs"][report["baseline"]]["decode_us"]
+        for name, stats in row["codecs"].items():
+            mb_s = row["size_bytes"] / stats["decode_us"] if stats["decode_us"] else 0.0
+            speedup = baseline / stats["decode_us"] if stats["decode_us"] else 0.0
+            lines.append(
+                f"{row['size_bytes']:>10} {name:<10} {stats['decode_us']:>12.1f} {stats['encode_us']:>12.1f} "
+                f"{mb_s:>12.1f} {speedup:>11.2f}x"
+            )
+    return "\n".join(lines)
+
+
+def run_bench(
+    command: List[str],
+    scenario: List[Dict[str, Any]],
+    concurrency_levels: List[int],
+    iterations: int = 20,
+    warmup: int = 1,
+    env: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    codec: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Benchmark one server command; returns the JSON-serializable report."""
+    spawn_start = time.perf_counter()
+    client = MCPClient(command, env, cwd=cwd, codec=codec)
+    spawn_ms = (time.perf_counter() - spawn_start) * 1000
+
+    try:
+        init_start = time.perf_counter()
+        init = client.initialize()
+        initialize_ms = (time.perf_counter() - init_start) * 1000
+
+        list_start = time.perf_counter()
+        tools = client.list_tools()
+        list_tools_ms = (time.perf_counter() - list_start) * 1000
+
+        pid = client.process.pid
+        rss = {"after_initialize_kb": rss_kb(pid)}
+
+        for _ in range(warmup):
+            run_load(client, scenario, 1)
+
+        runs = []
+        for level in concurrency_levels:
+            runs.append(run_load(client, scenario * iterations, level))
+            rss[f"after_c{level}_kb"] = rss_kb(pid)
+    finally:
+        client.close()
+
+    return {
+        "command": command,
+        "codec": client.codec.name,
+        "server": init.get("serverInfo", {}),
+        "host": {"python": platform.python_version(), "platform": platform.platform()},
+        "spawn_ms": round(spawn_ms, 3),
+        "initialize_ms": round(initialize_ms, 3),
+        "list_tools_ms": round(list_tools_ms, 3),
+        "tool_count": len(tools),
+        "iterations": iterations,
+        "rss": rss,
+        "runs": runs,
+    }
+
+
+STARTUP_PHASES = ("exec_ms", "first_byte_ms", "initialize_ms", "tools_list_ms", "ready_ms")
+
+
+def _ms(start: float, end: Optional[float]) -> Optional[float]:
+    return None if end is None else round((end - start) * 1000, 3)
+
+
+def _phase_stats(values: List[Optional[float]]) -> Dict[str, Any]:
+    measured = [v for v in values if v is not None]
+    if not measured:
+        return {"count": 0}
+    return {
+        "count": len(measured),
+        "min_ms": round(min(measured), 3),
+        "p50_ms": round(percentile(measured, 50), 3),
+        "max_ms": round(max(measured), 3),
+    }
+
+
+def profile_cold_start(
+    command: List[str],
+    env: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+) -> Dict[str, Optional[float]]:
+    """
+    Spawn one server and time each startup phase, in ms since spawn began.
+
+    initialize is sent as soon as the process exists, so first byte is the
+    earliest the server can answer anything.
+    """
+    client = MCPClient(command, env, cwd=cwd)
+    try:
+        client.initialize()
+        initialized_at = time.perf_counter()
+        client.list_tools()
+        ready_at = time.perf_counter()
+    finally:
+        client.close()
+
+    start = client.started_at
+    return {
+        "exec_ms": _ms(start, client.spawned_at),
+        "first_byte_ms": _ms(start, client.first_byte_at),
+        "initialize_ms": _ms(start, initialized_at),
+        "tools_list_ms": _ms(initialized_at, ready_at),
+        "ready_ms": _ms(start, ready_at),
+    }
+
+
+def run_startup_profile(
+    command: List[str],
+    runs: int = 10,
+    spares: int = 2,
+    env: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Profile cold starts against warm acquires from a preforked pool."""
+    samples = [profile_cold_start(command, env, cwd) for _ in range(runs)]
+    cold = {phase: _phase_stats([s[phase] for s in samples]) for phase in STARTUP_PHASES}
+
+    warm: List[float] = []
+    if spares > 0:
+        pool = ServerPool({"server": {"command": command, "env": env}})
+        try:
+            pool.prefork("server", spares, cwd)
+            for _ in range(runs):
+                pool.wait_for_spares()
+                start = time.perf_counter()
+                client = pool.acquire("server", cwd)
+                warm.append((time.perf_counter() - start) * 1000)
+                # Recycle so every acquire is served by a fresh spare
+                pool.recycle(client)
+        finally:
+            pool.close()
+
+    return {
+        "command": command,
+        "host": {"python": platform.python_version(), "platform": platform.platform()},
+        "runs": runs,
+        "spares": spares,
+        "cold": cold,
+        "warm_acquire": _phase_stats(warm),
+        "samples": samples,
+    }
+
+
+def format_startup_report(report: Dict[str, Any]) -> str:
+    """Render a startup profile as a human-readable table."""
+    header = f"{'phase':<16} {'runs':>5} {'min ms':>9} {'p50 ms':>9} {'max ms':>9}"
+    lines = [
+        f"Command:  {' '.join(report['command'])}",
+        f"Runs:     {report['runs']} cold, prefork spares: {report['spares']}",
+        "",
+        header,
+        "-" * len(header),
+    ]
+    rows = [(phase[:-3].replace("_", " "), report["cold"][phase]) for phase in STARTUP_PHASES]
+    if report["spares"]:
+        rows.append(("warm acquire", report["warm_acquire"]))
+    for label, stats in rows:
+        if stats["count"]:
+            lines.append(
+                f"{label:<16} {stats['count']:>5} {stats['min_ms']:>9.2f} "
+                f"{stats['p50_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+            )
+        else:
+            lines.append(f"{label:<16} {0:>5}")
+    lines.append("")
+    lines.append("exec, first byte, initialize and ready are measured from spawn; tools list from initialize.")
+    return "\n".join(lines)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a benchmark report as a human-readable table."""
+    server = report["server"]
+    lines = [
+        f"Server:      {server.get('name', '?')} {server.get('version', '')}".rstrip(),
+        f"Command:     {' '.join(report['command'])}",
+        f"Codec:       {report['codec']}",
+        f"Spawn:       {report['spawn_ms']:.2f} ms",
+        f"Initialize:  {report['initialize_ms']:.2f} ms",
+        f"tools/list:  {report['list_tools_ms']:.2f} ms ({report['tool_count']} tools)",
+    ]
+    for label, value in report["rss"].items():
+        lines.append(f"RSS {label[:-3]}: {value if value is not None else '?'} KiB")
+
+    header = f"{'conc':>5} {'tool':<28} {'count':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    for run in report["runs"]:
+        lines.append("")
+        lines.append(
+            f"Concurrency {run['concurrency']}: {run['calls']} calls in {run['wall_s']:.3f} s "
+            f"= {run['throughput_rps']:.1f} calls/s ({run['errors']} errors)"
+        )
+        lines.append(header)
+        lines.append("-" * len(header))
+        for tool, stats in run["tools"].items():
+            if stats["count"]:
+                lines.append(
+                    f"{run['concurrency']:>5} {tool:<28} {stats['count']:>6} {stats['errors']:>4} "
+                    f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+                )
+            else:
+                lines.append(f"{run['concurrency']:>5} {tool:<28} {0:>6} {stats['errors']:>4}")
+    return "\n".join(lines)
+
+
+def _int_list(option: str) -> Callable[[str], List[int]]:
+    """argparse type for a comma-separated list of integers >= 1, named in errors by option."""
+    def parse(value: str) -> List[int]:
+        try:
+            values = [int(v) for v in value.split(",") if v.strip()]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{option} expects comma-separated integers, got: {value}")
+        if not values or any(v < 1 for v in values):
+            raise argparse.ArgumentTypeError(f"{option} values must be >= 1, got: {value}")
+        return values
+    return parse
+
+
+def main(argv: List[str]) -> int:
+    """Entry point for `python mcp_client.py bench ...`."""
+    parser = argparse.ArgumentParser(
+        prog="mcp_client.py bench",
+        description="Benchmark an MCP stdio server.",
+    )
+    parser.add_argument("--scenario", help="JSON scenario file of tool calls (default: ping only)")
+    parser.add_argument("--concurrency", type=_int_list("--concurrency"), default=[1],
+                        help="Comma-separated in-flight request limits, e.g. 1,4,16 (default: 1)")
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="Times to run the scenario per concurrency level (default: 20)")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Untimed scenario passes before measuring (default: 1)")
+    parser.add_argument("--cwd", help="Working directory for the server")
+    parser.add_argument("--codec", help="Client JSON codec: orjson, msgspec or json (default: fastest installed)")
+    parser.add_argument("--codecs", action="store_true",
+                        help="Benchmark per-message codec overhead instead of a server")
+    parser.add_argument("--sizes", type=_int_list("--sizes"), default=[1024, 64 * 1024, 4 * 1024 * 1024],
+                        help="Message sizes in bytes for --codecs (default: 1024,65536,4194304)")
+    parser.add_argument("--startup", action="store_true",
+                        help="Profile server cold start and prefork warm acquire instead of tool calls")
+    parser.add_argument("--runs", type=int, default=10,
+                        help="Cold starts to time for --startup (default: 10)")
+    parser.add_argument("--spares", type=int, default=2,
+                        help="Prefork spares for the --startup warm comparison; 0 to skip (default: 2)")
+    parser.add_argument("--json", dest="json_path", help="Write the JSON report here ('-' for stdout)")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Server command, after --")
+    args = parser.parse_args(argv)
+
+    if args.codecs:
+        report = run_codec_bench(args.sizes)
+        return _emit(report, format_codec_report(report), args.json_path)
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("missing server command (e.g. -- gitignore serve)")
+
+    if args.startup:
+        try:
+            report = run_startup_profile(command, runs=args.runs, spares=args.spares, cwd=args.cwd)
+        except FileNotFoundError as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 1
+        except MCPError as e:
+            print(f"✗ MCP Error: {e}", file=sys.stderr)
+            return 1
+        return _emit(report, format_startup_report(report), args.json_path)
+
+    try:
+        scenario = load_scenario(args.scenario)
+        report = run_bench(command, scenario, args.concurrency, iterations=args.iterations,
+                           warmup=args.warmup, cwd=args.cwd, codec=args.codec)
+    except FileNotFoundError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    except MCPError as e:
+        print(f"✗ MCP Error: {e}", file=sys.stderr)
+        return 1
+
+    return _emit(report, format_report(report), args.json_path)
+
+
+def _emit(report: Dict[str, Any], table: str, json_path: Optional[str]) -> int:
+    if json_path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(table)
+        if json_path:
+            with open(json_path, "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+            print(f"\nJSON report written to {os.path.abspath(json_path)}")
+    return 0
@@ -6,10 +6,31 @@ Implements the Model Context Protocol (JSON-RPC 2.0 over stdio) for testing purp
 
 from __future__ import annotations
 
+import asyncio
+import codecs
 import json
+import logging
+import os
+import queue
 import subprocess
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Union
+
+from mcp_codec import Codec, get_codec, read_frames
+from mcp_metrics import ClientMetrics
+from mcp_schema import SchemaError, Validator, compile_schema
+from mcp_tools_cache import ToolsCache
+from mcp_transcript import TranscriptRecorder
+
+PROTOCOL_VERSION = "2024-11-05"
+
+# Client-side tool argument validation; see MCPClient(validation=...)
+VALIDATION_MODES = ("strict", "coerce", "off")
 
 
 class MCPError(Exception):
@@ -21,6 +42,109 @@ class MCPError(Exception):
         super().__init__(f"MCP Error {code}: {message}")
 
 
+def _error_from_response(err: Dict) -> MCPError:
+    """Build an MCPError from a JSON-RPC error object."""
+    return MCPError(err.get("code", -1), err.get("message", "Unknown error"), err.get("data"))
+
+
+def server_label(command: List[str]) -> str:
+    """Short server name for a command: the executable, or the script run by an interpreter."""
+    name = os.path.basename(command[0])
+    if name.startswith("python") and len(command) > 1 and command[1].endswith(".py"):
+        return os.path.basename(command[1])
+    return name
+
+
+def _tool_records(name: str, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Records list from a paged query tool's JSON text result."""
+    content = result.get("content") or []
+    text = content[0].get("text", "") if content else ""
+    if result.get("isError"):
+        raise MCPError(-32603, f"{name} failed: {text}")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise MCPError(-32603, f"{name} did not return JSON records: {text[:200]}")
+    records = data.get("records") if isinstance(data, dict) else data
+    if not isinstance(records, list):
+        raise MCPError(-32603, f"{name} result has no records list")
+    return records
+
+
+class StderrTail:
+    """
+    Ring buffer holding the last `limit` characters of a server's stderr.
+
+    Lines are optionally passed to a callback and/or a logger as they arrive,
+    so nothing is lost to the bound; only the retained tail is capped. Raw
+    output goes through feed(), which holds at most `limit` characters of an
+    unfinished line: a line longer than that is passed on in pieces.
+    """
+
+    # Bytes read from the stderr pipe per call
+    CHUNK_SIZE = 4096
+
+    def __init__(
+        self,
+        limit: int = 64 * 1024,
+        on_line: Optional[Callable[[str], None]] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.limit = limit
+        self.on_line = on_line
+        self.logger = logger
+        self._lines: Deque[str] = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.total_chars = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, chunk: bytes) -> None:
+        """Record a chunk of raw stderr output, which may end mid-line."""
+        lines = (self._partial + self._decoder.decode(chunk)).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.append(line)
+        if len(self._partial) >= self.limit:
+            # No newline in sight: pass the line on rather than hold all of it
+            self.append(self._partial)
+            self._partial = ""
+
+    def flush(self) -> None:
+        """Record a last line that ended without a newline."""
+        line = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if line:
+            self.append(line)
+
+    def append(self, line: str) -> None:
+        """Record one line of stderr output."""
+        line = line.rstrip("\r\n")
+        if self.on_line is not None:
+            try:
+                self.on_line(line)
+            except Exception:
+                # A broken callback must not stop the drain and wedge the server
+                logging.getLogger(__name__).exception("stderr callback failed")
+        if self.logger is not None:
+            self.logger.info(line)
+
+        if len(line) >= self.limit:
+            line = line[-self.limit:]
+        with self._lock:
+            self.total_chars += len(line) + 1
+            self._lines.append(line)
+            self._size += len(line) + 1
+            while self._size > self.limit and self._lines:
+                self._size -= len(self._lines.popleft()) + 1
+
+    def text(self) -> str:
+        """The retained stderr tail."""
+        with self._lock:
+            return "\n".join(self._lines)
+
+
 class MCPClient:
     """
     MCP client for testing stdio-based servers.
@@ -30,12 +154,37 @@ class MCPClient:
         result = client.initialize()
         tools = client.list_tools()
         result = client.call_tool("gitignore_search", {"pattern": "go"})
+
+        # Several calls in flight at once against the same process
+        futures = [client.submit_tool("gitignore_search", {"pattern": p}) for p in ("go", "node")]
+        results = [f.result() for f in futures]
         client.close()
     """
 
-    PROTOCOL_VERSION = "2024-11-05"
+    PROTOCOL_VERSION = PROTOCOL_VERSION
+
+    # Metrics for clients created without their own (set by the pytest
+    # timing plugin and --mcp-metrics)
+    default_metrics: Optional[ClientMetrics] = None
 
-    def __init__(self, command: List[str], env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None):
+    # How long to wait for a reply to the batch capability probe
+    BATCH_PROBE_TIMEOUT = 2.0
+
+    def __init__(
+        self,
+        command: List[str],
+        env: Optional[Dict[str, str]] = None,
+        cwd: Optional[str] = None,
+        stderr_limit: int = 64 * 1024,
+        on_stderr: Optional[Callable[[str], None]] = None,
+        stderr_logger: Optional[logging.Logger] = None,
+        codec: Union[str, Codec, None] = None,
+        record: Optional[str] = None,
+        tools_cache: Optional[ToolsCache] = None,
+        validation: str = "strict",
+        default_timeout: Optional[float] = None,
+        metrics: Optional[ClientMetrics] = None,
+    ):
         """
         Start an MCP server process.
 
@@ -43,16 +192,77 @@ class MCPClient:
             command: Command and args to start server (e.g., ["gitignore", "serve"])
             env: Optional environment variables for the server process
             cwd: Working directory for the server process (default: current dir)
+            stderr_limit: Characters of server stderr to keep for error messages
+            on_stderr: Called with each stderr line as it arrives
+            stderr_logger: Logger that receives each stderr line at INFO
+            codec: JSON codec name ("orjson", "msgspec", "json") or Codec;
+                default is the fastest installed
+            record: Write a transcript of the session to this path
+                (see mcp_transcript.py; .gz paths are compressed)
+            tools_cache: Persist list_tools() results across sessions
+                (see mcp_tools_cache.py)
+            validation: Check tool arguments against each tool's inputSchema
+                before sending: "strict" rejects mismatches, "coerce" converts
+                unambiguous ones (e.g. "5" -> 5) and "off" sends arguments as
+                given. Applies once list_tools() has run.
+            default_timeout: Deadline in seconds for requests made without
+                their own timeout (default: wait forever)
+            metrics: Record per-request phase timings, counters and bytes
+                (see mcp_metrics.py); may be shared between clients.
+                Defaults to MCPClient.default_metrics.
         """
+        if validation not in VALIDATION_MODES:
+            raise ValueError(f"validation must be one of {VALIDATION_MODES}, got {validation!r}")
         self.command = command
+        self.validation = validation
+        self.default_timeout = default_timeout
+        self.metrics = metrics if metrics is not None else MCPClient.default_metrics
+        self.server = server_label(command)
+        self.codec = get_codec(codec)
         self._request_id = 0
         self._initialized = False
+        self._init_result: Optional[dict] = None
+
+        # Requests in flight, keyed by JSON-RPC id. Responses are matched by id,
+        # so several requests can be outstanding against one server process.
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed_error: Optional[MCPError] = None
+
+        # None until probed; see _probe_batch_support()
+        self._batch_supported: Optional[bool] = None
+        self._batch_rejection: Optional[Future] = None
+
+        # Tool catalog, kept until the server sends tools/list_changed. The
+        # generation is bumped on every change so a tools/list reply that
+        # raced a notification is not cached.
+        self.tools_cache = tools_cache
+        self._tools: Optional[List[Dict]] = None
+        self._tools_generation = 0
+        self._tools_lock = threading.Lock()
+
+        # Notification subscribers by method ("*" for every notification), and
+        # per-request progress callbacks by progressToken
+        self._subscribers: Dict[str, List[Callable[[Dict], None]]] = {}
+        self._progress: Dict[Any, Callable[[Dict], None]] = {}
+        self._subscribers_lock = threading.Lock()
+        self.subscribe("notifications/tools/list_changed", lambda message: self._tools_changed())
+
+        # inputSchema validators by tool name, compiled from the catalog in
+        # _validated_tools
+        self._validators: Dict[str, Validator] = {}
+        self._validated_tools: Optional[List[Dict]] = None
 
         # Merge with current environment
         process_env = dict(__import__("os").environ)
         if env:
             process_env.update(env)
 
+        # Startup timeline (time.perf_counter), used by the startup profiler
+        self.started_at = time.perf_counter()
+        self.first_byte_at: Optional[float] = None
+
         try:
             self.process = subprocess.Popen(
                 command,
@@ -61,14 +271,286 @@ class MCPClient:
                 stderr=subprocess.PIPE,
                 env=process_env,
                 cwd=cwd,
-                text=True,
             )
         except FileNotFoundError:
             raise FileNotFoundError(f"MCP server binary not found: {command[0]}")
+        self.spawned_at = time.perf_counter()
+        if self.metrics is not None:
+            self.metrics.record_lifecycle("spawn", self.server, self.spawned_at - self.started_at)
+
+        self._recorder = TranscriptRecorder(record, command) if record else None
+
+        # Drain stderr continuously; a chatty server would otherwise fill the
+        # pipe buffer and block on its next write.
+        self.stderr_tail = StderrTail(stderr_limit, on_line=on_stderr, logger=stderr_logger)
+        self._stderr_reader = threading.Thread(
+            target=self._drain_stderr, name=f"mcp-stderr-{command[0]}", daemon=True
+        )
+        self._stderr_reader.start()
+
+        self._reader = threading.Thread(
+            target=self._read_loop, name=f"mcp-reader-{command[0]}", daemon=True
+        )
+        self._reader.start()
 
     def _next_id(self) -> int:
-        self._request_id += 1
-        return self._request_id
+        with self._pending_lock:
+            self._request_id += 1
+            return self._request_id
+
+    def _read_loop(self) -> None:
+        """Read server stdout and resolve pending requests by response id."""
+        # Frame raw bytes ourselves: no text decoding pass, no per-line str copy
+        stdout = getattr(self.process.stdout, "raw", self.process.stdout)
+        loads = self.codec.loads
+        decode_errors = self.codec.decode_errors
+        metrics = self.metrics
+        received = None
+
+        def readinto(view):
+            n = stdout.readinto(view)
+            if self.first_byte_at is None and n:
+                self.first_byte_at = time.perf_counter()
+            return n
+
+        for line in read_frames(readinto):
+            if metrics is not None:
+                received_at = time.perf_counter()
+                metrics.count_bytes("in", len(line) + 1)
+            try:
+                message = loads(line)
+            except decode_errors:
+                # Stray non-JSON output (e.g. a debug print) must not break the session
+                continue
+            # A list is the reply to a batch request
+            items = message if isinstance(message, list) else (message,)
+            if metrics is not None and items:
+                # (read at, parse seconds, bytes) per reply; a batch shares its line
+                received = (received_at, (time.perf_counter() - received_at) / len(items), (len(line) + 1) // len(items))
+            for item in items:
+                if self._recorder is not None and isinstance(item, dict):
+                    self._recorder.received(item)
+                self._dispatch(item, received)
+
+        # Let the drainer catch the server's last words before reporting them
+        self._stderr_reader.join(timeout=1)
+        self._fail_pending(MCPError(-32603, f"Server closed connection. stderr: {self.stderr_tail.text()}"))
+
+    def _drain_stderr(self) -> None:
+        # Fixed-size reads, so a huge line without a newline stays bounded
+        stderr = self.process.stderr
+        while True:
+            chunk = stderr.read1(StderrTail.CHUNK_SIZE)
+            if not chunk:
+                break
+            self.stderr_tail.feed(chunk)
+        self.stderr_tail.flush()
+
+    def _dispatch(self, message: Any, received: Optional[tuple] = None) -> None:
+        """Route one decoded message from the server."""
+        if not isinstance(message, dict):
+            return
+        if "method" in message:
+            if self.metrics is not None:
+                self.metrics.count_notification(message["method"])
+            if "id" in message:
+                self._answer_server_request(message)
+            else:
+                self._notify_subscribers(message)
+            return
+        msg_id = message.get("id")
+        if msg_id is None and "error" in message:
+            # Errors without an id are how servers reject a batch they cannot parse
+            with self._pending_lock:
+                rejection, self._batch_rejection = self._batch_rejection, None
+            if rejection is not None:
+                rejection.set_result(message["error"])
+            return
+        with self._pending_lock:
+            future = self._pending.pop(msg_id, None)
+        if future is None:
+            # Response to a request nobody is waiting for
+            return
+        if received is not None:
+            future.received = received
+        if "error" in message:
+            future.set_exception(_error_from_response(message["error"]))
+        else:
+            future.set_result(message.get("result"))
+
+    def _notify_subscribers(self, message: Dict) -> None:
+        """Hand a server notification to its progress callback and subscribers."""
+        method = message["method"]
+        params = message.get("params") or {}
+        with self._subscribers_lock:
+            callbacks = list(self._subscribers.get(method, ())) + list(self._subscribers.get("*", ()))
+            if method == "notifications/progress":
+                progress = self._progress.get(params.get("progressToken"))
+                if progress is not None:
+                    callbacks.insert(0, lambda message: progress(params))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception:
+                # A broken subscriber must not kill the reader thread
+                logging.getLogger(__name__).exception("notification subscriber failed for %s", method)
+
+    def _answer_server_request(self, message: Dict) -> None:
+        """Reply to a server-initiated request so the server is never left waiting."""
+        if message["method"] == "ping":
+            reply = {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+        else:
+            reply = {
+                "jsonrpc": "2.0",
+                "id": message["id"],
+                "error": {"code": -32601, "message": f"Method not found: {message['method']}"},
+            }
+        try:
+            self._write(reply)
+        except MCPError:
+            pass
+
+    def _fail_pending(self, error: MCPError) -> None:
+        """Fail every outstanding request; later requests fail immediately."""
+        with self._pending_lock:
+            self._closed_error = error
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_exception(error)
+
+    def _write(self, message: Any) -> Optional[tuple]:
+        """
+        Encode and write one message (or batch).
+
+        Returns (serialize seconds, write seconds, bytes, written at) when
+        metrics are enabled, else None. Write time includes waiting for the
+        write lock and for the pipe to drain.
+        """
+        started = time.perf_counter() if self.metrics is not None else 0.0
+        line = self.codec.dumps(message) + b"\n"
+        serialized = time.perf_counter() if self.metrics is not None else 0.0
+        if self._recorder is not None:
+            self._recorder.sent(message)
+        with self._write_lock:
+            try:
+                self.process.stdin.write(line)
+                self.process.stdin.flush()
+            except (BrokenPipeError, ValueError, OSError) as e:
+                raise MCPError(-32603, f"Failed to write to server: {e}")
+        if self.metrics is None:
+            return None
+        written = time.perf_counter()
+        self.metrics.count_bytes("out", len(line))
+        return serialized - started, written - serialized, len(line), written
+
+    def _observe(self, future: Future, message: Dict, sent: tuple) -> None:
+        """Record the request's phases in metrics once it completes."""
+        def record(future: Future) -> None:
+            serialize_s, write_s, bytes_out, written = sent
+            received = getattr(future, "received", None)
+            if received is not None:
+                received_at, parse_s, bytes_in = received
+            else:
+                # Failed locally (timeout, cancel, server exit): no reply was read
+                received_at, parse_s, bytes_in = time.perf_counter(), 0.0, 0
+            error = future.exception()
+            params = message.get("params") or {}
+            self.metrics.record({
+                "event": "request",
+                "server": self.server,
+                "method": message["method"],
+                "tool": params.get("name", "") if message["method"] == "tools/call" else "",
+                "id": message["id"],
+                "serialize_ms": serialize_s * 1000,
+                "write_ms": write_s * 1000,
+                "wait_ms": max(received_at - written, 0.0) * 1000,
+                "parse_ms": parse_s * 1000,
+                "bytes_out": bytes_out,
+                "bytes_in": bytes_in,
+                "error": None if error is None else getattr(error, "code", -32603),
+            })
+
+        future.add_done_callback(record)
+
+    def _register(self, method: str, params: Optional[Dict] = None) -> tuple:
+        """Allocate an id and pending future for a request; returns (message, future)."""
+        msg_id = self._next_id()
+        message = {
+            "jsonrpc": "2.0",
+            "id": msg_id,
+            "method": method,
+        }
+        if params:
+            message["params"] = params
+
+        future: Future = Future()
+        future.request_id = msg_id
+        with self._pending_lock:
+            if self._closed_error is not None:
+                raise self._closed_error
+            self._pending[msg_id] = future
+        return message, future
+
+    def _unregister(self, messages: List[Dict]) -> None:
+        with self._pending_lock:
+            for message in messages:
+                self._pending.pop(message["id"], None)
+
+    def _submit(self, method: str, params: Optional[Dict] = None) -> Future:
+        """Send a JSON-RPC request without waiting; the future resolves to its result."""
+        message, future = self._register(method, params)
+        try:
+            sent = self._write(message)
+        except MCPError:
+            self._unregister([message])
+            raise
+        if sent is not None:
+            self._observe(future, message, sent)
+        return future
+
+    def _submit_batch(self, requests: List[tuple]) -> List[Future]:
+        """Send (method, params) requests as one JSON-RPC batch array."""
+        registered = [self._register(method, params) for method, params in requests]
+        messages = [message for message, _ in registered]
+        try:
+            sent = self._write(messages)
+        except MCPError:
+            self._unregister(messages)
+            raise
+        if sent is not None:
+            # One write for the whole batch; each call gets an equal share
+            serialize_s, write_s, nbytes, written = sent
+            share = (serialize_s / len(messages), write_s / len(messages), nbytes // len(messages), written)
+            for message, future in registered:
+                self._observe(future, message, share)
+        return [future for _, future in registered]
+
+    def _probe_batch_support(self) -> bool:
+        """
+        Find out once whether the server accepts JSON-RPC batches.
+
+        Sends a one-element batch containing a ping. Servers without batch
+        support either answer with an id-less error or drop the line, so no
+        reply within BATCH_PROBE_TIMEOUT also counts as unsupported.
+        """
+        if self._batch_supported is not None:
+            return self._batch_supported
+
+        rejection: Future = Future()
+        with self._pending_lock:
+            self._batch_rejection = rejection
+        ping = self._submit_batch([("ping", None)])[0]
+        done, _ = wait([ping, rejection], timeout=self.BATCH_PROBE_TIMEOUT, return_when=FIRST_COMPLETED)
+        with self._pending_lock:
+            self._batch_rejection = None
+
+        self._batch_supported = ping in done and ping.exception() is None
+        if ping not in done:
+            # Rejected or dropped: the ping will never be answered, and a
+            # pending entry left behind would stop the pool reusing the client
+            self._abandon(ping, "Batch probe unanswered", MCPError(-32600, "Batch requests not supported"))
+        return self._batch_supported
 
     def _send(self, method: str, params: Optional[Dict] = None, is_notification: bool = False) -> Optional[Dict]:
         """Send a JSON-RPC request/notification and optionally wait for response."""
@@ -79,35 +561,56 @@ class MCPClient:
             }
             if params:
                 message["params"] = params
-        else:
-            message = {
-                "jsonrpc": "2.0",
-                "id": self._next_id(),
-                "method": method,
-            }
-            if params:
-                message["params"] = params
+            self._write(message)
+            return None
 
-        line = json.dumps(message) + "\n"
-        self.process.stdin.write(line)
-        self.process.stdin.flush()
+        return self._wait(self._submit(method, params), None, method)
 
-        if is_notification:
-            return None
+    def _wait(self, future: Future, timeout: Optional[float], what: str) -> Any:
+        """Result of a request future, cancelling the request if the deadline passes."""
+        if timeout is None:
+            timeout = self.default_timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # -32001 is the MCP SDKs' RequestTimeout code
+            error = MCPError(-32001, f"Request timed out after {timeout}s: {what}")
+            if not self._abandon(future, f"Client deadline of {timeout}s exceeded", error):
+                # The reply won the race with the deadline
+                return future.result()
+            raise error
 
-        # Read response
-        response_line = self.process.stdout.readline()
-        if not response_line:
-            stderr = self.process.stderr.read()
-            raise MCPError(-32603, f"Server closed connection. stderr: {stderr}")
+    def cancel(self, future: Future, reason: str = "Cancelled by client") -> bool:
+        """
+        Abandon an in-flight request.
+
+        The request is forgotten locally, so a late reply is discarded by id
+        instead of being handed to anyone, and notifications/cancelled tells
+        the server to stop working on it. The future fails with MCPError
+        -32800.
 
-        response = json.loads(response_line)
+        Args:
+            future: Future from submit_tool() (or any other request)
+            reason: Sent to the server with the cancellation
 
-        if "error" in response:
-            err = response["error"]
-            raise MCPError(err.get("code", -1), err.get("message", "Unknown error"), err.get("data"))
+        Returns:
+            False if the request had already completed
+        """
+        return self._abandon(future, reason, MCPError(-32800, f"Request cancelled: {reason}"))
 
-        return response.get("result")
+    def _abandon(self, future: Future, reason: str, error: MCPError) -> bool:
+        request_id = getattr(future, "request_id", None)
+        with self._pending_lock:
+            pending = self._pending.pop(request_id, None)
+        if pending is None:
+            return False
+        try:
+            self._send("notifications/cancelled", {"requestId": request_id, "reason": reason}, is_notification=True)
+        except MCPError:
+            # Server already gone; nothing left to cancel
+            pass
+        pending.set_exception(error)
+        return True
 
     def initialize(
         self,
@@ -117,9 +620,15 @@ class MCPClient:
         """
         Initialize the MCP connection.
 
+        The handshake happens once per process; calling this again (e.g. on a
+        pooled client) returns the original result without a round-trip.
+
         Returns:
             Server capabilities and info
         """
+        if self._initialized:
+            return self._init_result
+
         result = self._send("initialize", {
             "protocolVersion": self.PROTOCOL_VERSION,
             "capabilities": {},
@@ -131,53 +640,434 @@ class MCPClient:
 
         # Send initialized notification
         self._send("notifications/initialized", is_notification=True)
+        self._init_result = result
         self._initialized = True
 
         return result
 
-    def list_tools(self) -> List[Dict]:
+    def ping(self, timeout: Optional[float] = None) -> None:
+        """
+        Check the server is alive and responsive.
+
+        Args:
+            timeout: Seconds to wait for the reply (default: default_timeout)
+
+        Raises:
+            MCPError: If the server errors, has exited, or does not reply in time
+        """
+        self._wait(self.submit_ping(), timeout, "ping")
+
+    def submit_ping(self) -> Future:
+        """
+        Send a ping without waiting for the reply.
+
+        Returns:
+            Future resolving to the (empty) ping result; pipelined like submit_tool()
+        """
+        return self._submit("ping")
+
+    @property
+    def pending_requests(self) -> int:
+        """Number of requests sent but not yet answered."""
+        with self._pending_lock:
+            return len(self._pending)
+
+    def _tools_cache_key(self) -> Optional[str]:
+        if self.tools_cache is None:
+            return None
+        return self.tools_cache.key(self.command, self._init_result.get("serverInfo", {}))
+
+    def _tools_changed(self) -> None:
+        with self._tools_lock:
+            self._tools = None
+            self._tools_generation += 1
+            self._validators = {}
+            self._validated_tools = None
+        key = self._tools_cache_key() if self._initialized else None
+        if key is not None:
+            self.tools_cache.invalidate(key)
+
+    def list_tools(self, refresh: bool = False) -> List[Dict]:
         """
         List available tools from the server.
 
+        The catalog is kept for the life of the process when the server
+        advertises tools.listChanged (it will say when the list changes), and
+        across processes when a tools_cache is configured. Either copy is
+        dropped on notifications/tools/list_changed.
+
+        Args:
+            refresh: Fetch from the server even if a cached catalog exists
+
         Returns:
             List of tool definitions with name, description, inputSchema
         """
         if not self._initialized:
             raise MCPError(-32002, "Client not initialized. Call initialize() first.")
 
-        result = self._send("tools/list")
-        return result.get("tools", [])
+        with self._tools_lock:
+            tools, generation = self._tools, self._tools_generation
+        if tools is not None and not refresh:
+            return list(tools)
+
+        key = self._tools_cache_key()
+        tools = None if refresh or key is None else self.tools_cache.get(key)
+        if tools is None:
+            tools = self._send("tools/list").get("tools", [])
+            if key is not None and generation == self._tools_generation:
+                self.tools_cache.put(key, tools, self._init_result.get("serverInfo"))
+
+        capabilities = self._init_result.get("capabilities", {})
+        list_changed = (capabilities.get("tools") or {}).get("listChanged", False)
+        with self._tools_lock:
+            if generation == self._tools_generation:
+                if list_changed or key is not None:
+                    self._tools = tools
+                self._compile_validators(tools)
+        return list(tools)
+
+    def _compile_validators(self, tools: List[Dict]) -> None:
+        """Compile inputSchemas once per catalog. Called with _tools_lock held."""
+        if self.validation == "off" or tools is self._validated_tools:
+            return
+        coerce = self.validation == "coerce"
+        self._validators = {
+            tool["name"]: compile_schema(tool.get("inputSchema"), coerce=coerce)
+            for tool in tools
+            if isinstance(tool, dict) and "name" in tool
+        }
+        self._validated_tools = tools
+
+    def _check_arguments(self, name: str, arguments: Optional[Dict], validate: bool) -> Optional[Dict]:
+        """Arguments validated (and possibly coerced) against the tool's inputSchema."""
+        if not validate or self.validation == "off":
+            return arguments
+        validator = self._validators.get(name)
+        if validator is None:
+            # Unknown to the catalog (or list_tools not run yet); the server decides
+            return arguments
+        try:
+            return validator(arguments or {})
+        except SchemaError as e:
+            raise MCPError(-32602, f"Invalid arguments for tool {name}: {e}", {"tool": name, "path": e.path})
+
+    def subscribe(self, method: str, callback: Callable[[Dict], None]) -> Callable[[], None]:
+        """
+        Call `callback(message)` for each server notification of a method.
+
+        Callbacks run on the reader thread, in arrival order, so they should
+        be quick; use "*" to receive every notification.
 
-    def call_tool(self, name: str, arguments: Optional[Dict] = None) -> Any:
+        Args:
+            method: Notification method, e.g. "notifications/message"
+            callback: Receives the whole notification message
+
+        Returns:
+            A function that removes the subscription
+        """
+        with self._subscribers_lock:
+            self._subscribers.setdefault(method, []).append(callback)
+
+        def unsubscribe() -> None:
+            with self._subscribers_lock:
+                callbacks = self._subscribers.get(method, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+        return unsubscribe
+
+    def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict] = None,
+        validate: bool = True,
+        timeout: Optional[float] = None,
+    ) -> Any:
         """
         Call a tool on the server.
 
+        Safe to call from several threads at once; each call waits only for
+        its own response.
+
         Args:
             name: Tool name
             arguments: Tool arguments
+            validate: Check arguments against the tool's inputSchema first;
+                False sends them as given (e.g. to test server-side checks)
+            timeout: Deadline in seconds (default: default_timeout). On expiry
+                the request is cancelled and control returns immediately.
 
         Returns:
             Tool result content
+
+        Raises:
+            MCPError: -32602 if the arguments do not match the inputSchema,
+                -32001 if the deadline passed
+        """
+        return self._wait(self.submit_tool(name, arguments, validate=validate), timeout, name)
+
+    def submit_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict] = None,
+        validate: bool = True,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+    ) -> Future:
+        """
+        Call a tool without waiting for the result.
+
+        Many calls can be in flight against one server process; responses are
+        matched back to their future by JSON-RPC id, in whatever order the
+        server sends them.
+
+        Args:
+            name: Tool name
+            arguments: Tool arguments
+            validate: Check arguments against the tool's inputSchema first
+            on_progress: Request progress updates; called on the reader thread
+                with the params of each notifications/progress for this call
+
+        Returns:
+            Future resolving to the tool result (or raising MCPError)
+
+        Raises:
+            MCPError: -32602 if the arguments do not match the inputSchema
         """
         if not self._initialized:
             raise MCPError(-32002, "Client not initialized. Call initialize() first.")
 
+        arguments = self._check_arguments(name, arguments, validate)
         params = {"name": name}
         if arguments:
             params["arguments"] = arguments
+        if on_progress is None:
+            return self._submit("tools/call", params)
 
-        result = self._send("tools/call", params)
-        return result
+        token = f"progress-{self._next_id()}"
+        params["_meta"] = {"progressToken": token}
+        with self._subscribers_lock:
+            self._progress[token] = on_progress
+        try:
+            future = self._submit("tools/call", params)
+        except BaseException:
+            self._drop_progress(token)
+            raise
+        future.add_done_callback(lambda _: self._drop_progress(token))
+        return future
+
+    def _drop_progress(self, token: str) -> None:
+        with self._subscribers_lock:
+            self._progress.pop(token, None)
+
+    def call_tool_stream(
+        self,
+        name: str,
+        arguments: Optional[Dict] = None,
+        validate: bool = True,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Call a tool and yield events as they arrive instead of one final result.
+
+        The request carries a progressToken; each notifications/progress for it
+        is yielded as soon as it is read, so long searches and CMDB sweeps can
+        show output before the call finishes. Events are dicts:
+
+            {"type": "progress", "progress": 3, "total": 10, "message": ...}
+            {"type": "partial", "content": [...], "progress": 3, ...}
+            {"type": "result", "result": {...}}   # always last
+
+        "partial" is a progress notification that also carries a `content`
+        list of tool result items; servers that stream partial results send
+        them this way. `timeout` bounds the whole call (default:
+        default_timeout); on expiry the request is cancelled.
+
+        Raises:
+            MCPError: The tool call failed or timed out (raised after earlier
+                events)
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+
+        def on_progress(params: Dict) -> None:
+            event = {k: v for k, v in params.items() if k != "progressToken"}
+            event["type"] = "partial" if "content" in params else "progress"
+            events.put(event)
+
+        future = self.submit_tool(name, arguments, validate=validate, on_progress=on_progress)
+        future.add_done_callback(lambda _: events.put(None))
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    event = events.get(timeout=remaining)
+                except queue.Empty:
+                    error = MCPError(-32001, f"Request timed out after {timeout}s: {name}")
+                    if self._abandon(future, f"Client deadline of {timeout}s exceeded", error):
+                        raise error
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            # Abandoned mid-stream: stop the server working on it
+            if not future.done():
+                self.cancel(future, "Stream closed by client")
+        yield {"type": "result", "result": future.result()}
+
+    def call_tools_batch(
+        self,
+        calls: List[tuple],
+        return_exceptions: bool = False,
+        timeout: Optional[float] = None,
+    ) -> List[Any]:
+        """
+        Call many tools in a single JSON-RPC batch.
+
+        All calls go out in one write; replies are matched back by id. If the
+        server does not accept batches, the calls are sent as pipelined
+        single requests instead, with the same result.
+
+        Args:
+            calls: List of (name, arguments) tuples; arguments may be None.
+                Arguments are validated before anything is sent, so one bad
+                call raises MCPError and none are sent.
+            return_exceptions: Return MCPError instances in place of failed
+                results instead of raising the first failure
+            timeout: Deadline in seconds for the whole batch (default:
+                default_timeout); calls still running then are cancelled
+
+        Returns:
+            Tool results, in the same order as calls
+        """
+        if not self._initialized:
+            raise MCPError(-32002, "Client not initialized. Call initialize() first.")
+        if not calls:
+            return []
+
+        requests = []
+        for name, arguments in calls:
+            arguments = self._check_arguments(name, arguments, True)
+            params = {"name": name}
+            if arguments:
+                params["arguments"] = arguments
+            requests.append(("tools/call", params))
+
+        if self._probe_batch_support():
+            futures = self._submit_batch(requests)
+        else:
+            futures = [self._submit(method, params) for method, params in requests]
+
+        if timeout is None:
+            timeout = self.default_timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        for i, (future, (_, params)) in enumerate(zip(futures, requests)):
+            try:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                results.append(self._wait(future, remaining, params["name"]))
+            except MCPError as e:
+                if not return_exceptions:
+                    for rest in futures[i + 1:]:
+                        self.cancel(rest, "Batch abandoned by client")
+                    raise
+                results.append(e)
+        return results
+
+    def iter_records(
+        self,
+        name: str,
+        arguments: Optional[Dict] = None,
+        page_size: int = 500,
+        prefetch: bool = True,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Page through a query tool and yield its records one at a time.
+
+        Works with tools that take `offset`/`limit` and answer with
+        {"records": [...], "total_fetched": n}, such as snow_cmdb_query,
+        snow_incident_query and snow_table_query. Pages are requested until
+        one comes back empty, so only one or two pages are held in memory no
+        matter how large the export. A short page is not taken as the last:
+        the tool or server may cap `limit` below page_size.
+
+        Args:
+            name: Tool name
+            arguments: Tool arguments; `offset` sets the starting record and
+                `limit` caps the total number of records yielded
+            page_size: Records requested per call
+            prefetch: Request the next page while the caller consumes the
+                current one
+            timeout: Deadline in seconds per page (default: default_timeout)
+
+        Yields:
+            Records, in server order
+        """
+        arguments = dict(arguments or {})
+        offset = int(arguments.pop("offset", 0))
+        remaining = arguments.pop("limit", None)
+        remaining = None if remaining is None else int(remaining)
+
+        def request(start: int, count: int) -> Future:
+            return self.submit_tool(name, {**arguments, "offset": start, "limit": count})
+
+        def next_size() -> int:
+            return page_size if remaining is None else min(page_size, remaining)
+
+        if remaining is not None and remaining <= 0:
+            return
+        size = next_size()
+        future: Optional[Future] = request(offset, size)
+        try:
+            while future is not None:
+                records = _tool_records(name, self._wait(future, timeout, name))
+                offset += len(records)
+                if remaining is not None:
+                    records = records[:remaining]
+                    remaining -= len(records)
+
+                # Only an empty page is the last one; a short page may just be capped
+                more = bool(records) and (remaining is None or remaining > 0)
+                future = None
+                if more:
+                    size = next_size()
+                    if prefetch:
+                        future = request(offset, size)
+                yield from records
+                if more and not prefetch:
+                    future = request(offset, size)
+        finally:
+            # Caller stopped early: drop the prefetched page
+            if future is not None and not future.done():
+                self.cancel(future, "Iteration stopped by client")
 
     def close(self):
         """Close the server connection."""
         if self.process:
-            self.process.stdin.close()
+            started = time.perf_counter()
+            running = self.process.poll() is None
+            killed = False
+            try:
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
             self.process.terminate()
             try:
                 self.process.wait(timeout=5)
             except subprocess.TimeoutExpired:
                 self.process.kill()
+                self.process.wait()
+                killed = True
+            self._reader.join(timeout=5)
+            self._stderr_reader.join(timeout=5)
+            if self._recorder is not None:
+                self._recorder.close()
+            if self.metrics is not None and running:
+                self.metrics.record_lifecycle("close", self.server, time.perf_counter() - started, killed=killed)
 
     def __enter__(self):
         return self
@@ -187,21 +1077,295 @@ class MCPClient:
         return False
 
 
+class AsyncMCPClient:
+    """
+    asyncio-native MCP client for stdio-based servers.
+
+    Speaks the same protocol as MCPClient (same PROTOCOL_VERSION, same MCPError
+    mapping) but needs no thread per server, so one event loop can drive many
+    servers and many concurrent calls per server.
+
+    Usage:
+        async with await AsyncMCPClient.start(["gitignore", "serve"]) as client:
+            await client.initialize()
+            tools = await client.list_tools()
+            results = await asyncio.gather(
+                client.call_tool("gitignore_search", {"pattern": "go"}),
+                client.call_tool("gitignore_search", {"pattern": "node"}, timeout=2.0),
+            )
+    """
+
+    PROTOCOL_VERSION = PROTOCOL_VERSION
+
+    # Per-line read limit; tool results can be several MB on one line
+    STREAM_LIMIT = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        command: List[str],
+        process: asyncio.subprocess.Process,
+        default_timeout: Optional[float] = None,
+        stderr_tail: Optional[StderrTail] = None,
+        codec: Union[str, Codec, None] = None,
+    ):
+        """Wrap an already-started server process. Use AsyncMCPClient.start() instead."""
+        self.command = command
+        self.codec = get_codec(codec)
+        self.process = process
+        self.default_timeout = default_timeout
+        self.stderr_tail = stderr_tail or StderrTail()
+        self._request_id = 0
+        self._initialized = False
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._closed_error: Optional[MCPError] = None
+        loop = asyncio.get_running_loop()
+        self._stderr_reader = loop.create_task(self._drain_stderr())
+        self._reader = loop.create_task(self._read_loop())
+
+    @classmethod
+    async def start(
+        cls,
+        command: List[str],
+        env: Optional[Dict[str, str]] = None,
+        cwd: Optional[str] = None,
+        default_timeout: Optional[float] = None,
+        stderr_limit: int = 64 * 1024,
+        on_stderr: Optional[Callable[[str], None]] = None,
+        stderr_logger: Optional[logging.Logger] = None,
+        codec: Union[str, Codec, None] = None,
+    ) -> "AsyncMCPClient":
+        """
+        Start an MCP server process.
+
+        Args:
+            command: Command and args to start server (e.g., ["gitignore", "serve"])
+            env: Optional environment variables for the server process
+            cwd: Working directory for the server process (default: current dir)
+            default_timeout: Deadline in seconds applied to calls without their own timeout
+            stderr_limit: Characters of server stderr to keep for error messages
+            on_stderr: Called with each stderr line as it arrives
+            stderr_logger: Logger that receives each stderr line at INFO
+            codec: JSON codec name ("orjson", "msgspec", "json") or Codec;
+                default is the fastest installed
+        """
+        process_env = dict(__import__("os").environ)
+        if env:
+            process_env.update(env)
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=process_env,
+                cwd=cwd,
+                limit=cls.STREAM_LIMIT,
+            )
+        except FileNotFoundError:
+            raise FileNotFoundError(f"MCP server binary not found: {command[0]}")
+
+        tail = StderrTail(stderr_limit, on_line=on_stderr, logger=stderr_logger)
+        return cls(command, process, default_timeout=default_timeout, stderr_tail=tail, codec=codec)
+
+    async def _read_loop(self) -> None:
+        """Read server stdout and resolve pending requests by response id."""
+        while True:
+            try:
+                line = await self.process.stdout.readline()
+            except (asyncio.LimitOverrunError, ValueError) as e:
+                # The stream cannot resync past an oversized line: end the session
+                self._fail_pending(MCPError(
+                    -32603, f"Server message exceeds the {self.STREAM_LIMIT}-byte line limit: {e}"
+                ))
+                return
+            if not line:
+                break
+            try:
+                message = self.codec.loads(line)
+            except self.codec.decode_errors:
+                continue
+            self._dispatch(message)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(self._stderr_reader), 1)
+        except asyncio.TimeoutError:
+            pass
+        self._fail_pending(MCPError(-32603, f"Server closed connection. stderr: {self.stderr_tail.text()}"))
+
+    async def _drain_stderr(self) -> None:
+        while True:
+            chunk = await self.process.stderr.read(StderrTail.CHUNK_SIZE)
+            if not chunk:
+                break
+            self.stderr_tail.feed(chunk)
+        self.stderr_tail.flush()
+
+    def _dispatch(self, message: Any) -> None:
+        if not isinstance(message, dict) or "method" in message:
+            return
+        future = self._pending.pop(message.get("id"), None)
+        if future is None or future.done():
+            return
+        if "error" in message:
+            future.set_exception(_error_from_response(message["error"]))
+        else:
+            future.set_result(message.get("result"))
+
+    def _fail_pending(self, error: MCPError) -> None:
+        self._closed_error = error
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _write(self, message: Dict) -> None:
+        self.process.stdin.write(self.codec.dumps(message) + b"\n")
+        try:
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise MCPError(-32603, f"Failed to write to server: {e}")
+
+    async def _send(self, method: str, params: Optional[Dict] = None, timeout: Optional[float] = None) -> Any:
+        """Send a JSON-RPC request and await its response, honouring the deadline."""
+        if self._closed_error is not None:
+            raise self._closed_error
+
+        self._request_id += 1
+        msg_id = self._request_id
+        message = {"jsonrpc": "2.0", "id": msg_id, "method": method}
+        if params:
+            message["params"] = params
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        try:
+            await self._write(message)
+            if timeout is None:
+                timeout = self.default_timeout
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            await self._notify("notifications/cancelled", {
+                "requestId": msg_id,
+                "reason": f"Client deadline of {timeout}s exceeded",
+            })
+            # -32001 is the MCP SDKs' RequestTimeout code
+            raise MCPError(-32001, f"Request timed out after {timeout}s: {method}")
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def _notify(self, method: str, params: Optional[Dict] = None) -> None:
+        message = {"jsonrpc": "2.0", "method": method}
+        if params:
+            message["params"] = params
+        try:
+            await self._write(message)
+        except MCPError:
+            pass
+
+    async def initialize(
+        self,
+        client_name: str = "mcp-test-client",
+        client_version: str = "1.0.0",
+        timeout: Optional[float] = None,
+    ) -> dict:
+        """
+        Initialize the MCP connection.
+
+        Returns:
+            Server capabilities and info
+        """
+        result = await self._send("initialize", {
+            "protocolVersion": self.PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {
+                "name": client_name,
+                "version": client_version,
+            },
+        }, timeout=timeout)
+
+        await self._notify("notifications/initialized")
+        self._initialized = True
+
+        return result
+
+    async def list_tools(self, timeout: Optional[float] = None) -> List[Dict]:
+        """
+        List available tools from the server.
+
+        Returns:
+            List of tool definitions with name, description, inputSchema
+        """
+        if not self._initialized:
+            raise MCPError(-32002, "Client not initialized. Call initialize() first.")
+
+        result = await self._send("tools/list", timeout=timeout)
+        return result.get("tools", [])
+
+    async def call_tool(self, name: str, arguments: Optional[Dict] = None, timeout: Optional[float] = None) -> Any:
+        """
+        Call a tool on the server.
+
+        Concurrent calls (e.g. via asyncio.gather) are pipelined over the one
+        connection and matched back by JSON-RPC id.
+
+        Args:
+            name: Tool name
+            arguments: Tool arguments
+            timeout: Deadline in seconds; on expiry the server is sent
+                notifications/cancelled and MCPError(-32001) is raised
+
+        Returns:
+            Tool result content
+        """
+        if not self._initialized:
+            raise MCPError(-32002, "Client not initialized. Call initialize() first.")
+
+        params = {"name": name}
+        if arguments:
+            params["arguments"] = arguments
+
+        return await self._send("tools/call", params, timeout=timeout)
+
+    async def close(self):
+        """Close the server connection."""
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self.process.terminate()
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        for task in (self._reader, self._stderr_reader):
+            try:
+                await asyncio.wait_for(task, 5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                task.cancel()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+
 def check_server_available(command: List[str]) -> bool:
     """Check if a server binary is available."""
     import shutil
     return shutil.which(command[0]) is not None
 
 
-if __name__ == "__main__":
-    # Quick test
-    if len(sys.argv) < 2:
-        print("Usage: python mcp_client.py <command> [args...]")
-        print("Example: python mcp_client.py gitignore serve")
-        sys.exit(1)
-
-    command = sys.argv[1:]
-
+def _smoke_test(command: List[str]) -> int:
+    """Connect to a server, initialize, and list its tools."""
     try:
         with MCPClient(command) as client:
             print(f"Connecting to: {' '.join(command)}")
@@ -217,7 +1381,23 @@ if __name__ == "__main__":
             print("\n✓ Server is working correctly!")
     except FileNotFoundError as e:
         print(f"✗ {e}")
-        sys.exit(1)
+        return 1
     except MCPError as e:
         print(f"✗ MCP Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python mcp_client.py <command> [args...]")
+        print("       python mcp_client.py bench [options] -- <command> [args...]")
+        print("Example: python mcp_client.py gitignore serve")
         sys.exit(1)
+
+    if sys.argv[1] == "bench":
+        import mcp_bench
+        sys.exit(mcp_bench.main(sys.argv[2:]))
+
+    # Quick test
+    sys.exit(_smoke_test(sys.argv[1:]))
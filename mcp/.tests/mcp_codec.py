@@ -0,0 +1,168 @@
+"""
+Wire codecs and newline framing for MCP stdio transports.
+
+MCP over stdio is newline-delimited JSON. Decoding dominates client cost on
+multi-megabyte tool results, so the JSON codec is pluggable: orjson or msgspec
+when installed, the standard library otherwise.
+
+Usage:
+    codec = get_codec()            # fastest available
+    codec = get_codec("json")      # force the stdlib
+    framer = LineFramer()
+    for line in framer.feed(chunk):
+        message = codec.loads(line)
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, List, Optional, Union
+
+
+class Codec:
+    """
+    A named JSON encode (object -> bytes) / decode (bytes -> object) pair.
+
+    decode_errors lists the exceptions loads() raises on malformed input.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dumps: Callable[[Any], bytes],
+        loads: Callable[[bytes], Any],
+        decode_errors: tuple = (ValueError,),
+    ):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+        self.decode_errors = decode_errors
+
+    def __repr__(self) -> str:
+        return f"Codec({self.name!r})"
+
+
+def _stdlib_codec() -> Codec:
+    encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    decoder = json.JSONDecoder()
+    # Decode UTF-8 explicitly: json.loads(bytes) sniffs the encoding and uses
+    # the slower surrogatepass error handler.
+    return Codec(
+        "json",
+        lambda obj: encoder.encode(obj).encode(),
+        lambda data: decoder.decode(data.decode("utf-8")),
+        (ValueError,),
+    )
+
+
+def _orjson_codec() -> Codec:
+    import orjson
+    return Codec("orjson", orjson.dumps, orjson.loads)
+
+
+def _msgspec_codec() -> Codec:
+    import msgspec
+    return Codec("msgspec", msgspec.json.encode, msgspec.json.decode, (msgspec.DecodeError,))
+
+
+_FACTORIES = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+# Preference order when no codec is requested
+_AUTO_ORDER = ("orjson", "msgspec", "json")
+
+
+def available_codecs() -> List[str]:
+    """Names of the codecs that can be loaded in this environment."""
+    names = []
+    for name in _AUTO_ORDER:
+        try:
+            _FACTORIES[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_codec(codec: Union[str, Codec, None] = None) -> Codec:
+    """
+    Resolve a codec.
+
+    Args:
+        codec: A Codec, a codec name ("orjson", "msgspec", "json"), or None
+            for the fastest one installed
+
+    Raises:
+        ValueError: Unknown codec name
+        ImportError: The named codec's package is not installed
+    """
+    if isinstance(codec, Codec):
+        return codec
+    if codec is None:
+        for name in _AUTO_ORDER:
+            try:
+                return _FACTORIES[name]()
+            except ImportError:
+                continue
+    if codec not in _FACTORIES:
+        raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(_AUTO_ORDER)})")
+    return _FACTORIES[codec]()
+
+
+class LineFramer:
+    """
+    Split a byte stream into newline-terminated frames.
+
+    Data accumulates in one reusable buffer. Each feed() scans only the bytes
+    it has not scanned before, so a multi-megabyte line arriving in many
+    chunks costs one pass, not one pass per chunk.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._scanned = 0
+
+    def feed(self, data: Union[bytes, bytearray, memoryview]) -> List[bytes]:
+        """Add data; return the complete lines it finishes, without newlines."""
+        buf = self._buf
+        buf += data
+        lines = []
+        start = 0
+        pos = self._scanned
+        while True:
+            newline = buf.find(b"\n", pos)
+            if newline < 0:
+                break
+            if newline > start:
+                lines.append(bytes(buf[start:newline]))
+            start = pos = newline + 1
+        if start:
+            del buf[:start]
+        # The remainder holds no newline; the next feed resumes after it
+        self._scanned = len(buf)
+        return lines
+
+    def pending(self) -> int:
+        """Bytes buffered for an incomplete line."""
+        return len(self._buf)
+
+
+def read_frames(readinto: Callable[[memoryview], Optional[int]], chunk_size: int = 256 * 1024):
+    """
+    Yield newline-delimited frames from a raw binary stream until EOF.
+
+    Args:
+        readinto: The stream's readinto method (e.g. a pipe's raw FileIO)
+        chunk_size: Size of the reused read buffer
+    """
+    framer = LineFramer()
+    chunk = bytearray(chunk_size)
+    view = memoryview(chunk)
+    while True:
+        n = readinto(view)
+        if not n:
+            break
+        yield from framer.feed(view[:n])
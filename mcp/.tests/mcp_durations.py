@@ -0,0 +1,115 @@
+"""
+Recorded test durations and duration-balanced sharding.
+
+conftest.py records each test's setup + call + teardown time into a JSON
+durations file ({nodeid: seconds}) with --mcp-durations, and --shard i/N
+runs only the i-th of N shards. Shards are balanced by recorded duration
+(longest test first, each to the least-loaded shard), so one runner does not
+end up with every slow servicenow test. Tests with no history are costed at
+the mean recorded duration, which spreads them evenly across shards.
+
+Every runner computes the same split from the same collection and durations
+file. Combine the files written by each runner with:
+
+    python mcp_durations.py merge .test_durations.json shard-*.json
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".test_durations.json")
+
+# Cost of a test with no history when nothing at all has been recorded
+UNKNOWN_DURATION = 1.0
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """"i/N" -> (i, N), with 1 <= i <= N."""
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Expected i/N (e.g. 2/4), got: {value}") from None
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Shard {value} is out of range; i must be between 1 and N")
+    return index, total
+
+
+def load(path: str = DEFAULT_FILE) -> Dict[str, float]:
+    """Recorded durations; a missing or unreadable file is empty history."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            durations = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(durations, dict):
+        return {}
+    return {nodeid: float(seconds) for nodeid, seconds in durations.items()}
+
+
+def save(durations: Dict[str, float], path: str = DEFAULT_FILE) -> None:
+    """Write durations atomically, sorted so diffs stay small."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({k: round(v, 4) for k, v in sorted(durations.items())}, f, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def update(path: str, measured: Dict[str, float]) -> None:
+    """Merge new measurements into a durations file, keeping tests not run this time."""
+    durations = load(path)
+    durations.update(measured)
+    save(durations, path)
+
+
+def split(nodeids: Sequence[str], durations: Dict[str, float], total: int) -> List[List[str]]:
+    """
+    Partition tests into `total` shards of roughly equal recorded duration.
+
+    Greedy longest-processing-time: tests are taken longest first and each
+    goes to the shard with the least total so far (ties to the lowest shard).
+    Each shard keeps the tests in their original (collection) order.
+    """
+    known = [durations[n] for n in nodeids if n in durations]
+    fallback = sum(known) / len(known) if known else UNKNOWN_DURATION
+
+    position = {nodeid: i for i, nodeid in enumerate(nodeids)}
+    # Stable for equal costs: collection order decides, so unknown tests deal out round-robin
+    ordered = sorted(nodeids, key=lambda n: (-durations.get(n, fallback), position[n]))
+
+    loads = [(0.0, shard) for shard in range(total)]
+    shards: List[List[str]] = [[] for _ in range(total)]
+    for nodeid in ordered:
+        load_s, shard = heapq.heappop(loads)
+        shards[shard].append(nodeid)
+        heapq.heappush(loads, (load_s + durations.get(nodeid, fallback), shard))
+    return [sorted(shard, key=position.__getitem__) for shard in shards]
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 2 or argv[0] != "merge":
+        print("Usage: python mcp_durations.py merge <output> <input>...", file=sys.stderr)
+        return 1
+    output, inputs = argv[1], argv[2:]
+    durations = load(output)
+    for path in inputs:
+        durations.update(load(path))
+    save(durations, output)
+    print(f"{len(durations)} test durations written to {os.path.abspath(output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
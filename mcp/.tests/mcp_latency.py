@@ -0,0 +1,146 @@
+"""
+Per-tool latency budgets and the regression check behind `--mcp-latency`.
+
+Budgets live in latency_baselines.json next to conftest.py. Each entry names
+a server (a key of conftest.SERVERS), a tool, the arguments to call it with
+and the percentiles it must stay within:
+
+    {
+        "repeat": 50, "warmup": 5, "tolerance": 0.5, "slack_ms": 2.0,
+        "tools": [
+            {"server": "gitignore", "tool": "gitignore_search",
+             "arguments": {"pattern": "go"}, "p50_ms": 3.0, "p95_ms": 8.0}
+        ]
+    }
+
+A percentile regresses when the measured value exceeds
+baseline * (1 + tolerance) + slack_ms; the absolute slack keeps sub-
+millisecond noise from failing fast tools. Entries may set their own
+repeat, tolerance, slack_ms, id (to time one tool with several argument
+sets) and requires_env.
+
+Check the budgets, or refresh them from the current servers:
+
+    pytest test_latency.py --mcp-latency check
+    pytest test_latency.py --mcp-latency refresh
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from mcp_bench import summarize
+from mcp_client import MCPClient
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "latency_baselines.json")
+
+# Percentiles gated when an entry has none yet
+DEFAULT_PERCENTILES = ("p50_ms", "p95_ms")
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+DEFAULTS = {"repeat": 50, "warmup": 5, "tolerance": 0.5, "slack_ms": 2.0}
+
+
+def load_baselines(path: str = BASELINE_FILE) -> Dict[str, Any]:
+    """Read the baseline file; a missing file has no entries."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+    baselines.setdefault("tools", [])
+    return baselines
+
+
+def write_baselines(baselines: Dict[str, Any], path: str = BASELINE_FILE) -> None:
+    """Write the baseline file atomically, so an interrupted refresh keeps the old one."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=4)
+            f.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def entry_id(entry: Dict[str, Any]) -> str:
+    """Stable name for a budget entry: its id, else the tool name."""
+    return entry.get("id") or entry["tool"]
+
+
+def setting(baselines: Dict[str, Any], entry: Dict[str, Any], name: str) -> Any:
+    """An entry's setting, falling back to the file-wide value, then DEFAULTS."""
+    if name in entry:
+        return entry[name]
+    return baselines.get(name, DEFAULTS[name])
+
+
+def measure(
+    client: MCPClient,
+    tool: str,
+    arguments: Optional[Dict[str, Any]] = None,
+    repeat: int = DEFAULTS["repeat"],
+    warmup: int = DEFAULTS["warmup"],
+) -> Dict[str, float]:
+    """
+    Call a tool repeatedly and summarize its latency.
+
+    Calls are sequential so the numbers are per-call latency, not throughput.
+    Returns mcp_bench.summarize() output (count, mean_ms, p50_ms, ...).
+    """
+    for _ in range(warmup):
+        client.call_tool(tool, arguments)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.call_tool(tool, arguments)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return summarize(latencies)
+
+
+def regressions(
+    measured: Dict[str, float],
+    entry: Dict[str, Any],
+    tolerance: float,
+    slack_ms: float,
+) -> List[str]:
+    """Descriptions of every budgeted percentile the measurement exceeds."""
+    failures = []
+    for key in PERCENTILES:
+        if key not in entry or key not in measured:
+            continue
+        limit = entry[key] * (1 + tolerance) + slack_ms
+        if measured[key] > limit:
+            failures.append(
+                f"{entry_id(entry)} {key[:-3]} {measured[key]:.2f}ms exceeds budget "
+                f"{entry[key]:.2f}ms (limit {limit:.2f}ms at +{tolerance:.0%} +{slack_ms}ms)"
+            )
+    return failures
+
+
+def refreshed(baselines: Dict[str, Any], measured: Dict[str, Dict[str, Dict[str, float]]]) -> Dict[str, Any]:
+    """
+    A copy of baselines with budgets replaced by new measurements.
+
+    measured maps server -> entry_id -> summarize() output. Entries that were
+    not measured (e.g. their server is not installed) keep their budgets.
+    """
+    updated = dict(baselines)
+    tools = []
+    for entry in baselines["tools"]:
+        stats = measured.get(entry["server"], {}).get(entry_id(entry))
+        if stats and stats.get("count"):
+            entry = dict(entry)
+            keys = [key for key in PERCENTILES if key in entry] or DEFAULT_PERCENTILES
+            for key in keys:
+                entry[key] = stats[key]
+        tools.append(entry)
+    updated["tools"] = tools
+    return updated
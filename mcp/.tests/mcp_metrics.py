@@ -0,0 +1,249 @@
+"""
+Request instrumentation for MCPClient: phase timers, counters and exporters.
+
+Each request is split into four phases so a slow call can be attributed:
+
+    serialize  encoding the request with the client codec
+    write      writing it to the server's stdin (stdio backpressure shows here)
+    wait       from the end of the write until the reply line is read (server time)
+    parse      decoding the reply
+
+Counters cover requests by method and tool, errors by tool and code, and
+bytes in/out. Process spawn and close() are timed per server as lifecycle
+phases. Every finished request and lifecycle phase is also passed to hooks
+as an event dict, and the totals can be dumped as JSON or in the
+Prometheus text format.
+
+Usage:
+    metrics = ClientMetrics()
+    metrics.add_hook(lambda event: print(event["tool"], event["wait_ms"]))
+    client = MCPClient(["gitignore", "serve"], metrics=metrics)
+    ...
+    print(metrics.prometheus_text())
+    metrics.dump_json("mcp-metrics.json")
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PHASES = ("serialize", "write", "wait", "parse")
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Event = Dict[str, Any]
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum * 1000, 3),
+            "mean_ms": round(self.sum * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": {str(bound): n for bound, n in zip(BUCKETS, self.counts)},
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class ClientMetrics:
+    """
+    Thread-safe metrics sink for one or more MCPClients.
+
+    Pass the same instance to several clients (e.g. every client in a
+    ServerPool) to aggregate them.
+    """
+
+    def __init__(self, hooks: Optional[List[Callable[[Event], None]]] = None):
+        """
+        Args:
+            hooks: Called with each request and lifecycle event (see
+                record() and record_lifecycle())
+        """
+        self._lock = threading.Lock()
+        self._hooks: List[Callable[[Event], None]] = list(hooks or [])
+        self.requests: Dict[Tuple[str, str], int] = {}
+        self.errors: Dict[Tuple[str, int], int] = {}
+        self.notifications: Dict[str, int] = {}
+        self.bytes = {"in": 0, "out": 0}
+        self._phases: Dict[Tuple[str, str], _Histogram] = {}
+        self._lifecycle: Dict[Tuple[str, str], _Histogram] = {}
+
+    def add_hook(self, hook: Callable[[Event], None]) -> Callable[[], None]:
+        """Register an event hook; returns a function that removes it."""
+        with self._lock:
+            self._hooks.append(hook)
+
+        def remove() -> None:
+            with self._lock:
+                if hook in self._hooks:
+                    self._hooks.remove(hook)
+
+        return remove
+
+    def count_bytes(self, direction: str, n: int) -> None:
+        """Add to the bytes "in" or "out" counter; every frame is counted."""
+        with self._lock:
+            self.bytes[direction] += n
+
+    def count_notification(self, method: str) -> None:
+        with self._lock:
+            self.notifications[method] = self.notifications.get(method, 0) + 1
+
+    def _emit(self, hooks: List[Callable[[Event], None]], event: Event) -> None:
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:
+                logging.getLogger(__name__).exception("metrics hook failed")
+
+    def record_lifecycle(self, phase: str, server: str, seconds: float, **extra: Any) -> None:
+        """
+        Record a server process lifecycle phase ("spawn" or "close").
+
+        Hooks receive {"event": phase, "server": ..., "ms": ..., **extra}.
+        """
+        with self._lock:
+            histogram = self._lifecycle.get((phase, server))
+            if histogram is None:
+                histogram = self._lifecycle[(phase, server)] = _Histogram()
+            histogram.observe(seconds)
+            hooks = list(self._hooks)
+        self._emit(hooks, {"event": phase, "server": server, "ms": seconds * 1000, **extra})
+
+    def record(self, event: Event) -> None:
+        """
+        Record a finished request.
+
+        event keys: event ("request"), server, method, tool ("" outside
+        tools/call), id, serialize_ms, write_ms, wait_ms, parse_ms,
+        bytes_out, bytes_in, error (JSON-RPC code, or None on success).
+        """
+        tool = event.get("tool") or ""
+        with self._lock:
+            key = (event["method"], tool)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if event.get("error") is not None:
+                error_key = (tool or event["method"], event["error"])
+                self.errors[error_key] = self.errors.get(error_key, 0) + 1
+            for phase in PHASES:
+                histogram = self._phases.get((phase, tool or event["method"]))
+                if histogram is None:
+                    histogram = self._phases[(phase, tool or event["method"])] = _Histogram()
+                histogram.observe(event[f"{phase}_ms"] / 1000)
+            hooks = list(self._hooks)
+        self._emit(hooks, event)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All counters and phase histograms as a JSON-serializable dict."""
+        with self._lock:
+            phases: Dict[str, Dict[str, Any]] = {}
+            for (phase, name), histogram in sorted(self._phases.items()):
+                phases.setdefault(name, {})[phase] = histogram.to_dict()
+            lifecycle: Dict[str, Dict[str, Any]] = {}
+            for (phase, server), histogram in sorted(self._lifecycle.items()):
+                lifecycle.setdefault(server, {})[phase] = histogram.to_dict()
+            return {
+                "requests": [
+                    {"method": method, "tool": tool, "count": n}
+                    for (method, tool), n in sorted(self.requests.items())
+                ],
+                "errors": [
+                    {"tool": tool, "code": code, "count": n}
+                    for (tool, code), n in sorted(self.errors.items())
+                ],
+                "notifications": dict(sorted(self.notifications.items())),
+                "bytes": dict(self.bytes),
+                "phases": phases,
+                "lifecycle": lifecycle,
+            }
+
+    def dump_json(self, path: Optional[str] = None) -> str:
+        """snapshot() as JSON text, also written to path when given."""
+        text = json.dumps(self.snapshot(), indent=2)
+        if path:
+            with open(path, "w") as f:
+                f.write(text + "\n")
+        return text
+
+    def prometheus_text(self, prefix: str = "mcp_client") -> str:
+        """Metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_requests_total Requests completed, by method and tool.",
+                f"# TYPE {prefix}_requests_total counter",
+            ]
+            for (method, tool), n in sorted(self.requests.items()):
+                lines.append(f'{prefix}_requests_total{{method="{_label(method)}",tool="{_label(tool)}"}} {n}')
+
+            lines += [
+                f"# HELP {prefix}_errors_total Failed requests, by tool (or method) and JSON-RPC error code.",
+                f"# TYPE {prefix}_errors_total counter",
+            ]
+            for (tool, code), n in sorted(self.errors.items()):
+                lines.append(f'{prefix}_errors_total{{tool="{_label(tool)}",code="{code}"}} {n}')
+
+            lines += [
+                f"# HELP {prefix}_notifications_total Server notifications received, by method.",
+                f"# TYPE {prefix}_notifications_total counter",
+            ]
+            for method, n in sorted(self.notifications.items()):
+                lines.append(f'{prefix}_notifications_total{{method="{_label(method)}"}} {n}')
+
+            lines += [
+                f"# HELP {prefix}_bytes_total Bytes written to (out) and read from (in) servers.",
+                f"# TYPE {prefix}_bytes_total counter",
+            ]
+            for direction, n in sorted(self.bytes.items()):
+                lines.append(f'{prefix}_bytes_total{{direction="{direction}"}} {n}')
+
+            name = f"{prefix}_request_phase_seconds"
+            lines += [
+                f"# HELP {name} Request time by phase (serialize, write, wait, parse) and tool.",
+                f"# TYPE {name} histogram",
+            ]
+            for (phase, tool), histogram in sorted(self._phases.items()):
+                labels = f'phase="{phase}",tool="{_label(tool)}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, histogram.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+            name = f"{prefix}_lifecycle_seconds"
+            lines += [
+                f"# HELP {name} Server process spawn and close time, by server.",
+                f"# TYPE {name} summary",
+            ]
+            for (phase, server), histogram in sorted(self._lifecycle.items()):
+                labels = f'phase="{phase}",server="{_label(server)}"'
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
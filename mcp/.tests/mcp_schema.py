@@ -0,0 +1,273 @@
+"""
+Compile MCP tool inputSchemas into fast argument validators.
+
+Each schema is compiled once into nested closures, so validating a call is a
+handful of type checks rather than a walk over the schema dict. The subset of
+JSON Schema that MCP servers use for tool inputs is supported: type, enum,
+const, properties, required, additionalProperties, items, minItems/maxItems,
+minimum/maximum (and the exclusive forms), minLength/maxLength, pattern,
+anyOf, oneOf and allOf. Other keywords are ignored and left to the server,
+as is a pattern Python's re cannot compile (schemas use ECMA-262 regexes, so
+e.g. Unicode property escapes or (?<name>...) groups are valid there but
+not here).
+
+With coerce=True, scalar mismatches are converted where the intent is clear:
+"5" -> 5 for integers, "true" -> True for booleans, 5 -> "5" for strings and
+a lone value -> [value] for arrays.
+
+Usage:
+    validate = compile_schema(tool["inputSchema"], coerce=True)
+    arguments = validate({"limit": "50"})      # -> {"limit": 50}
+    validate({"limit": "many"})                # raises SchemaError
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+Validator = Callable[..., Any]
+
+_NOTHING = object()
+
+
+class SchemaError(ValueError):
+    """Arguments do not match a tool's inputSchema."""
+
+    def __init__(self, path: str, message: str):
+        self.path = path
+        self.message = message
+        super().__init__(f"{path or 'arguments'}: {message}")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: _is_number(v) and (isinstance(v, int) or v.is_integer()),
+    "number": _is_number,
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def _coerce(value: Any, types: List[str]) -> Any:
+    """value converted to the first type it cleanly converts to, else _NOTHING."""
+    for name in types:
+        if name == "integer":
+            if isinstance(value, str):
+                try:
+                    return int(value.strip())
+                except ValueError:
+                    continue
+        elif name == "number":
+            if isinstance(value, str):
+                try:
+                    number = float(value)
+                except ValueError:
+                    continue
+                if math.isfinite(number):
+                    return int(number) if number.is_integer() and "." not in value else number
+        elif name == "boolean":
+            if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+                return value.strip().lower() == "true"
+        elif name == "string":
+            if _is_number(value):
+                return str(value)
+        elif name == "array":
+            if not isinstance(value, (list, dict)):
+                return [value]
+    return _NOTHING
+
+
+def _type_name(value: Any) -> str:
+    for name in ("null", "boolean", "integer", "number", "string", "array", "object"):
+        if _TYPE_CHECKS[name](value):
+            return name
+    return type(value).__name__
+
+
+def _join(path: str, key: Any) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+
+def _pattern(source: Any) -> Optional[re.Pattern]:
+    """Compiled pattern keyword, or None when absent or not valid in Python's re."""
+    if not isinstance(source, str):
+        return None
+    try:
+        return re.compile(source)
+    except re.error:
+        # ECMA-262 syntax re does not share; the server still enforces it
+        return None
+
+
+def _compile(schema: Any, coerce: bool) -> Validator:
+    if not isinstance(schema, dict):
+        # true / {} / unsupported forms accept anything
+        return lambda value, path="": value
+
+    steps: List[Callable[[Any, str], Any]] = []
+
+    types = schema.get("type")
+    if types:
+        types = [types] if isinstance(types, str) else list(types)
+        checks = [_TYPE_CHECKS[t] for t in types if t in _TYPE_CHECKS]
+        expected = " or ".join(types)
+
+        def check_type(value: Any, path: str) -> Any:
+            for check in checks:
+                if check(value):
+                    return value
+            if coerce:
+                converted = _coerce(value, types)
+                if converted is not _NOTHING:
+                    return converted
+            raise SchemaError(path, f"expected {expected}, got {_type_name(value)}")
+
+        if checks:
+            steps.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value: Any, path: str) -> Any:
+            if value not in allowed:
+                raise SchemaError(path, f"must be one of {allowed}")
+            return value
+
+        steps.append(check_enum)
+
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value: Any, path: str) -> Any:
+            if value != const:
+                raise SchemaError(path, f"must be {const!r}")
+            return value
+
+        steps.append(check_const)
+
+    bounds = [
+        (schema.get("minimum"), lambda v, b: v < b, "must be >= {}"),
+        (schema.get("maximum"), lambda v, b: v > b, "must be <= {}"),
+        (schema.get("exclusiveMinimum"), lambda v, b: v <= b, "must be > {}"),
+        (schema.get("exclusiveMaximum"), lambda v, b: v >= b, "must be < {}"),
+    ]
+    bounds = [(b, fails, message) for b, fails, message in bounds if _is_number(b)]
+    if bounds:
+        def check_bounds(value: Any, path: str) -> Any:
+            if _is_number(value):
+                for bound, fails, message in bounds:
+                    if fails(value, bound):
+                        raise SchemaError(path, message.format(bound))
+            return value
+
+        steps.append(check_bounds)
+
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    pattern = _pattern(schema.get("pattern"))
+    if min_length is not None or max_length is not None or pattern is not None:
+        def check_string(value: Any, path: str) -> Any:
+            if isinstance(value, str):
+                if min_length is not None and len(value) < min_length:
+                    raise SchemaError(path, f"must be at least {min_length} characters")
+                if max_length is not None and len(value) > max_length:
+                    raise SchemaError(path, f"must be at most {max_length} characters")
+                if pattern is not None and not pattern.search(value):
+                    raise SchemaError(path, f"must match {pattern.pattern!r}")
+            return value
+
+        steps.append(check_string)
+
+    items = _compile(schema["items"], coerce) if isinstance(schema.get("items"), dict) else None
+    min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+    if items is not None or min_items is not None or max_items is not None:
+        def check_array(value: Any, path: str) -> Any:
+            if not isinstance(value, list):
+                return value
+            if min_items is not None and len(value) < min_items:
+                raise SchemaError(path, f"must have at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                raise SchemaError(path, f"must have at most {max_items} items")
+            if items is None:
+                return value
+            return [items(item, _join(path, i)) for i, item in enumerate(value)]
+
+        steps.append(check_array)
+
+    properties = {
+        key: _compile(sub, coerce) for key, sub in (schema.get("properties") or {}).items()
+    }
+    required = list(schema.get("required") or [])
+    additional = schema.get("additionalProperties", True)
+    extra: Optional[Validator] = _compile(additional, coerce) if isinstance(additional, dict) else None
+    if properties or required or additional is not True:
+        def check_object(value: Any, path: str) -> Any:
+            if not isinstance(value, dict):
+                return value
+            for key in required:
+                if key not in value:
+                    raise SchemaError(_join(path, key), "is required")
+            result = {}
+            for key, item in value.items():
+                validator = properties.get(key)
+                if validator is not None:
+                    result[key] = validator(item, _join(path, key))
+                elif additional is False:
+                    raise SchemaError(_join(path, key), "is not an allowed property")
+                elif extra is not None:
+                    result[key] = extra(item, _join(path, key))
+                else:
+                    result[key] = item
+            return result
+
+        steps.append(check_object)
+
+    for keyword in ("anyOf", "oneOf"):
+        if isinstance(schema.get(keyword), list):
+            # oneOf is checked like anyOf; exclusivity is left to the server
+            options = [_compile(sub, coerce) for sub in schema[keyword]]
+
+            def check_any(value: Any, path: str, options=options, keyword=keyword) -> Any:
+                errors = []
+                for option in options:
+                    try:
+                        return option(value, path)
+                    except SchemaError as e:
+                        errors.append(e.message)
+                raise SchemaError(path, f"does not match {keyword}: " + "; ".join(errors))
+
+            steps.append(check_any)
+
+    if isinstance(schema.get("allOf"), list):
+        for sub in schema["allOf"]:
+            validator = _compile(sub, coerce)
+            steps.append(lambda value, path, validator=validator: validator(value, path))
+
+    if not steps:
+        return lambda value, path="": value
+
+    def validate(value: Any, path: str = "") -> Any:
+        for step in steps:
+            value = step(value, path)
+        return value
+
+    return validate
+
+
+def compile_schema(schema: Any, coerce: bool = False) -> Validator:
+    """
+    Compile a JSON Schema into a validator.
+
+    The validator takes a value and returns it (converted, when coerce is
+    set), or raises SchemaError naming the offending path.
+    """
+    return _compile(schema, coerce)
@@ -0,0 +1,287 @@
+"""
+Pytest plugin that attributes test time to MCP server phases.
+
+For every test it adds up server spawn, `initialize`, each `tools/call` (by
+tool), other requests (ping, tools/list) and `MCPClient.close()`, including
+closes that hit the 5 s terminate timeout and had to kill the server. Time in
+fixtures is tracked per fixture. At session end it prints ranked tables of
+the slowest tests, servers, tools and fixtures and writes a JSON artifact.
+
+Enabled with --mcp-timing (registered from conftest.py):
+
+    pytest --mcp-timing                      # writes mcp-timing.json
+    pytest --mcp-timing=out/timing.json --mcp-timing-top 20
+
+Request time is summed per request, so pipelined calls can add up to more
+than the test's wall time. Works under pytest-xdist: workers send their data
+to the controller, which prints one merged report.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from mcp_bench import percentile
+from mcp_client import MCPClient
+from mcp_metrics import ClientMetrics
+
+# Attribution bucket for events outside any test (e.g. session teardown)
+SESSION = "<session>"
+
+TEST_PHASES = ("spawn_ms", "initialize_ms", "calls_ms", "other_ms", "close_ms")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("mcp server pool")
+    group.addoption(
+        "--mcp-timing", nargs="?", const="mcp-timing.json", default=None, metavar="FILE",
+        help="Attribute test time to MCP spawn/initialize/call/close and write a JSON "
+             "report (default FILE: mcp-timing.json)",
+    )
+    group.addoption(
+        "--mcp-timing-top", type=int, default=10, metavar="N",
+        help="Rows per table in the --mcp-timing summary (default: 10)",
+    )
+
+
+def pytest_configure(config):
+    path = config.getoption("--mcp-timing")
+    if not path:
+        return
+    # Share the session's metrics instance if --mcp-metrics created one
+    if MCPClient.default_metrics is None:
+        MCPClient.default_metrics = ClientMetrics()
+        config._mcp_timing_owns_metrics = True
+    timer = PhaseTimer(MCPClient.default_metrics, path, config.getoption("--mcp-timing-top"))
+    config.pluginmanager.register(timer, "mcp-phase-timer")
+
+
+def pytest_unconfigure(config):
+    timer = config.pluginmanager.get_plugin("mcp-phase-timer")
+    if timer is not None:
+        timer.detach()
+    if getattr(config, "_mcp_timing_owns_metrics", False):
+        MCPClient.default_metrics = None
+
+
+def _new_test() -> Dict[str, Any]:
+    return {"duration_ms": 0.0, **{phase: 0.0 for phase in TEST_PHASES}, "killed": 0, "tools": {}, "servers": {}}
+
+
+class PhaseTimer:
+    """Collects MCP events per test and reports them at session end."""
+
+    def __init__(self, metrics: ClientMetrics, path: str, top: int = 10):
+        """
+        Args:
+            metrics: Metrics instance every client reports to
+            path: Where the JSON report is written
+            top: Rows per table in the terminal summary
+        """
+        self.path = path
+        self.top = top
+        self._lock = threading.Lock()
+        self._current: Optional[str] = None
+        self.tests: Dict[str, Dict[str, Any]] = {}
+        self.tool_ms: Dict[str, List[float]] = {}
+        self.fixtures: Dict[str, Dict[str, Any]] = {}
+        self.detach = metrics.add_hook(self._on_event)
+
+    def _test(self, nodeid: Optional[str]) -> Dict[str, Any]:
+        return self.tests.setdefault(nodeid or SESSION, _new_test())
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        kind = event["event"]
+        with self._lock:
+            test = self._test(self._current)
+            if kind == "request":
+                ms = event["serialize_ms"] + event["write_ms"] + event["wait_ms"] + event["parse_ms"]
+                if event["method"] == "initialize":
+                    test["initialize_ms"] += ms
+                elif event["method"] == "tools/call":
+                    test["calls_ms"] += ms
+                    tool = test["tools"].setdefault(event["tool"], {"count": 0, "ms": 0.0})
+                    tool["count"] += 1
+                    tool["ms"] += ms
+                    self.tool_ms.setdefault(f"{event['server']}:{event['tool']}", []).append(ms)
+                else:
+                    test["other_ms"] += ms
+            else:
+                ms = event["ms"]
+                test[f"{kind}_ms"] += ms
+                if event.get("killed"):
+                    test["killed"] += 1
+            server = test["servers"].setdefault(event["server"], {phase: 0.0 for phase in TEST_PHASES})
+            phase = f"{kind}_ms" if kind != "request" else {
+                "initialize": "initialize_ms", "tools/call": "calls_ms",
+            }.get(event["method"], "other_ms")
+            server[phase] += ms
+
+    def begin(self, nodeid: str) -> None:
+        """Attribute events to a test from now on."""
+        with self._lock:
+            self._current = nodeid
+
+    def end(self, nodeid: str, duration_ms: float) -> None:
+        with self._lock:
+            self._test(nodeid)["duration_ms"] += duration_ms
+            self._current = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.begin(item.nodeid)
+        start = time.perf_counter()
+        yield
+        self.end(item.nodeid, (time.perf_counter() - start) * 1000)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        start = time.perf_counter()
+        yield
+        ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            stats = self.fixtures.setdefault(
+                fixturedef.argname, {"scope": fixturedef.scope, "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+
+    def data(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps({"tests": self.tests, "tool_ms": self.tool_ms, "fixtures": self.fixtures}))
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Fold in another process's data (an xdist worker's)."""
+        with self._lock:
+            for nodeid, test in data["tests"].items():
+                mine = self._test(nodeid)
+                for key in ("duration_ms", "killed", *TEST_PHASES):
+                    mine[key] += test[key]
+                for name, tool in test["tools"].items():
+                    entry = mine["tools"].setdefault(name, {"count": 0, "ms": 0.0})
+                    entry["count"] += tool["count"]
+                    entry["ms"] += tool["ms"]
+                for name, server in test["servers"].items():
+                    entry = mine["servers"].setdefault(name, {phase: 0.0 for phase in TEST_PHASES})
+                    for phase in TEST_PHASES:
+                        entry[phase] += server[phase]
+            for name, values in data["tool_ms"].items():
+                self.tool_ms.setdefault(name, []).extend(values)
+            for name, stats in data["fixtures"].items():
+                mine = self.fixtures.setdefault(name, {"scope": stats["scope"], "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                mine["count"] += stats["count"]
+                mine["total_ms"] += stats["total_ms"]
+                mine["max_ms"] = max(mine["max_ms"], stats["max_ms"])
+
+    def pytest_sessionfinish(self, session):
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput["mcp_timing"] = json.dumps(self.data())
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        output = getattr(node, "workeroutput", None) or {}
+        if "mcp_timing" in output:
+            self.merge(json.loads(output["mcp_timing"]))
+
+    def report(self) -> Dict[str, Any]:
+        """The JSON artifact: per-test breakdowns plus rankings by server, tool and fixture."""
+        data = self.data()
+        servers: Dict[str, Dict[str, float]] = {}
+        for test in data["tests"].values():
+            for name, phases in test["servers"].items():
+                entry = servers.setdefault(name, {phase: 0.0 for phase in TEST_PHASES})
+                for phase in TEST_PHASES:
+                    entry[phase] += phases[phase]
+
+        tests = {}
+        for nodeid, test in data["tests"].items():
+            mcp_ms = sum(test[phase] for phase in TEST_PHASES)
+            tests[nodeid] = {
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in test.items() if k != "servers"},
+                "tools": {name: {**t, "ms": round(t["ms"], 3)} for name, t in test["tools"].items()},
+                "non_mcp_ms": round(max(test["duration_ms"] - mcp_ms, 0.0), 3),
+            }
+
+        tools = {
+            name: {
+                "count": len(values),
+                "total_ms": round(sum(values), 3),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "max_ms": round(max(values), 3),
+            }
+            for name, values in data["tool_ms"].items()
+        }
+        return {
+            "tests": dict(sorted(tests.items(), key=lambda kv: -kv[1]["duration_ms"])),
+            "servers": {
+                name: {**{k: round(v, 3) for k, v in phases.items()}, "total_ms": round(sum(phases.values()), 3)}
+                for name, phases in sorted(servers.items(), key=lambda kv: -sum(kv[1].values()))
+            },
+            "tools": dict(sorted(tools.items(), key=lambda kv: -kv[1]["total_ms"])),
+            "fixtures": {
+                name: {**stats, "total_ms": round(stats["total_ms"], 3), "max_ms": round(stats["max_ms"], 3)}
+                for name, stats in sorted(data["fixtures"].items(), key=lambda kv: -kv[1]["total_ms"])
+            },
+        }
+
+    def pytest_terminal_summary(self, terminalreporter, config):
+        if getattr(config, "workeroutput", None) is not None:
+            return
+        report = self.report()
+        write = terminalreporter.write_line
+        terminalreporter.section("MCP phase timing")
+
+        header = f"{'total ms':>10} {'spawn':>8} {'init':>8} {'calls':>9} {'other':>8} {'close':>8} {'non-mcp':>9}  test"
+        write(f"Slowest tests (top {self.top}):")
+        write(header)
+        for nodeid, test in list(report["tests"].items())[:self.top]:
+            flag = f"  [killed x{test['killed']}]" if test["killed"] else ""
+            write(
+                f"{test['duration_ms']:>10.1f} {test['spawn_ms']:>8.1f} {test['initialize_ms']:>8.1f} "
+                f"{test['calls_ms']:>9.1f} {test['other_ms']:>8.1f} {test['close_ms']:>8.1f} "
+                f"{test['non_mcp_ms']:>9.1f}  {nodeid}{flag}"
+            )
+
+        if report["servers"]:
+            write("")
+            write("By server:")
+            write(f"{'total ms':>10} {'spawn':>8} {'init':>8} {'calls':>9} {'other':>8} {'close':>8}  server")
+            for name, s in list(report["servers"].items())[:self.top]:
+                write(
+                    f"{s['total_ms']:>10.1f} {s['spawn_ms']:>8.1f} {s['initialize_ms']:>8.1f} "
+                    f"{s['calls_ms']:>9.1f} {s['other_ms']:>8.1f} {s['close_ms']:>8.1f}  {name}"
+                )
+
+        if report["tools"]:
+            write("")
+            write("By tool:")
+            write(f"{'total ms':>10} {'calls':>6} {'p50':>8} {'p95':>8} {'max':>8}  server:tool")
+            for name, t in list(report["tools"].items())[:self.top]:
+                write(
+                    f"{t['total_ms']:>10.1f} {t['count']:>6} {t['p50_ms']:>8.1f} "
+                    f"{t['p95_ms']:>8.1f} {t['max_ms']:>8.1f}  {name}"
+                )
+
+        if report["fixtures"]:
+            write("")
+            write("Slowest fixtures (setup):")
+            write(f"{'total ms':>10} {'count':>6} {'max':>8}  fixture (scope)")
+            for name, f in list(report["fixtures"].items())[:self.top]:
+                write(f"{f['total_ms']:>10.1f} {f['count']:>6} {f['max_ms']:>8.1f}  {name} ({f['scope']})")
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w") as out:
+            json.dump(report, out, indent=2)
+            out.write("\n")
+        write("")
+        write(f"MCP timing report written to {os.path.abspath(self.path)}")
@@ -0,0 +1,115 @@
+"""
+On-disk cache of MCP server tool catalogs (tools/list results).
+
+Entries are keyed by the server command, the identity of its binary (resolved
+path, size and mtime) and the name/version the server reports in its
+initialize result, so reinstalling or upgrading a server starts a fresh
+entry. MCPClient drops an entry when the server sends
+notifications/tools/list_changed.
+
+The default location is $MCP_TOOLS_CACHE, else $XDG_CACHE_HOME/mcp-tests/tools
+(~/.cache/mcp-tests/tools).
+
+Usage:
+    cache = ToolsCache()
+    client = MCPClient(["gitignore", "serve"], tools_cache=cache)
+    client.initialize()
+    tools = client.list_tools()   # served from disk after the first session
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+CACHE_VERSION = 1
+
+
+def default_directory() -> str:
+    """Cache directory from the environment, or the per-user default."""
+    explicit = os.environ.get("MCP_TOOLS_CACHE")
+    if explicit:
+        return explicit
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mcp-tests", "tools")
+
+
+def binary_identity(command: List[str]) -> Dict[str, Any]:
+    """Resolved path, size and mtime of the server executable (or script)."""
+    # For interpreters the script is what changes between releases
+    targets = [command[0]] + [arg for arg in command[1:2] if arg.endswith(".py")]
+    identity = []
+    for target in targets:
+        path = shutil.which(target) or target
+        try:
+            st = os.stat(path)
+        except OSError:
+            identity.append({"path": path})
+            continue
+        identity.append({"path": os.path.realpath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return {"binaries": identity}
+
+
+class ToolsCache:
+    """Tool catalogs stored as one JSON file per server binary and version."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: Cache directory (default: default_directory())
+        """
+        self.directory = directory or default_directory()
+
+    def key(self, command: List[str], server_info: Dict[str, Any]) -> str:
+        """Cache key for a server command and its initialize serverInfo."""
+        material = {
+            "v": CACHE_VERSION,
+            "command": command,
+            "server": {"name": server_info.get("name"), "version": server_info.get("version")},
+            **binary_identity(command),
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached tools for a key, or None."""
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        tools = entry.get("tools") if isinstance(entry, dict) else None
+        return tools if isinstance(tools, list) else None
+
+    def put(self, key: str, tools: List[Dict[str, Any]], server_info: Optional[Dict[str, Any]] = None) -> None:
+        """Store tools for a key; concurrent writers never leave a partial file."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"server": server_info or {}, "tools": tools}, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            # A read-only or full cache directory only costs a round-trip
+            pass
+
+    def invalidate(self, key: str) -> None:
+        """Drop the entry for a key."""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                self.invalidate(name[:-5])
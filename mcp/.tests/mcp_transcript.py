@@ -0,0 +1,119 @@
+"""
+Record MCP stdio sessions to compact transcript files and load them back.
+
+A transcript is JSON Lines (gzip-compressed when the path ends in .gz):
+
+    {"transcript": 1, "command": [...], "started": 1712345678.9}
+    {"t": 0.0012, "dt": 0.0340, "req": {...}, "res": {...}}
+    {"t": 0.0360, "req": {...}}                       # client notification
+    {"t": 0.5100, "msg": {...}}                       # server notification
+
+`t` is when the client sent the message, in seconds since the session
+started; `dt` is how long the response took. replay_server.py plays a
+transcript back over stdio.
+
+Usage:
+    client = MCPClient(["servicenow-mcp", "serve"], record="snow-session.jsonl.gz")
+    ...
+    client.close()
+
+    python replay_server.py snow-session.jsonl.gz --speed fast
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+import time
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+TRANSCRIPT_VERSION = 1
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+
+
+class TranscriptRecorder:
+    """
+    Writes request/response pairs, with timing, as the client sees them.
+
+    Thread-safe: requests are recorded from caller threads and responses from
+    the client's reader thread.
+    """
+
+    def __init__(self, path: str, command: Optional[List[str]] = None):
+        self.path = path
+        self._file = _open(path, "w")
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._sent: Dict[Any, Tuple[float, Dict[str, Any]]] = {}
+        self._write({"transcript": TRANSCRIPT_VERSION, "command": command or [], "started": time.time()})
+
+    def _now(self) -> float:
+        return round(time.perf_counter() - self._start, 6)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(_dumps(entry) + "\n")
+
+    def sent(self, message: Any) -> None:
+        """Record a message (or batch) the client wrote."""
+        for item in message if isinstance(message, list) else [message]:
+            if not isinstance(item, dict):
+                continue
+            if "id" in item and "method" in item:
+                with self._lock:
+                    self._sent[item["id"]] = (self._now(), item)
+            else:
+                self._write({"t": self._now(), "req": item})
+
+    def received(self, message: Dict[str, Any]) -> None:
+        """Record a message the server sent."""
+        if "method" in message or message.get("id") is None:
+            self._write({"t": self._now(), "msg": message})
+            return
+        with self._lock:
+            sent = self._sent.pop(message["id"], None)
+        if sent is None:
+            self._write({"t": self._now(), "msg": message})
+            return
+        t, request = sent
+        self._write({"t": t, "dt": round(self._now() - t, 6), "req": request, "res": message})
+
+    def close(self) -> None:
+        with self._lock:
+            # Requests that never got an answer are kept, without a response
+            for t, request in self._sent.values():
+                if not self._file.closed:
+                    self._file.write(_dumps({"t": t, "req": request}) + "\n")
+            self._sent.clear()
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_transcript(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Load a transcript.
+
+    Returns:
+        (header, entries) with entries sorted by send time
+    """
+    with _open(path, "r") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("transcript") != TRANSCRIPT_VERSION:
+        raise ValueError(f"Not a version {TRANSCRIPT_VERSION} MCP transcript: {path}")
+    return lines[0], sorted(lines[1:], key=lambda e: e.get("t", 0.0))
+
+
+def exchanges(entries: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Entries that are request/response pairs."""
+    return (e for e in entries if "req" in e and "res" in e)
@@ -0,0 +1,151 @@
+"""
+Stdio MCP server that plays back a recorded transcript.
+
+Incoming requests are matched to recorded ones by method and params (the
+JSON-RPC id is ignored and rewritten). If the exact params were never
+recorded, the next unused response for the same method (and, for
+tools/call, the same tool) is used, so small differences such as clientInfo
+do not break a replay. Each recorded response is consumed once, in recorded
+order.
+
+Usage:
+    python replay_server.py session.jsonl.gz                # recorded speed
+    python replay_server.py session.jsonl.gz --speed fast   # no delays
+    python replay_server.py session.jsonl.gz --speed 10     # 10x faster
+
+    MCPClient([sys.executable, "replay_server.py", "session.jsonl.gz", "--speed", "fast"])
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from mcp_transcript import exchanges, read_transcript
+
+
+def _key(method: str, params: Any) -> Tuple[str, str]:
+    return method, json.dumps(params or {}, sort_keys=True, separators=(",", ":"))
+
+
+def _loose_key(method: str, params: Any) -> Tuple[str, Optional[str]]:
+    if method == "tools/call" and isinstance(params, dict):
+        return method, params.get("name")
+    return method, None
+
+
+class Replayer:
+    """Recorded responses, queued by (method, params) and by method/tool alone."""
+
+    def __init__(self, entries: List[Dict[str, Any]], speed: Optional[float]):
+        """
+        Args:
+            entries: Transcript entries from read_transcript()
+            speed: Playback speed multiplier; None replays without delays
+        """
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._exact: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = {}
+        self._loose: Dict[Tuple[str, Optional[str]], Deque[Dict[str, Any]]] = {}
+        for entry in exchanges(entries):
+            method, params = entry["req"]["method"], entry["req"].get("params")
+            self._exact.setdefault(_key(method, params), deque()).append(entry)
+            self._loose.setdefault(_loose_key(method, params), deque()).append(entry)
+
+    def _take(self, method: str, params: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            queue = self._exact.get(_key(method, params))
+            if not queue:
+                queue = self._loose.get(_loose_key(method, params))
+            if not queue:
+                return None
+            entry = queue.popleft()
+            # Consume it from the other index as well
+            recorded = entry["req"].get("params")
+            for other in (self._exact.get(_key(method, recorded)), self._loose.get(_loose_key(method, recorded))):
+                if other and entry in other:
+                    other.remove(entry)
+            return entry
+
+    def respond(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Recorded response to a request, with its id; None for notifications."""
+        if "id" not in request:
+            return None
+        method = request.get("method", "")
+        entry = self._take(method, request.get("params"))
+
+        if entry is None:
+            if method == "ping":
+                return {"jsonrpc": "2.0", "id": request["id"], "result": {}}
+            return {
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "error": {"code": -32601, "message": f"No recorded response for {method}"},
+            }
+
+        if self.speed is not None and entry.get("dt"):
+            time.sleep(entry["dt"] / self.speed)
+        return dict(entry["res"], id=request["id"])
+
+
+_write_lock = threading.Lock()
+
+
+def _write(message: Any) -> None:
+    with _write_lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+
+def _handle(replayer: Replayer, message: Any) -> None:
+    if isinstance(message, list):
+        replies = [r for r in (replayer.respond(m) for m in message if isinstance(m, dict)) if r]
+        if replies:
+            _write(replies)
+        return
+    reply = replayer.respond(message)
+    if reply is not None:
+        _write(reply)
+
+
+def _speed(value: str) -> Optional[float]:
+    if value == "fast":
+        return None
+    if value == "real":
+        return 1.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be > 0")
+    return speed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded MCP transcript over stdio.")
+    parser.add_argument("transcript", help="Transcript file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--speed", type=_speed, default=1.0,
+                        help="'real' (default), 'fast' for no delays, or a multiplier such as 10")
+    args = parser.parse_args()
+
+    _, entries = read_transcript(args.transcript)
+    replayer = Replayer(entries, args.speed)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            _write({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            continue
+        # One thread per request so recorded latencies overlap as they did live
+        threading.Thread(target=_handle, args=(replayer, message), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,12 @@
 #   ./run_tests.sh              # Run all tests
 #   ./run_tests.sh gitignore    # Run gitignore tests only
 #   ./run_tests.sh servicenow   # Run servicenow tests only
+#   ./run_tests.sh latency      # Fail if a tool is slower than its latency budget
+#   ./run_tests.sh latency-refresh   # Rewrite latency_baselines.json from this machine
+#   ./run_tests.sh -j 4         # Run on 4 parallel workers (pytest-xdist)
+#   ./run_tests.sh -j auto      # One worker per CPU core
+#   ./run_tests.sh --shard 2/4  # Run the 2nd of 4 duration-balanced shards (CI runners)
+#   MCP_SNOW_STANDIN=1 ./run_tests.sh servicenow   # Offline ServiceNow stand-in
 #
 
 set -e
@@ -13,6 +19,9 @@ set -e
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 cd "$SCRIPT_DIR"
 
+# Per-test durations, recorded every run and used to balance --shard
+DURATIONS_FILE="${MCP_DURATIONS:-$SCRIPT_DIR/.test_durations.json}"
+
 # Colors
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -32,8 +41,8 @@ setup_venv() {
 
     source .venv/bin/activate
 
-    # Check if pytest is installed
-    if ! python -c "import pytest" 2>/dev/null; then
+    # Check if pytest (and xdist, for -j) is installed
+    if ! python -c "import pytest, xdist" 2>/dev/null; then
         info "Installing dependencies..."
         pip install -q -r requirements.txt
     fi
@@ -54,7 +63,7 @@ check_server() {
                 warn "servicenow-mcp binary not found - tests will be skipped"
                 return 1
             fi
-            if [[ -z "$SERVICENOW_INSTANCE" ]]; then
+            if [[ -z "$SERVICENOW_INSTANCE" && -z "$MCP_SNOW_STANDIN" ]]; then
                 warn "SERVICENOW_INSTANCE not set - tests will be skipped"
                 return 1
             fi
@@ -66,7 +75,18 @@ check_server() {
 # Run tests
 run_tests() {
     local target=${1:-}
-    local pytest_args="-v --tb=short"
+    local pytest_args="-v --tb=short --mcp-durations=$DURATIONS_FILE"
+
+    # Each worker gets its own server pool and temp directories; loadscope
+    # keeps a test class on one worker so its pooled servers are reused.
+    if [[ -n "$JOBS" ]]; then
+        pytest_args="$pytest_args -n $JOBS --dist loadscope"
+    fi
+
+    # Every runner computes the same split from the same durations file
+    if [[ -n "$SHARD" ]]; then
+        pytest_args="$pytest_args --shard=$SHARD"
+    fi
 
     if [[ -n "$target" ]]; then
         case $target in
@@ -76,9 +96,15 @@ run_tests() {
             servicenow)
                 pytest_args="$pytest_args test_servicenow.py"
                 ;;
+            latency)
+                pytest_args="$pytest_args test_latency.py --mcp-latency check"
+                ;;
+            latency-refresh)
+                pytest_args="$pytest_args test_latency.py --mcp-latency refresh"
+                ;;
             *)
                 error "Unknown target: $target"
-                echo "Usage: $0 [gitignore|servicenow]"
+                usage
                 exit 1
                 ;;
         esac
@@ -88,8 +114,44 @@ run_tests() {
     python -m pytest $pytest_args
 }
 
+usage() {
+    echo "Usage: $0 [-j N|auto] [--shard i/N] [gitignore|servicenow|latency|latency-refresh]"
+}
+
 # Main
 main() {
+    JOBS=""
+    SHARD=""
+
+    # getopts has no long options; pull out --shard first
+    local args=()
+    while [[ $# -gt 0 ]]; do
+        case $1 in
+            --shard)
+                if [[ -z "${2:-}" ]]; then
+                    error "Option --shard requires an argument"; usage; exit 1
+                fi
+                SHARD=$2; shift 2 ;;
+            --shard=*) SHARD=${1#--shard=}; shift ;;
+            *) args+=("$1"); shift ;;
+        esac
+    done
+    set -- "${args[@]}"
+
+    if [[ -n "$SHARD" && ! "$SHARD" =~ ^[0-9]+/[0-9]+$ ]]; then
+        error "--shard expects i/N, got: $SHARD"; usage; exit 1
+    fi
+
+    while getopts ":j:h" opt; do
+        case $opt in
+            j) JOBS=$OPTARG ;;
+            h) usage; exit 0 ;;
+            :) error "Option -$OPTARG requires an argument"; usage; exit 1 ;;
+            *) error "Unknown option: -$OPTARG"; usage; exit 1 ;;
+        esac
+    done
+    shift $((OPTIND - 1))
+
     info "MCP Server Tests"
     echo
 
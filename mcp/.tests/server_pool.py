@@ -0,0 +1,264 @@
+"""
+Pool of warm, already-initialized MCP server processes.
+
+Spawning a server and running the initialize handshake dominates the cost of
+most MCP tests. The pool keeps initialized clients keyed by server name and
+working directory so tests can borrow one and hand it back.
+
+With prefork, the pool also keeps K initialized spares per server ready in
+the background, so acquire() returns a warm process immediately even when
+every previous one was recycled.
+
+Usage:
+    pool = ServerPool(SERVERS)
+    pool.prefork("gitignore", 2)
+    with pool.borrow("gitignore") as client:
+        client.call_tool("gitignore_search", {"pattern": "go"})
+    pool.close()
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from mcp_client import MCPClient, MCPError
+from mcp_metrics import ClientMetrics
+from mcp_tools_cache import ToolsCache
+
+
+PoolKey = Tuple[str, Optional[str]]
+
+logger = logging.getLogger(__name__)
+
+
+class ServerPool:
+    """
+    Borrow/return pool of initialized MCPClient instances.
+
+    Clients are keyed by (server name, cwd). A client for one working
+    directory is never handed out for another, so tests that touch files in
+    their own temp directory stay isolated.
+    """
+
+    # Seconds a reused client has to answer the health-check ping
+    HEALTH_CHECK_TIMEOUT = 2.0
+
+    def __init__(
+        self,
+        servers: Dict[str, Dict],
+        max_idle_per_key: int = 4,
+        tools_cache: Optional[ToolsCache] = None,
+        validation: str = "strict",
+        default_timeout: Optional[float] = None,
+        metrics: Optional[ClientMetrics] = None,
+    ):
+        """
+        Args:
+            servers: Server configurations, as in conftest.SERVERS
+            max_idle_per_key: Idle clients kept per (server, cwd); extras are closed
+            tools_cache: Shared on-disk tools/list cache for spawned clients
+            validation: Argument validation mode for spawned clients
+                (see MCPClient); unless "off", validators are compiled at
+                spawn so checks do not depend on which test ran first
+            default_timeout: Request deadline for spawned clients, in seconds
+            metrics: Shared instrumentation for every spawned client
+        """
+        self.servers = servers
+        self.max_idle_per_key = max_idle_per_key
+        self.tools_cache = tools_cache
+        self.validation = validation
+        self.default_timeout = default_timeout
+        self.metrics = metrics
+        self._idle: Dict[PoolKey, List[MCPClient]] = {}
+        self._keys: Dict[int, PoolKey] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.spawned = 0
+        self.reused = 0
+
+        # Prefork: target spare count per key, and spawns already under way
+        self._spares: Dict[PoolKey, int] = {}
+        self._refilling: Dict[PoolKey, int] = {}
+        self._spawner: Optional[ThreadPoolExecutor] = None
+
+    def _spawn(self, name: str, cwd: Optional[str]) -> MCPClient:
+        config = self.servers[name]
+        client = MCPClient(
+            config["command"], config["env"], cwd=cwd,
+            tools_cache=self.tools_cache, validation=self.validation,
+            default_timeout=self.default_timeout, metrics=self.metrics,
+        )
+        try:
+            client.initialize()
+            if self.validation != "off":
+                client.list_tools()
+        except Exception:
+            client.close()
+            raise
+        with self._lock:
+            self.spawned += 1
+        return client
+
+    def prefork(self, name: str, spares: int, cwd: Optional[str] = None) -> None:
+        """
+        Keep `spares` initialized processes for a server ready at all times.
+
+        Spares are spawned in the background now and topped up whenever one is
+        handed out, so acquire() does not wait for spawn + initialize.
+        """
+        key = (name, str(cwd) if cwd else None)
+        with self._lock:
+            self._spares[key] = spares
+            self.max_idle_per_key = max(self.max_idle_per_key, spares)
+            if self._spawner is None:
+                self._spawner = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mcp-prefork")
+        self._refill(key)
+
+    def _refill(self, key: PoolKey) -> None:
+        with self._lock:
+            if self._closed or self._spawner is None:
+                return
+            missing = (
+                self._spares.get(key, 0)
+                - len(self._idle.get(key, []))
+                - self._refilling.get(key, 0)
+            )
+            if missing <= 0:
+                return
+            self._refilling[key] = self._refilling.get(key, 0) + missing
+            spawner = self._spawner
+        for _ in range(missing):
+            spawner.submit(self._spawn_spare, key)
+
+    def _spawn_spare(self, key: PoolKey) -> None:
+        try:
+            client = self._spawn(*key)
+        except Exception:
+            logger.exception("Failed to prefork %s", key[0])
+            client = None
+        with self._lock:
+            self._refilling[key] -= 1
+            if client is not None and not self._closed:
+                self._idle.setdefault(key, []).append(client)
+                return
+        if client is not None:
+            client.close()
+
+    def wait_for_spares(self, timeout: Optional[float] = None) -> bool:
+        """Block until every prefork target is met; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                ready = all(len(self._idle.get(key, [])) >= n for key, n in self._spares.items())
+                pending = any(self._refilling.values())
+            if ready or not pending:
+                return ready
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+
+    def _healthy(self, client: MCPClient) -> bool:
+        if client.process.poll() is not None:
+            return False
+        try:
+            client.ping(timeout=self.HEALTH_CHECK_TIMEOUT)
+        except MCPError:
+            return False
+        return True
+
+    def acquire(self, name: str, cwd: Optional[str] = None) -> MCPClient:
+        """
+        Borrow an initialized client for a server.
+
+        Idle clients are health-checked before reuse; unhealthy ones are
+        closed and replaced with a fresh process.
+
+        Args:
+            name: Key into the servers mapping
+            cwd: Working directory the server must run in (default: current dir)
+        """
+        cwd = str(cwd) if cwd else None
+        key = (name, cwd)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                client = idle.pop() if idle else None
+            if client is None:
+                client = self._spawn(name, cwd)
+                break
+            if self._healthy(client):
+                with self._lock:
+                    self.reused += 1
+                break
+            client.close()
+
+        with self._lock:
+            self._keys[id(client)] = key
+        self._refill(key)
+        return client
+
+    def release(self, client: MCPClient, dirty: bool = False) -> None:
+        """
+        Return a borrowed client to the pool.
+
+        Args:
+            client: Client obtained from acquire()
+            dirty: The borrower changed server-side state; the process is
+                closed instead of being reused
+        """
+        with self._lock:
+            key = self._keys.pop(id(client), None)
+
+        # Requests still in flight would leak their replies into the next borrower
+        if dirty or key is None or client.pending_requests or client.process.poll() is not None:
+            client.close()
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_key:
+                idle.append(client)
+                return
+        client.close()
+
+    def recycle(self, client: MCPClient) -> None:
+        """Discard a borrowed client whose server state is no longer clean."""
+        self.release(client, dirty=True)
+
+    def discard(self, cwd: str) -> None:
+        """Close idle clients rooted at a working directory that is going away."""
+        cwd = str(cwd)
+        with self._lock:
+            keys = [key for key in self._idle if key[1] == cwd]
+            clients = [c for key in keys for c in self._idle.pop(key)]
+        for client in clients:
+            client.close()
+
+    @contextmanager
+    def borrow(self, name: str, cwd: Optional[str] = None, dirty: bool = False) -> Iterator[MCPClient]:
+        """Context manager form of acquire()/release()."""
+        client = self.acquire(name, cwd)
+        try:
+            yield client
+        except BaseException:
+            self.recycle(client)
+            raise
+        self.release(client, dirty=dirty)
+
+    def close(self) -> None:
+        """Close every idle client and stop preforking. Borrowed clients are closed on release."""
+        with self._lock:
+            self._closed = True
+            spawner, self._spawner = self._spawner, None
+        if spawner is not None:
+            spawner.shutdown(wait=True)
+        with self._lock:
+            clients = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for client in clients:
+            client.close()
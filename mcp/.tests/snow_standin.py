@@ -0,0 +1,365 @@
+"""
+Offline stand-in for the ServiceNow Table API.
+
+Serves fixture records over HTTP so servicenow-mcp can run without a live
+instance or browser SSO. Latency and page size are configurable, and tables
+can be padded with synthetic records, so the snow_* tools' paging and
+concurrency can be load-tested locally in seconds.
+
+Supported:
+    GET /api/now/table/<table>              sysparm_query, sysparm_limit,
+                                            sysparm_offset, sysparm_fields
+    GET /api/now/table/<table>/<sys_id>
+    GET /api/now/table/sys_dictionary?sysparm_query=name=<table>
+                                            field list derived from fixtures
+    Encoded queries: =, !=, LIKE, NOTLIKE, STARTSWITH, ENDSWITH, IN, NOT IN,
+    ISEMPTY, ISNOTEMPTY, ^ (AND), ^OR, ^NQ, ORDERBY/ORDERBYDESC,
+    123TEXTQUERY321 (full-text search)
+
+Usage:
+    python snow_standin.py --port 8765 --latency 0.05 --page-size 100 \
+        --generate cmdb_ci_server=20000
+
+    export SERVICENOW_INSTANCE=http://127.0.0.1:8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "servicenow.json")
+
+# ServiceNow's own cap on sysparm_limit
+DEFAULT_MAX_PAGE_SIZE = 10000
+
+_OPERATORS = (
+    "ISNOTEMPTY", "ISEMPTY", "STARTSWITH", "ENDSWITH", "NOTLIKE", "NOT IN", "LIKE", "IN", "!=", ">=", "<=", "=", ">", "<",
+)
+
+Record = Dict[str, Any]
+Predicate = Callable[[Record], bool]
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _compare(op: str, left: str, right: str) -> bool:
+    try:
+        lnum, rnum = float(left), float(right)
+    except ValueError:
+        lnum, rnum = left, right
+    return {">": lnum > rnum, "<": lnum < rnum, ">=": lnum >= rnum, "<=": lnum <= rnum}[op]
+
+
+def _term(term: str) -> Predicate:
+    """Compile one encoded-query term such as `nameLIKEprod`."""
+    if term.startswith("123TEXTQUERY321="):
+        words = term.split("=", 1)[1].lower().split()
+        return lambda r: all(any(w in _text(v).lower() for v in r.values()) for w in words)
+
+    # The operator is the earliest match after the field name; on a tie the
+    # longest wins, so "a>=1" is >= and "stateNOT IN1,2" is NOT IN.
+    matches = [(term.find(op), -len(op), op) for op in _OPERATORS if term.find(op) > 0]
+    if matches:
+        idx, _, op = min(matches)
+        field, value = term[:idx], term[idx + len(op):]
+        if op == "ISEMPTY":
+            return lambda r: _text(r.get(field)) == ""
+        if op == "ISNOTEMPTY":
+            return lambda r: _text(r.get(field)) != ""
+        if op == "=":
+            return lambda r: _text(r.get(field)) == value
+        if op == "!=":
+            return lambda r: _text(r.get(field)) != value
+        if op == "LIKE":
+            return lambda r: value.lower() in _text(r.get(field)).lower()
+        if op == "NOTLIKE":
+            return lambda r: value.lower() not in _text(r.get(field)).lower()
+        if op == "STARTSWITH":
+            return lambda r: _text(r.get(field)).lower().startswith(value.lower())
+        if op == "ENDSWITH":
+            return lambda r: _text(r.get(field)).lower().endswith(value.lower())
+        if op in ("IN", "NOT IN"):
+            values = set(value.split(","))
+            if op == "IN":
+                return lambda r: _text(r.get(field)) in values
+            return lambda r: _text(r.get(field)) not in values
+        return lambda r: _compare(op, _text(r.get(field)), value)
+
+    raise ValueError(f"Unsupported query term: {term}")
+
+
+def compile_query(query: str) -> Tuple[Predicate, List[Tuple[str, bool]]]:
+    """
+    Compile an encoded query into a predicate and an ordering.
+
+    Returns:
+        (predicate, [(field, descending), ...])
+    """
+    ordering: List[Tuple[str, bool]] = []
+    groups: List[List[List[Predicate]]] = [[[]]]  # ^NQ groups -> ^OR alternatives -> ^ terms
+
+    for raw in query.split("^") if query else []:
+        if not raw:
+            continue
+        if raw.startswith("ORDERBYDESC"):
+            ordering.append((raw[len("ORDERBYDESC"):], True))
+        elif raw.startswith("ORDERBY"):
+            ordering.append((raw[len("ORDERBY"):], False))
+        elif raw.startswith("NQ"):
+            groups.append([[_term(raw[2:])]])
+        elif raw.startswith("OR"):
+            groups[-1].append([_term(raw[2:])])
+        else:
+            groups[-1][-1].append(_term(raw))
+
+    def predicate(record: Record) -> bool:
+        return any(
+            any(all(p(record) for p in terms) for terms in alternatives)
+            for alternatives in groups
+        )
+
+    return predicate, ordering
+
+
+class SnowStandIn:
+    """
+    In-process ServiceNow Table API stand-in.
+
+    Usage:
+        with SnowStandIn(latency=0.02, max_page_size=50) as snow:
+            os.environ["SERVICENOW_INSTANCE"] = snow.url
+    """
+
+    # Seconds between serve_forever's shutdown checks
+    POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        fixtures: str = DEFAULT_FIXTURES,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        max_page_size: int = DEFAULT_MAX_PAGE_SIZE,
+        generate: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            fixtures: JSON file mapping table name to a list of records
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            latency: Seconds added to every response
+            jitter: Up to this many extra random seconds per response
+            max_page_size: Cap on sysparm_limit, to force paging
+            generate: Pad tables to this many records with synthetic copies
+        """
+        with open(fixtures) as f:
+            self.tables: Dict[str, List[Record]] = json.load(f)
+        for table, count in (generate or {}).items():
+            self.tables[table] = _pad(self.tables.get(table, []), table, count)
+
+        self.latency = latency
+        self.jitter = jitter
+        self.max_page_size = max_page_size
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as SERVICENOW_INSTANCE."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SnowStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": self.POLL_INTERVAL},
+            name="snow-standin", daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+    def table(self, name: str) -> Optional[List[Record]]:
+        """Records for a table; cmdb_ci is the union of every cmdb_ci_* class."""
+        if name in self.tables:
+            return self.tables[name]
+        if name == "cmdb_ci":
+            return [r for t, records in self.tables.items() if t.startswith("cmdb_ci_") for r in records]
+        if name == "sys_dictionary":
+            return [
+                {"name": table, "element": field, "internal_type": "string", "column_label": field.replace("_", " ").title()}
+                for table, records in self.tables.items()
+                for field in sorted({k for r in records for k in r})
+            ]
+        return None
+
+    def query(self, table: str, params: Dict[str, str]) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        """Answer a table list request; returns (status, body, extra headers)."""
+        records = self.table(table)
+        if records is None:
+            return 400, _error(f"Invalid table {table}"), {}
+
+        try:
+            predicate, ordering = compile_query(params.get("sysparm_query", ""))
+        except ValueError as e:
+            return 400, _error(str(e)), {}
+        matched = [r for r in records if predicate(r)]
+        for field, descending in reversed(ordering):
+            matched.sort(key=lambda r: _text(r.get(field)), reverse=descending)
+
+        try:
+            limit = int(params.get("sysparm_limit", self.max_page_size))
+            offset = int(params.get("sysparm_offset", 0))
+        except ValueError:
+            return 400, _error("sysparm_limit and sysparm_offset must be integers"), {}
+        limit = max(0, min(limit, self.max_page_size))
+        page = matched[offset:offset + limit]
+
+        fields = [f for f in params.get("sysparm_fields", "").split(",") if f]
+        if fields:
+            page = [{f: r.get(f, "") for f in fields} for r in page]
+
+        headers = {"X-Total-Count": str(len(matched))}
+        links = []
+        base = {k: v for k, v in params.items() if k != "sysparm_offset"}
+        if offset + limit < len(matched):
+            links.append(f'<{self.url}/api/now/table/{table}?{urlencode(dict(base, sysparm_offset=offset + limit))}>;rel="next"')
+        if offset > 0:
+            links.append(f'<{self.url}/api/now/table/{table}?{urlencode(dict(base, sysparm_offset=max(offset - limit, 0)))}>;rel="prev"')
+        if links:
+            headers["Link"] = ",".join(links)
+        return 200, {"result": page}, headers
+
+    def get(self, table: str, sys_id: str) -> Tuple[int, Dict[str, Any]]:
+        """Answer a single-record request."""
+        records = self.table(table)
+        if records is None:
+            return 400, _error(f"Invalid table {table}")
+        for record in records:
+            if record.get("sys_id") == sys_id:
+                return 200, {"result": record}
+        return 404, _error("No Record found")
+
+
+def _error(message: str) -> Dict[str, Any]:
+    return {"error": {"message": message, "detail": None}, "status": "failure"}
+
+
+def _pad(records: List[Record], table: str, count: int) -> List[Record]:
+    """Extend records to `count` with numbered copies of the fixtures."""
+    if len(records) >= count:
+        return records
+    templates = records or [{"name": table}]
+    padded = list(records)
+    for i in range(len(records), count):
+        record = copy.deepcopy(templates[i % len(templates)])
+        record["sys_id"] = f"{i:032x}"
+        for key in ("name", "number", "user_name"):
+            if key in record:
+                record[key] = f"{record[key]}-{i:06d}"
+        padded.append(record)
+    return padded
+
+
+def _make_handler(standin: SnowStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            with standin._lock:
+                standin.requests += 1
+            delay = standin.latency + (random.uniform(0, standin.jitter) if standin.jitter else 0)
+            if delay:
+                time.sleep(delay)
+
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+            parts = [p for p in url.path.split("/") if p]
+
+            if parts[:3] == ["api", "now", "table"] and len(parts) == 4:
+                status, body, headers = standin.query(parts[3], params)
+            elif parts[:3] == ["api", "now", "table"] and len(parts) == 5:
+                status, body = standin.get(parts[3], parts[4])
+                headers = {}
+            else:
+                status, body, headers = 404, _error(f"Unknown path {url.path}"), {}
+            self._send(status, body, headers)
+
+        def _send(self, status: int, body: Dict[str, Any], headers: Dict[str, str]) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json;charset=UTF-8")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def _generate_arg(value: str) -> Tuple[str, int]:
+    table, _, count = value.partition("=")
+    if not table or not count.isdigit():
+        raise argparse.ArgumentTypeError(f"Expected TABLE=COUNT, got: {value}")
+    return table, int(count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline ServiceNow Table API stand-in.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Fixture JSON file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds, up to this much")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_MAX_PAGE_SIZE, help="Cap on sysparm_limit")
+    parser.add_argument("--generate", type=_generate_arg, action="append", default=[],
+                        help="Pad TABLE to COUNT synthetic records (repeatable), e.g. cmdb_ci_server=20000")
+    args = parser.parse_args()
+
+    standin = SnowStandIn(
+        args.fixtures, args.host, args.port, latency=args.latency, jitter=args.jitter,
+        max_page_size=args.page_size, generate=dict(args.generate),
+    )
+    print(f"ServiceNow stand-in listening on {standin.url}")
+    print(f"  export SERVICENOW_INSTANCE={standin.url}")
+    standin.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -37,7 +37,7 @@ class TestGitignoreProtocol:
     def test_tools_list(self, gitignore_client):
         """Server returns list of available tools."""
         gitignore_client.initialize()
-        tools = gitignore_client.list_tools()
+        tools = gitignore_client.list_tools(refresh=True)
 
         assert isinstance(tools, list)
         assert len(tools) > 0
@@ -51,7 +51,7 @@ class TestGitignoreProtocol:
     def test_expected_tools_present(self, gitignore_client):
         """All expected tools are available."""
         gitignore_client.initialize()
-        tools = gitignore_client.list_tools()
+        tools = gitignore_client.list_tools(refresh=True)
         tool_names = {t["name"] for t in tools}
 
         expected_tools = {
@@ -70,7 +70,7 @@ class TestGitignoreProtocol:
     def test_tool_has_input_schema(self, gitignore_client):
         """Each tool has an inputSchema."""
         gitignore_client.initialize()
-        tools = gitignore_client.list_tools()
+        tools = gitignore_client.list_tools(refresh=True)
 
         for tool in tools:
             assert "inputSchema" in tool, f"Tool {tool['name']} missing inputSchema"
@@ -143,7 +143,7 @@ class TestGitignoreSearch:
 
         # Behavior depends on implementation - may error or return all
         try:
-            result = gitignore_client.call_tool("gitignore_search", {})
+            result = gitignore_client.call_tool("gitignore_search", {}, validate=False)
             # If it succeeds, that's also valid (returns all)
             assert "content" in result
         except MCPError:
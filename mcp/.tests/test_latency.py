@@ -0,0 +1,54 @@
+"""
+Latency budgets for local-only tools (see mcp_latency.py).
+
+Skipped unless --mcp-latency is given:
+
+    pytest test_latency.py --mcp-latency check      # fail on regressions
+    pytest test_latency.py --mcp-latency refresh    # rewrite latency_baselines.json
+
+Each entry in the baseline file becomes one test that times the tool on a
+warm pooled server. An entry with no recorded percentiles has no budget yet:
+check skips it until refresh has measured it.
+"""
+
+import pytest
+
+import mcp_latency
+
+
+def pytest_generate_tests(metafunc):
+    if "budget" not in metafunc.fixturenames:
+        return
+    path = metafunc.config.getoption("--mcp-latency-baselines")
+    params = []
+    for entry in mcp_latency.load_baselines(path)["tools"]:
+        marks = [pytest.mark.requires_server(entry["server"])]
+        if entry.get("requires_env"):
+            marks.append(pytest.mark.requires_env(*entry["requires_env"]))
+        params.append(pytest.param(entry, marks=marks, id=f"{entry['server']}-{mcp_latency.entry_id(entry)}"))
+    metafunc.parametrize("budget", params)
+
+
+def test_latency_budget(budget, latency_baselines, server_pool, pytestconfig):
+    """The tool's latency percentiles stay within budget."""
+    mode, baselines = latency_baselines
+    if mode == "check" and not any(key in budget for key in mcp_latency.PERCENTILES):
+        pytest.skip(f"no budget recorded for {mcp_latency.entry_id(budget)}; run ./run_tests.sh latency-refresh")
+    repeat = pytestconfig.getoption("--mcp-latency-repeat") or mcp_latency.setting(baselines, budget, "repeat")
+    tolerance = pytestconfig.getoption("--mcp-latency-tolerance")
+    if tolerance is None:
+        tolerance = mcp_latency.setting(baselines, budget, "tolerance")
+
+    with server_pool.borrow(budget["server"]) as client:
+        stats = mcp_latency.measure(
+            client, budget["tool"], budget.get("arguments"),
+            repeat=repeat, warmup=mcp_latency.setting(baselines, budget, "warmup"),
+        )
+    measured = pytestconfig._mcp_latency_measured.setdefault(budget["server"], {})
+    measured[mcp_latency.entry_id(budget)] = stats
+
+    if mode == "check":
+        failures = mcp_latency.regressions(
+            stats, budget, tolerance, mcp_latency.setting(baselines, budget, "slack_ms"),
+        )
+        assert not failures, "\n".join(failures)
@@ -0,0 +1,999 @@
+"""
+Tests for the MCP test client itself.
+
+Runs against fake_server.py, so no server binaries are required.
+
+Run with: pytest test_mcp_client.py -v
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import mcp_bench
+import mcp_durations
+import mcp_latency
+from mcp_client import AsyncMCPClient, MCPClient, MCPError, StderrTail
+from mcp_codec import LineFramer, available_codecs, get_codec
+from mcp_metrics import PHASES, ClientMetrics
+from mcp_schema import SchemaError, compile_schema
+from mcp_timing_plugin import TEST_PHASES, PhaseTimer
+from mcp_tools_cache import ToolsCache
+from mcp_transcript import read_transcript
+from server_pool import ServerPool
+
+
+FAKE_SERVER = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_server.py")]
+REPLAY_SERVER = [sys.executable, os.path.join(os.path.dirname(__file__), "replay_server.py")]
+
+
+@pytest.fixture
+def fake_client():
+    """Create an initialized client connected to the fake server."""
+    client = MCPClient(FAKE_SERVER)
+    client.initialize()
+    yield client
+    client.close()
+
+
+def _payload(result):
+    return json.loads(result["content"][0]["text"])
+
+
+class TestPipelining:
+    """Test id-multiplexed request handling."""
+
+    def test_call_tool_round_trip(self, fake_client):
+        """A single call returns its own result."""
+        result = fake_client.call_tool("fake_echo", {"value": 42})
+        assert _payload(result) == {"value": 42}
+
+    def test_submitted_calls_overlap(self, fake_client):
+        """Calls submitted together run concurrently, not serially."""
+        start = time.monotonic()
+        futures = [fake_client.submit_tool("fake_sleep", {"seconds": 0.3}) for _ in range(5)]
+        results = [f.result(timeout=5) for f in futures]
+        elapsed = time.monotonic() - start
+
+        assert all(_payload(r) == {"slept": 0.3} for r in results)
+        assert elapsed < 1.0, f"5 x 0.3s calls took {elapsed:.2f}s; expected overlap"
+
+    def test_out_of_order_replies_matched_by_id(self, fake_client):
+        """A slow call does not receive a later, faster call's response."""
+        slow = fake_client.submit_tool("fake_sleep", {"seconds": 0.3})
+        fast = fake_client.submit_tool("fake_echo", {"tag": "fast"})
+
+        assert _payload(fast.result(timeout=5)) == {"tag": "fast"}
+        assert not slow.done()
+        assert _payload(slow.result(timeout=5)) == {"slept": 0.3}
+
+    def test_call_tool_from_threads(self, fake_client):
+        """call_tool is safe to use from several threads."""
+        results = {}
+
+        def worker(i):
+            results[i] = _payload(fake_client.call_tool("fake_echo", {"i": i}))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results == {i: {"i": i} for i in range(10)}
+
+    def test_error_response_raises(self, fake_client):
+        """A JSON-RPC error fails only its own request."""
+        bad = fake_client.submit_tool("fake_error")
+        good = fake_client.submit_tool("fake_echo", {"ok": True})
+
+        with pytest.raises(MCPError) as exc:
+            bad.result(timeout=5)
+        assert exc.value.code == -32000
+        assert _payload(good.result(timeout=5)) == {"ok": True}
+
+    def test_server_exit_fails_pending(self, fake_client):
+        """Outstanding requests fail once the server goes away."""
+        future = fake_client.submit_tool("fake_sleep", {"seconds": 5})
+        fake_client.process.kill()
+
+        with pytest.raises(MCPError) as exc:
+            future.result(timeout=5)
+        assert "Server closed connection" in exc.value.message
+
+
+class TestDeadlines:
+    """Test per-request timeouts and cancellation."""
+
+    def test_timeout_returns_promptly(self, fake_client):
+        """A missed deadline raises -32001 at once and leaves nothing pending."""
+        start = time.monotonic()
+        with pytest.raises(MCPError) as exc:
+            fake_client.call_tool("fake_sleep", {"seconds": 1}, timeout=0.1)
+        assert exc.value.code == -32001
+        assert time.monotonic() - start < 0.5
+        assert fake_client.pending_requests == 0
+
+        # The late reply arrives while this call is in flight and is discarded
+        result = fake_client.call_tool("fake_sleep", {"seconds": 1.2})
+        assert _payload(result) == {"slept": 1.2}
+
+    def test_default_timeout(self):
+        """The client-wide default applies to calls without their own timeout."""
+        with MCPClient(FAKE_SERVER, default_timeout=10) as client:
+            client.initialize()
+            # Tightened after the handshake, which a loaded machine (e.g. under
+            # xdist) can take longer than 0.1s to complete
+            client.default_timeout = 0.1
+            with pytest.raises(MCPError) as exc:
+                client.call_tool("fake_sleep", {"seconds": 1})
+            assert exc.value.code == -32001
+            assert _payload(client.call_tool("fake_sleep", {"seconds": 0.5}, timeout=2)) == {"slept": 0.5}
+
+    def test_cancelled_notification_sent(self, tmp_path):
+        """The server is told which request was abandoned."""
+        path = str(tmp_path / "session.jsonl")
+        with MCPClient(FAKE_SERVER, record=path) as client:
+            client.initialize()
+            with pytest.raises(MCPError):
+                client.call_tool("fake_sleep", {"seconds": 1}, timeout=0.1)
+
+        _, entries = read_transcript(path)
+        call = next(e["req"] for e in entries if e["req"].get("method") == "tools/call")
+        cancelled = [e["req"] for e in entries if e["req"].get("method") == "notifications/cancelled"]
+        assert cancelled[0]["params"]["requestId"] == call["id"]
+
+    def test_cancel_future(self, fake_client):
+        """cancel() fails a submitted call with -32800; done calls are left alone."""
+        future = fake_client.submit_tool("fake_sleep", {"seconds": 1})
+        assert fake_client.cancel(future)
+        with pytest.raises(MCPError) as exc:
+            future.result()
+        assert exc.value.code == -32800
+
+        done = fake_client.submit_tool("fake_echo", {})
+        done.result()
+        assert not fake_client.cancel(done)
+
+    def test_stream_timeout(self, fake_client):
+        """A streaming call past its deadline raises after the events so far."""
+        events = []
+        with pytest.raises(MCPError) as exc:
+            for event in fake_client.call_tool_stream("fake_progress", {"steps": 5, "delay": 0.2}, timeout=0.5):
+                events.append(event)
+        assert exc.value.code == -32001
+        assert 1 <= len(events) < 5
+        assert fake_client.pending_requests == 0
+
+
+class TestMetrics:
+    """Test request instrumentation and exporters."""
+
+    @pytest.fixture
+    def metered(self):
+        metrics = ClientMetrics()
+        client = MCPClient(FAKE_SERVER, metrics=metrics)
+        client.initialize()
+        yield client, metrics
+        client.close()
+
+    def test_phase_timings_attribute_server_time(self, metered):
+        """A slow tool shows up as wait time, not client overhead."""
+        client, metrics = metered
+        events = []
+        metrics.add_hook(events.append)
+        client.call_tool("fake_sleep", {"seconds": 0.2})
+
+        event = events[-1]
+        assert (event["method"], event["tool"], event["error"]) == ("tools/call", "fake_sleep", None)
+        assert event["wait_ms"] >= 190
+        assert event["serialize_ms"] + event["write_ms"] + event["parse_ms"] < 50
+        assert event["bytes_out"] > 0 and event["bytes_in"] > 0
+
+    def test_counters_and_errors(self, metered):
+        """Requests are counted by tool, failures by error code, bytes both ways."""
+        client, metrics = metered
+        client.call_tool("fake_echo", {"x": 1})
+        client.call_tools_batch([("fake_echo", None), ("fake_error", None)], return_exceptions=True)
+        with pytest.raises(MCPError):
+            client.call_tool("fake_sleep", {"seconds": 1}, timeout=0.05)
+        client.call_tool("fake_notify", {"method": "notifications/message"})
+
+        snapshot = metrics.snapshot()
+        counts = {(r["method"], r["tool"]): r["count"] for r in snapshot["requests"]}
+        assert counts[("tools/call", "fake_echo")] == 2
+        assert counts[("initialize", "")] == 1
+        errors = {(e["tool"], e["code"]): e["count"] for e in snapshot["errors"]}
+        assert errors == {("fake_error", -32000): 1, ("fake_sleep", -32001): 1}
+        assert snapshot["notifications"] == {"notifications/message": 1}
+        assert snapshot["bytes"]["in"] > 0 and snapshot["bytes"]["out"] > 0
+        assert set(snapshot["phases"]["fake_echo"]) == set(PHASES)
+        assert json.loads(metrics.dump_json()) == snapshot
+
+    def test_prometheus_text(self, metered):
+        """The exporter emits counters and cumulative phase histograms."""
+        client, metrics = metered
+        client.call_tool("fake_echo", {})
+        text = metrics.prometheus_text()
+        assert 'mcp_client_requests_total{method="tools/call",tool="fake_echo"} 1' in text
+        assert "# TYPE mcp_client_request_phase_seconds histogram" in text
+        assert 'mcp_client_request_phase_seconds_count{phase="wait",tool="fake_echo"} 1' in text
+        assert 'mcp_client_request_phase_seconds_bucket{phase="wait",tool="fake_echo",le="+Inf"} 1' in text
+
+    def test_lifecycle_is_recorded(self):
+        """Spawn and close are timed per server alongside requests."""
+        metrics = ClientMetrics()
+        events = []
+        metrics.add_hook(events.append)
+        with MCPClient(FAKE_SERVER, metrics=metrics) as client:
+            client.initialize()
+        kinds = [e["event"] for e in events]
+        assert kinds[0] == "spawn" and kinds[-1] == "close"
+        assert all(e["server"] == "fake_server.py" for e in events)
+        assert set(metrics.snapshot()["lifecycle"]["fake_server.py"]) == {"spawn", "close"}
+
+    def test_phase_timer_attributes_tests(self, tmp_path):
+        """The --mcp-timing plugin splits each test into spawn/init/calls/close."""
+        metrics = ClientMetrics()
+        timer = PhaseTimer(metrics, str(tmp_path / "timing.json"))
+        timer.begin("test_a")
+        started = time.perf_counter()
+        with MCPClient(FAKE_SERVER, metrics=metrics) as client:
+            client.initialize()
+            client.call_tool("fake_sleep", {"seconds": 0.1})
+            client.call_tool("fake_echo", {})
+        # The real wall time, so the MCP phases always fit inside it
+        wall_ms = (time.perf_counter() - started) * 1000
+        timer.end("test_a", wall_ms)
+        timer.begin("test_b")
+        with MCPClient(FAKE_SERVER, metrics=metrics) as client:
+            client.initialize()
+        timer.end("test_b", 50.0)
+
+        other = PhaseTimer(ClientMetrics(), str(tmp_path / "other.json"))
+        other.merge(timer.data())
+        report = other.report()
+        assert list(report["tests"]) == ["test_a", "test_b"]
+        test = report["tests"]["test_a"]
+        assert test["calls_ms"] >= 100 and test["tools"]["fake_sleep"]["count"] == 1
+        assert test["spawn_ms"] > 0 and test["initialize_ms"] > 0 and test["close_ms"] > 0
+        mcp_ms = sum(test[phase] for phase in TEST_PHASES)
+        assert test["duration_ms"] == pytest.approx(wall_ms, abs=0.001)
+        assert test["non_mcp_ms"] == pytest.approx(test["duration_ms"] - mcp_ms, abs=0.01)
+        assert list(report["tools"])[0] == "fake_server.py:fake_sleep"
+        assert report["servers"]["fake_server.py"]["total_ms"] > 0
+        timer.detach()
+
+
+class TestStderr:
+    """Test background stderr draining."""
+
+    def test_chatty_server_does_not_stall(self):
+        """Megabytes of stderr neither block the server nor grow memory."""
+        with MCPClient(FAKE_SERVER, stderr_limit=4096) as client:
+            client.initialize()
+            result = client.call_tool("fake_log", {"lines": 20000, "width": 100})
+            assert _payload(result) == {"lines": 20000}
+
+            # Later lines may still be draining; wait until the last has arrived
+            last_line = "00019999 " + "x" * 91
+            deadline = time.monotonic() + 5
+            while not client.stderr_tail.text().endswith(last_line) and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert client.stderr_tail.text().endswith(last_line)
+            assert len(client.stderr_tail.text()) <= 4096
+            assert client.stderr_tail.total_chars == 20000 * 101
+
+    def test_unterminated_line_stays_bounded(self):
+        """A huge stderr line with no newline is held only up to the limit."""
+        lines = []
+        tail = StderrTail(limit=4096, on_line=lines.append)
+        for _ in range(256):
+            tail.feed(b"x" * StderrTail.CHUNK_SIZE)
+            assert len(tail._partial) < 4096
+        tail.feed("é".encode()[:1])
+        tail.feed("é".encode()[1:] + b"\nlast")
+        tail.flush()
+
+        assert len(tail.text()) <= 4096
+        assert tail.text().endswith("é\nlast")
+        assert sum(len(line) for line in lines) == 256 * StderrTail.CHUNK_SIZE + 1 + len("last")
+
+    def test_on_stderr_callback(self):
+        """Each stderr line is passed to the callback."""
+        lines = []
+        with MCPClient(FAKE_SERVER, on_stderr=lines.append) as client:
+            client.initialize()
+            client.call_tool("fake_log", {"lines": 3, "width": 12})
+            deadline = time.monotonic() + 5
+            while len(lines) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        assert lines == ["00000000 xxx", "00000001 xxx", "00000002 xxx"]
+
+    def test_error_includes_stderr_tail(self, fake_client):
+        """A server that dies reports its last stderr output."""
+        with pytest.raises(MCPError) as exc:
+            fake_client.call_tool("fake_exit", {"message": "fatal: token expired"})
+        assert "fatal: token expired" in exc.value.message
+
+
+class TestTransport:
+    """Test bytes-level framing and codecs."""
+
+    def test_framer_joins_split_lines(self):
+        """Lines split across reads are reassembled; blank lines are dropped."""
+        framer = LineFramer()
+        assert framer.feed(b'{"a":') == []
+        assert framer.feed(b'1}\n\n{"b"') == [b'{"a":1}']
+        assert framer.feed(b":2}\n") == [b'{"b":2}']
+        assert framer.pending() == 0
+
+    @pytest.mark.parametrize("name", available_codecs())
+    def test_codec_round_trip(self, name):
+        """Every installed codec round-trips a message."""
+        codec = get_codec(name)
+        message = {"jsonrpc": "2.0", "id": 7, "result": {"text": "naïve ✓"}}
+        assert codec.loads(codec.dumps(message)) == message
+        with pytest.raises(codec.decode_errors):
+            codec.loads(b"not json")
+
+    def test_unknown_codec(self):
+        """An unknown codec name is rejected."""
+        with pytest.raises(ValueError):
+            get_codec("yaml")
+
+    @pytest.mark.parametrize("name", available_codecs())
+    def test_client_with_codec(self, name):
+        """The client works end to end with each installed codec."""
+        with MCPClient(FAKE_SERVER, codec=name) as client:
+            client.initialize()
+            assert client.codec.name == name
+            big = "x" * (2 * 1024 * 1024)
+            assert _payload(client.call_tool("fake_echo", {"big": big})) == {"big": big}
+
+
+class TestRecordReplay:
+    """Test session transcripts and the replay server."""
+
+    @pytest.fixture
+    def transcript(self, tmp_path):
+        path = str(tmp_path / "session.jsonl.gz")
+        with MCPClient(FAKE_SERVER, record=path) as client:
+            client.initialize()
+            client.list_tools()
+            client.call_tool("fake_echo", {"n": 1})
+            client.call_tool("fake_echo", {"n": 2})
+            client.call_tool("fake_sleep", {"seconds": 0.3})
+            with pytest.raises(MCPError):
+                client.call_tool("fake_error")
+        return path
+
+    def test_transcript_contents(self, transcript):
+        """Every exchange is recorded with its timing."""
+        header, entries = read_transcript(transcript)
+        assert header["command"] == FAKE_SERVER
+
+        methods = [e["req"]["method"] for e in entries]
+        assert methods.count("tools/call") == 4
+        assert "notifications/initialized" in methods
+
+        sleep = next(e for e in entries if e["req"].get("params", {}).get("name") == "fake_sleep")
+        assert sleep["dt"] >= 0.3
+        assert "result" in sleep["res"]
+
+    def test_replay_matches_by_params(self, transcript):
+        """Replayed responses match the request params, not just the order."""
+        with MCPClient(REPLAY_SERVER + [transcript, "--speed", "fast"]) as client:
+            assert client.initialize()["serverInfo"]["name"] == "fake"
+            assert {t["name"] for t in client.list_tools()} >= {"fake_echo"}
+            assert _payload(client.call_tool("fake_echo", {"n": 2})) == {"n": 2}
+            assert _payload(client.call_tool("fake_echo", {"n": 1})) == {"n": 1}
+            with pytest.raises(MCPError) as exc:
+                client.call_tool("fake_error")
+            assert exc.value.code == -32000
+
+    def test_replay_speed(self, transcript):
+        """Recorded latency is reproduced at real speed and skipped when fast."""
+        for speed, check in (("real", lambda s: s >= 0.3), ("fast", lambda s: s < 0.2)):
+            with MCPClient(REPLAY_SERVER + [transcript, "--speed", speed]) as client:
+                client.initialize()
+                start = time.monotonic()
+                client.call_tool("fake_sleep", {"seconds": 0.3})
+                assert check(time.monotonic() - start), speed
+
+    def test_replay_unrecorded_call(self, transcript):
+        """A call that was never recorded gets a JSON-RPC error."""
+        with MCPClient(REPLAY_SERVER + [transcript, "--speed", "fast"]) as client:
+            client.initialize()
+            with pytest.raises(MCPError) as exc:
+                client.call_tool("fake_log", {"lines": 1})
+            assert "No recorded response" in exc.value.message
+
+
+class TestBatch:
+    """Test JSON-RPC batch calls."""
+
+    def test_batch_results_in_order(self, fake_client):
+        """Batch results come back in call order, matched by id."""
+        calls = [("fake_sleep", {"seconds": 0.2}), ("fake_echo", {"n": 1}), ("fake_echo", {"n": 2})]
+        results = fake_client.call_tools_batch(calls)
+
+        assert [_payload(r) for r in results] == [{"slept": 0.2}, {"n": 1}, {"n": 2}]
+        assert fake_client._batch_supported is True
+
+    def test_batch_error_raises(self, fake_client):
+        """A failed call in a batch raises unless return_exceptions is set."""
+        calls = [("fake_echo", {"n": 1}), ("fake_error", None)]
+
+        with pytest.raises(MCPError):
+            fake_client.call_tools_batch(calls)
+
+        results = fake_client.call_tools_batch(calls, return_exceptions=True)
+        assert _payload(results[0]) == {"n": 1}
+        assert isinstance(results[1], MCPError)
+
+    def test_batch_falls_back_when_rejected(self):
+        """Servers that reject batches get pipelined single requests."""
+        with MCPClient(FAKE_SERVER + ["--no-batch"]) as client:
+            client.initialize()
+            results = client.call_tools_batch([("fake_echo", {"n": i}) for i in range(5)])
+
+            assert client._batch_supported is False
+            assert [_payload(r) for r in results] == [{"n": i} for i in range(5)]
+
+    def test_empty_batch(self, fake_client):
+        """An empty batch sends nothing."""
+        assert fake_client.call_tools_batch([]) == []
+
+
+class TestNotifications:
+    """Test notification routing, progress and streaming."""
+
+    def test_subscribers_receive_notifications(self, fake_client):
+        """Subscribers get their method; "*" gets everything; unsubscribe stops delivery."""
+        logs, everything = [], []
+        unsubscribe = fake_client.subscribe("notifications/message", logs.append)
+        fake_client.subscribe("*", everything.append)
+
+        fake_client.call_tool("fake_notify", {"method": "notifications/message", "params": {"data": "hi"}})
+        fake_client.call_tool("fake_notify", {"method": "notifications/other"})
+        unsubscribe()
+        fake_client.call_tool("fake_notify", {"method": "notifications/message"})
+
+        assert [m["params"] for m in logs] == [{"data": "hi"}]
+        assert [m["method"] for m in everything] == ["notifications/message", "notifications/other", "notifications/message"]
+
+    def test_failing_subscriber_is_isolated(self, fake_client):
+        """An exception in a subscriber does not break the connection."""
+        fake_client.subscribe("*", lambda message: 1 / 0)
+        fake_client.call_tool("fake_notify", {"method": "notifications/message"})
+        fake_client.ping(timeout=2)
+
+    def test_server_requests_are_answered(self, fake_client):
+        """Server-initiated ping is answered; unknown requests get -32601."""
+        reply = _payload(fake_client.call_tool("fake_notify", {"method": "ping", "request": True}))
+        assert reply["result"] == {}
+        reply = _payload(fake_client.call_tool("fake_notify", {"method": "roots/list", "request": True}))
+        assert reply["error"]["code"] == -32601
+
+    def test_on_progress(self, fake_client):
+        """submit_tool(on_progress=...) receives this call's progress updates."""
+        updates = []
+        fake_client.submit_tool("fake_progress", {"steps": 3}, on_progress=updates.append).result()
+        assert [u["progress"] for u in updates] == [1, 2, 3]
+        assert fake_client._progress == {}
+
+    def test_call_tool_stream(self, fake_client):
+        """Events arrive before the call completes, then the result comes last."""
+        stream = fake_client.call_tool_stream("fake_progress", {"steps": 3, "delay": 0.2, "partial": True})
+        start = time.monotonic()
+        first = next(stream)
+        assert time.monotonic() - start < 0.5
+        assert first["type"] == "partial"
+        assert first["content"][0]["text"] == "chunk 1"
+
+        rest = list(stream)
+        assert [e["type"] for e in rest] == ["partial", "partial", "result"]
+        assert _payload(rest[-1]["result"]) == {"steps": 3}
+
+    def test_call_tool_stream_error(self, fake_client):
+        """A failed call raises after any events already yielded."""
+        with pytest.raises(MCPError):
+            list(fake_client.call_tool_stream("fake_error"))
+
+
+class TestToolsCache:
+    """Test tools/list caching and listChanged invalidation."""
+
+    def _list_changed(self, client):
+        client.call_tool("fake_notify", {"method": "notifications/tools/list_changed"})
+
+    def test_catalog_kept_for_session(self, fake_client):
+        """A listChanged server's catalog is fetched once per process."""
+        tools = fake_client.list_tools()
+        sent = fake_client._request_id
+        assert fake_client.list_tools() == tools
+        assert fake_client._request_id == sent
+        fake_client.list_tools(refresh=True)
+        assert fake_client._request_id == sent + 1
+
+    def test_catalog_persisted_across_processes(self, tmp_path):
+        """A second process for the same binary reads tools from disk."""
+        cache = ToolsCache(str(tmp_path))
+        with MCPClient(FAKE_SERVER, tools_cache=cache) as first:
+            first.initialize()
+            tools = first.list_tools()
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+        with MCPClient(FAKE_SERVER, tools_cache=cache) as second:
+            second.initialize()
+            sent = second._request_id
+            assert second.list_tools() == tools
+            assert second._request_id == sent
+
+    def test_list_changed_invalidates(self, tmp_path):
+        """notifications/tools/list_changed drops the memory and disk copies."""
+        cache = ToolsCache(str(tmp_path))
+        with MCPClient(FAKE_SERVER, tools_cache=cache) as client:
+            client.initialize()
+            client.list_tools()
+            # The notification is written before the tool's reply, so it has
+            # been handled once call_tool returns
+            self._list_changed(client)
+            assert list(tmp_path.glob("*.json")) == []
+
+            sent = client._request_id
+            client.list_tools()
+            assert client._request_id == sent + 1
+            assert len(list(tmp_path.glob("*.json"))) == 1
+
+    def test_key_tracks_server_version(self, tmp_path):
+        """Another server version gets its own entry."""
+        cache = ToolsCache(str(tmp_path))
+        old = cache.key(FAKE_SERVER, {"name": "fake", "version": "0.0.1"})
+        new = cache.key(FAKE_SERVER, {"name": "fake", "version": "0.0.2"})
+        assert old != new
+
+
+class TestArgumentValidation:
+    """Test client-side inputSchema validation."""
+
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "pattern": {"type": "string", "minLength": 1},
+            "limit": {"type": "integer", "minimum": 1},
+            "active": {"type": "boolean"},
+            "state": {"enum": ["open", "closed"]},
+            "tags": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["pattern"],
+        "additionalProperties": False,
+    }
+
+    @pytest.mark.parametrize("arguments, path", [
+        ({}, "pattern"),
+        ({"pattern": ""}, "pattern"),
+        ({"pattern": "go", "limit": "5"}, "limit"),
+        ({"pattern": "go", "limit": 0}, "limit"),
+        ({"pattern": "go", "state": "new"}, "state"),
+        ({"pattern": "go", "tags": ["a", 1]}, "tags[1]"),
+        ({"pattern": "go", "extra": 1}, "extra"),
+    ])
+    def test_strict_rejects(self, arguments, path):
+        """Mismatches raise SchemaError naming the offending path."""
+        validate = compile_schema(self.SCHEMA)
+        with pytest.raises(SchemaError) as exc:
+            validate(arguments)
+        assert exc.value.path == path
+
+    def test_coerce_converts(self):
+        """Coercion converts unambiguous scalars and still rejects the rest."""
+        validate = compile_schema(self.SCHEMA, coerce=True)
+        assert validate({"pattern": 7, "limit": "5", "active": "true", "tags": "x"}) == {
+            "pattern": "7", "limit": 5, "active": True, "tags": ["x"],
+        }
+        with pytest.raises(SchemaError):
+            validate({"pattern": "go", "limit": "many"})
+
+    def test_ecma_only_pattern_left_to_server(self):
+        """A pattern Python's re rejects is skipped; other constraints still apply."""
+        validate = compile_schema({
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "pattern": "^\\p{L}+$", "maxLength": 3},
+                "key": {"type": "string", "pattern": "(?<k>[a-z]+)"},
+            },
+        })
+        assert validate({"name": "abc", "key": "!"}) == {"name": "abc", "key": "!"}
+        with pytest.raises(SchemaError):
+            validate({"name": "abcd"})
+
+    def test_bad_arguments_not_sent(self, fake_client):
+        """After list_tools, bad arguments fail locally with -32602."""
+        fake_client.list_tools()
+        sent = fake_client._request_id
+        with pytest.raises(MCPError) as exc:
+            fake_client.call_tool("fake_sleep", {"seconds": "soon"})
+        assert exc.value.code == -32602
+        assert exc.value.data == {"tool": "fake_sleep", "path": "seconds"}
+        assert fake_client._request_id == sent
+
+    def test_passthrough(self, fake_client):
+        """validate=False sends arguments as given, for the server to judge."""
+        fake_client.list_tools()
+        with pytest.raises(MCPError):
+            fake_client.call_tool("fake_sleep", {"seconds": "0"})
+        result = fake_client.call_tool("fake_sleep", {"seconds": "0"}, validate=False)
+        assert _payload(result) == {"slept": "0"}
+
+    def test_coerce_mode_client(self):
+        """A coercing client fixes arguments before sending them."""
+        with MCPClient(FAKE_SERVER, validation="coerce") as client:
+            client.initialize()
+            client.list_tools()
+            assert _payload(client.call_tool("fake_sleep", {"seconds": "0"})) == {"slept": 0}
+
+
+class TestPaging:
+    """Test iter_records over offset/limit query tools."""
+
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_iter_records_pages_until_empty(self, fake_client, prefetch):
+        """Every record is yielded once, in order, across pages."""
+        records = fake_client.iter_records("fake_records", {"count": 23}, page_size=5, prefetch=prefetch)
+        assert [r["name"] for r in records] == [f"ci-{i}" for i in range(23)]
+
+    def test_iter_records_server_caps_page_size(self, fake_client):
+        """A server capping limit below page_size gives short pages, not an early stop."""
+        records = fake_client.iter_records("fake_records", {"count": 23, "max_limit": 3}, page_size=5)
+        assert [r["name"] for r in records] == [f"ci-{i}" for i in range(23)]
+
+    def test_iter_records_offset_and_limit(self, fake_client):
+        """offset is the starting record; limit caps the total yielded."""
+        records = list(fake_client.iter_records("fake_records", {"count": 100, "offset": 10, "limit": 12}, page_size=5))
+        assert [r["name"] for r in records] == [f"ci-{i}" for i in range(10, 22)]
+
+    def test_iter_records_prefetches_next_page(self, fake_client):
+        """The next page is already requested when the first record is yielded."""
+        sent = fake_client._request_id
+        records = fake_client.iter_records("fake_records", {"count": 10}, page_size=5)
+        next(records)
+        assert fake_client._request_id == sent + 2
+        assert len(list(records)) == 9
+
+    def test_iter_records_tool_error(self, fake_client):
+        """A failing page raises instead of ending the iteration early."""
+        with pytest.raises(MCPError):
+            list(fake_client.iter_records("fake_error"))
+
+
+class TestServerPool:
+    """Test the warm server pool."""
+
+    @pytest.fixture
+    def pool(self):
+        pool = ServerPool({"fake": {"command": FAKE_SERVER, "env": None}})
+        yield pool
+        pool.close()
+
+    def test_released_client_is_reused(self, pool):
+        """A returned client is handed out again without a new spawn."""
+        first = pool.acquire("fake")
+        pid = first.process.pid
+        pool.release(first)
+
+        second = pool.acquire("fake")
+        assert second.process.pid == pid
+        assert (pool.spawned, pool.reused) == (1, 1)
+        # Already initialized; no second handshake needed
+        assert second.initialize()["serverInfo"]["name"] == "fake"
+        pool.release(second)
+
+    def test_validators_ready_at_spawn(self, pool):
+        """A validating pool's clients check arguments before any list_tools()."""
+        client = pool.acquire("fake")
+        sent = client._request_id
+        with pytest.raises(MCPError) as exc:
+            client.call_tool("fake_sleep", {"seconds": "soon"})
+        assert exc.value.code == -32602
+        assert client._request_id == sent
+        pool.release(client)
+
+    @pytest.mark.parametrize("flag", ["--no-batch", "--drop-batch"])
+    def test_client_reused_after_failed_batch_probe(self, flag, monkeypatch):
+        """A rejected or unanswered batch probe leaves no request pending."""
+        monkeypatch.setattr(MCPClient, "BATCH_PROBE_TIMEOUT", 0.2)
+        pool = ServerPool({"fake": {"command": FAKE_SERVER + [flag], "env": None}})
+        try:
+            client = pool.acquire("fake")
+            results = client.call_tools_batch([("fake_echo", {"n": 1})])
+            assert client._batch_supported is False
+            assert _payload(results[0]) == {"n": 1}
+            assert client.pending_requests == 0
+            pool.release(client)
+
+            assert pool.acquire("fake") is client
+            assert pool.reused == 1
+            pool.release(client)
+        finally:
+            pool.close()
+
+    def test_dirty_client_is_recycled(self, pool):
+        """A client released as dirty is closed, not reused."""
+        first = pool.acquire("fake")
+        pid = first.process.pid
+        pool.recycle(first)
+
+        second = pool.acquire("fake")
+        assert second.process.pid != pid
+        assert first.process.poll() is not None
+        pool.release(second)
+
+    def test_dead_client_replaced_on_acquire(self, pool):
+        """The health check replaces an idle client whose server died."""
+        first = pool.acquire("fake")
+        pool.release(first)
+        first.process.kill()
+        first.process.wait()
+
+        second = pool.acquire("fake")
+        assert second is not first
+        second.ping(timeout=2)
+        pool.release(second)
+
+    def test_prefork_keeps_spares_ready(self, pool):
+        """Preforked spares are initialized in the background and topped up."""
+        pool.prefork("fake", 2)
+        assert pool.wait_for_spares(timeout=10)
+        assert pool.spawned == 2
+
+        client = pool.acquire("fake")
+        assert pool.reused == 1
+        assert pool.wait_for_spares(timeout=10)
+        # The spare handed out was replaced
+        assert pool.spawned == 3
+        pool.recycle(client)
+
+    def test_clients_keyed_by_cwd(self, pool, tmp_path):
+        """A client rooted in one directory is not handed out for another."""
+        rooted = pool.acquire("fake", cwd=tmp_path)
+        pool.release(rooted)
+
+        default = pool.acquire("fake")
+        assert default is not rooted
+        again = pool.acquire("fake", cwd=tmp_path)
+        assert again is rooted
+        pool.release(default)
+        pool.release(again)
+
+    def test_client_with_pending_requests_not_reused(self, pool):
+        """A client returned mid-request is recycled so no reply leaks."""
+        client = pool.acquire("fake")
+        client.submit_tool("fake_sleep", {"seconds": 2})
+        pool.release(client)
+
+        other = pool.acquire("fake")
+        assert other is not client
+        pool.release(other)
+
+
+class TestAsyncClient:
+    """Test the asyncio-native client."""
+
+    def test_initialize_and_list_tools(self):
+        """Handshake and tools/list work over asyncio pipes."""
+        async def run():
+            async with await AsyncMCPClient.start(FAKE_SERVER) as client:
+                result = await client.initialize()
+                tools = await client.list_tools()
+            return result, tools
+
+        result, tools = asyncio.run(run())
+        assert result["serverInfo"]["name"] == "fake"
+        assert {t["name"] for t in tools} >= {"fake_echo", "fake_sleep"}
+
+    def test_gather_overlaps_calls(self):
+        """asyncio.gather runs calls concurrently over one connection."""
+        async def run():
+            async with await AsyncMCPClient.start(FAKE_SERVER) as client:
+                await client.initialize()
+                start = time.monotonic()
+                results = await asyncio.gather(*(
+                    client.call_tool("fake_sleep", {"seconds": 0.3}) for _ in range(5)
+                ))
+                return results, time.monotonic() - start
+
+        results, elapsed = asyncio.run(run())
+        assert len(results) == 5
+        assert elapsed < 1.0, f"5 x 0.3s calls took {elapsed:.2f}s; expected overlap"
+
+    def test_call_deadline(self):
+        """A call past its deadline raises MCPError and the session stays usable."""
+        async def run():
+            async with await AsyncMCPClient.start(FAKE_SERVER) as client:
+                await client.initialize()
+                with pytest.raises(MCPError) as exc:
+                    await client.call_tool("fake_sleep", {"seconds": 2}, timeout=0.1)
+                after = await client.call_tool("fake_echo", {"after": True})
+                return exc.value, after
+
+        error, after = asyncio.run(run())
+        assert error.code == -32001
+        assert _payload(after) == {"after": True}
+
+    def test_error_mapping_matches_sync_client(self):
+        """JSON-RPC errors map to the same MCPError as MCPClient."""
+        async def run():
+            async with await AsyncMCPClient.start(FAKE_SERVER) as client:
+                await client.initialize()
+                with pytest.raises(MCPError) as exc:
+                    await client.call_tool("fake_error")
+                return exc.value
+
+        error = asyncio.run(run())
+        assert (error.code, error.message) == (-32000, "fake failure")
+
+    def test_oversized_line_fails_pending(self):
+        """A reply over the line limit fails pending calls and closes the client."""
+        class SmallLimit(AsyncMCPClient):
+            STREAM_LIMIT = 1024
+
+        async def run():
+            async with await SmallLimit.start(FAKE_SERVER) as client:
+                await client.initialize()
+                with pytest.raises(MCPError) as exc:
+                    await client.call_tool("fake_echo", {"text": "x" * 4096}, timeout=5)
+                with pytest.raises(MCPError) as after:
+                    await client.call_tool("fake_echo", {"after": True}, timeout=5)
+                return exc.value, after.value
+
+        error, after = asyncio.run(run())
+        assert error.code == -32603
+        assert "line limit" in error.message
+        assert after is error
+
+
+class TestBench:
+    """Test the bench subcommand."""
+
+    def test_percentile_interpolates(self):
+        """Percentiles interpolate between samples."""
+        values = [float(v) for v in range(1, 101)]
+        assert mcp_bench.percentile(values, 50) == pytest.approx(50.5)
+        assert mcp_bench.percentile(values, 99) == pytest.approx(99.01)
+        assert mcp_bench.percentile([], 95) == 0.0
+
+    def test_bad_list_option_names_itself(self, capsys):
+        """A bad --sizes or --concurrency value is reported against that option."""
+        for option in ("--sizes", "--concurrency"):
+            with pytest.raises(SystemExit):
+                mcp_bench.main([option, "0", "--codecs"])
+            assert f"argument {option}: {option} values must be >= 1" in capsys.readouterr().err
+
+    def test_run_bench_report(self, tmp_path):
+        """A bench run reports startup, per-tool latency and throughput."""
+        scenario_path = tmp_path / "scenario.json"
+        scenario_path.write_text(json.dumps({"calls": [
+            {"tool": "fake_echo", "arguments": {"x": 1}, "repeat": 2},
+            {"tool": "fake_error"},
+        ]}))
+        scenario = mcp_bench.load_scenario(str(scenario_path))
+
+        report = mcp_bench.run_bench(FAKE_SERVER, scenario, [1, 4], iterations=5)
+
+        assert report["server"]["name"] == "fake"
+        assert report["initialize_ms"] > 0
+        assert [run["concurrency"] for run in report["runs"]] == [1, 4]
+        run = report["runs"][1]
+        assert run["calls"] == 15
+        assert run["tools"]["fake_echo"]["count"] == 10
+        assert run["tools"]["fake_error"]["errors"] == 5
+        assert "p99_ms" in run["tools"]["fake_echo"]
+        assert "after_initialize_kb" in report["rss"]
+        assert "Concurrency 4" in mcp_bench.format_report(report)
+
+    def test_startup_profile(self):
+        """The startup profile splits cold start into phases and times warm acquire."""
+        report = mcp_bench.run_startup_profile(FAKE_SERVER, runs=2, spares=1)
+
+        cold = report["cold"]
+        assert all(cold[phase]["count"] == 2 for phase in mcp_bench.STARTUP_PHASES)
+        sample = report["samples"][0]
+        assert sample["exec_ms"] <= sample["first_byte_ms"] <= sample["initialize_ms"] <= sample["ready_ms"]
+        assert report["warm_acquire"]["count"] == 2
+        assert "warm acquire" in mcp_bench.format_startup_report(report)
+
+    def test_codec_bench_report(self):
+        """The codec benchmark compares each codec to the text-mode baseline."""
+        report = mcp_bench.run_codec_bench([1024], min_bytes=1024)
+        codecs = report["sizes"][0]["codecs"]
+        assert set(codecs) == {"text+json", *available_codecs()}
+        assert all(stats["decode_us"] > 0 for stats in codecs.values())
+        assert "vs baseline" in mcp_bench.format_codec_report(report)
+
+
+class TestLatencyBudgets:
+    """Test the latency budget check and refresh behind --mcp-latency."""
+
+    def test_regressions_against_budget(self):
+        """A percentile fails only beyond baseline * (1 + tolerance) + slack."""
+        entry = {"server": "fake", "tool": "fake_sleep", "p50_ms": 10.0, "p95_ms": 20.0}
+        within = {"count": 50, "p50_ms": 15.5, "p95_ms": 31.0, "p99_ms": 90.0}
+        over = {"count": 50, "p50_ms": 16.5, "p95_ms": 31.0, "p99_ms": 90.0}
+
+        assert mcp_latency.regressions(within, entry, tolerance=0.5, slack_ms=1.0) == []
+        failures = mcp_latency.regressions(over, entry, tolerance=0.5, slack_ms=1.0)
+        assert len(failures) == 1 and failures[0].startswith("fake_sleep p50 16.50ms exceeds budget 10.00ms")
+
+    def test_measure_summarizes_calls(self, fake_client):
+        """measure() times `repeat` calls after the warmup."""
+        stats = mcp_latency.measure(fake_client, "fake_echo", {}, repeat=5, warmup=1)
+        assert stats["count"] == 5
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"]
+
+    def test_latency_baselines_refresh(self, tmp_path):
+        """Refresh rewrites measured budgets and keeps entries that were not run."""
+        path = str(tmp_path / "baselines.json")
+        baselines = {"tolerance": 0.25, "tools": [
+            {"server": "fake", "tool": "fake_echo", "p95_ms": 50.0},
+            {"server": "fake", "id": "echo-big", "tool": "fake_echo"},
+            {"server": "other", "tool": "other_tool", "p50_ms": 7.0},
+        ]}
+        mcp_latency.write_baselines(baselines, path)
+        measured = {"fake": {
+            "fake_echo": {"count": 3, "p50_ms": 0.5, "p95_ms": 0.9, "p99_ms": 1.0},
+            "echo-big": {"count": 3, "p50_ms": 2.0, "p95_ms": 3.0, "p99_ms": 4.0},
+        }}
+        mcp_latency.write_baselines(mcp_latency.refreshed(mcp_latency.load_baselines(path), measured), path)
+
+        tools = mcp_latency.load_baselines(path)["tools"]
+        assert tools[0] == {"server": "fake", "tool": "fake_echo", "p95_ms": 0.9}
+        assert (tools[1]["p50_ms"], tools[1]["p95_ms"]) == (2.0, 3.0)
+        assert tools[2]["p50_ms"] == 7.0
+        assert mcp_latency.setting(mcp_latency.load_baselines(path), tools[0], "tolerance") == 0.25
+        assert mcp_latency.setting({}, tools[0], "repeat") == mcp_latency.DEFAULTS["repeat"]
+
+
+class TestSharding:
+    """Test duration-balanced --shard splitting."""
+
+    def test_shards_balance_recorded_duration(self):
+        """Slow tests are spread out instead of following file order."""
+        nodeids = [f"test_servicenow.py::test_{i}" for i in range(4)] + [f"test_gitignore.py::test_{i}" for i in range(8)]
+        durations = {n: 10.0 for n in nodeids[:4]}
+        durations.update({n: 0.5 for n in nodeids[4:]})
+
+        shards = mcp_durations.split(nodeids, durations, 2)
+        totals = [sum(durations[n] for n in shard) for shard in shards]
+        assert totals == [22.0, 22.0]
+        assert sorted(n for shard in shards for n in shard) == sorted(nodeids)
+        assert all(shard == sorted(shard, key=nodeids.index) for shard in shards)
+
+    def test_tests_without_history_spread_evenly(self):
+        """Unknown tests deal out round-robin and the split is deterministic."""
+        nodeids = [f"t::{i}" for i in range(7)]
+        shards = mcp_durations.split(nodeids, {}, 3)
+        assert [len(shard) for shard in shards] == [3, 2, 2]
+        assert shards == mcp_durations.split(nodeids, {}, 3)
+
+    def test_parse_shard_and_merge(self, tmp_path):
+        """i/N is validated; recorded files merge with newer values winning."""
+        assert mcp_durations.parse_shard("2/4") == (2, 4)
+        for bad in ("0/4", "5/4", "1", "a/b"):
+            with pytest.raises(ValueError):
+                mcp_durations.parse_shard(bad)
+
+        path = str(tmp_path / "durations.json")
+        mcp_durations.update(path, {"a": 1.0, "b": 2.0})
+        mcp_durations.update(path, {"b": 3.0})
+        assert mcp_durations.load(path) == {"a": 1.0, "b": 3.0}
+        assert mcp_durations.load(str(tmp_path / "missing.json")) == {}
+
@@ -8,6 +8,10 @@ Requires environment variables:
 
 Authentication:
     Uses browser-based SSO - a browser window will open for authentication.
+
+Offline:
+    pytest test_servicenow.py --snow-standin
+    runs against a local Table API stand-in (snow_standin.py) instead.
 """
 
 import json
@@ -38,7 +42,7 @@ class TestServiceNowProtocol:
     def test_tools_list(self, servicenow_client):
         """Server returns list of available tools."""
         servicenow_client.initialize()
-        tools = servicenow_client.list_tools()
+        tools = servicenow_client.list_tools(refresh=True)
 
         assert isinstance(tools, list)
         assert len(tools) > 0
@@ -52,7 +56,7 @@ class TestServiceNowProtocol:
     def test_expected_tools_present(self, servicenow_client):
         """All expected tools are available."""
         servicenow_client.initialize()
-        tools = servicenow_client.list_tools()
+        tools = servicenow_client.list_tools(refresh=True)
         tool_names = {t["name"] for t in tools}
 
         expected_tools = {
@@ -77,7 +81,7 @@ class TestServiceNowProtocol:
     def test_tool_has_input_schema(self, servicenow_client):
         """Each tool has an inputSchema."""
         servicenow_client.initialize()
-        tools = servicenow_client.list_tools()
+        tools = servicenow_client.list_tools(refresh=True)
 
         for tool in tools:
             assert "inputSchema" in tool, f"Tool {tool['name']} missing inputSchema"
@@ -328,13 +332,14 @@ class TestServiceNowIntegration:
     """Integration tests that hit real ServiceNow instance."""
 
     @pytest.mark.timeout(900)  # 15 minute timeout for SSO authentication
-    def test_query_business_applications(self, servicenow_client):
+    @pytest.mark.dirties_server  # snow_configure switches the server's instance
+    def test_query_business_applications(self, servicenow_client, servicenow_instance):
         """Query business applications from jmfe.service-now.com - must return data."""
         servicenow_client.initialize()
 
-        # Configure to use jmfe instance
+        # Configure to use jmfe instance (or the offline stand-in)
         config_result = servicenow_client.call_tool("snow_configure", {
-            "instance": "jmfe.service-now.com"
+            "instance": servicenow_instance
         })
         assert "content" in config_result
 
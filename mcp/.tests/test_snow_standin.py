@@ -0,0 +1,110 @@
+"""
+Tests for the offline ServiceNow Table API stand-in.
+
+Run with: pytest test_snow_standin.py -v
+"""
+
+import json
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+import pytest
+
+from snow_standin import SnowStandIn, compile_query
+
+
+def _get(standin, path, **params):
+    url = f"{standin.url}{path}"
+    if params:
+        url += "?" + urlencode(params)
+    with urllib.request.urlopen(url) as response:
+        return json.load(response), dict(response.headers)
+
+
+@pytest.fixture
+def standin():
+    with SnowStandIn(max_page_size=4, generate={"cmdb_ci_server": 30}) as snow:
+        yield snow
+
+
+class TestEncodedQuery:
+    """Test encoded query compilation."""
+
+    @pytest.mark.parametrize("query, record, expected", [
+        ("u_lob=SET", {"u_lob": "SET"}, True),
+        ("u_lob!=SET", {"u_lob": "SET"}, False),
+        ("nameLIKEprod", {"name": "lnx-PROD-1"}, True),
+        ("stateIN1,2,3", {"state": "2"}, True),
+        ("stateNOT IN1,2", {"state": "2"}, False),
+        ("ownerISEMPTY", {"owner": ""}, True),
+        ("priority>=2", {"priority": "10"}, True),
+        ("u_lob=SET^operational_status!=7", {"u_lob": "SET", "operational_status": "7"}, False),
+        ("u_lob=OPS^ORu_lob=SET", {"u_lob": "SET"}, True),
+        ("123TEXTQUERY321=password reset", {"text": "Reset your Password"}, True),
+    ])
+    def test_operators(self, query, record, expected):
+        predicate, _ = compile_query(query)
+        assert predicate(record) is expected
+
+    def test_ordering(self):
+        _, ordering = compile_query("active=true^ORDERBYDESCsys_updated_on^ORDERBYname")
+        assert ordering == [("sys_updated_on", True), ("name", False)]
+
+
+class TestTableAPI:
+    """Test the HTTP Table API surface."""
+
+    def test_paging_with_total_count(self, standin):
+        """sysparm_limit is capped and pages advance by offset."""
+        body, headers = _get(standin, "/api/now/table/cmdb_ci_server", sysparm_limit=100)
+        assert len(body["result"]) == 4
+        assert headers["X-Total-Count"] == "30"
+        assert 'rel="next"' in headers["Link"]
+
+        seen = []
+        for offset in range(0, 30, 4):
+            page, _ = _get(standin, "/api/now/table/cmdb_ci_server", sysparm_offset=offset, sysparm_limit=4)
+            seen.extend(r["sys_id"] for r in page["result"])
+        assert len(seen) == len(set(seen)) == 30
+
+    def test_fields_and_query(self, standin):
+        """sysparm_fields trims records; sysparm_query filters them."""
+        body, headers = _get(
+            standin, "/api/now/table/cmdb_ci_business_app",
+            sysparm_query="business_criticality=1 - most critical", sysparm_fields="name,u_lob",
+        )
+        assert int(headers["X-Total-Count"]) == 3
+        assert all(set(r) == {"name", "u_lob"} for r in body["result"])
+
+    def test_get_record(self, standin):
+        """A record is fetched by sys_id; unknown ids are 404."""
+        users, _ = _get(standin, "/api/now/table/sys_user", sysparm_query="user_name=jdoe")
+        sys_id = users["result"][0]["sys_id"]
+
+        body, _ = _get(standin, f"/api/now/table/sys_user/{sys_id}")
+        assert body["result"]["name"] == "Jane Doe"
+
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(standin, "/api/now/table/sys_user/missing")
+        assert exc.value.code == 404
+
+    def test_invalid_table(self, standin):
+        """Unknown tables are rejected the way ServiceNow does."""
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(standin, "/api/now/table/invalid_class_xyz")
+        assert exc.value.code == 400
+        assert "Invalid table" in json.load(exc.value)["error"]["message"]
+
+    def test_cmdb_ci_spans_classes(self, standin):
+        """cmdb_ci returns every CI class."""
+        _, headers = _get(standin, "/api/now/table/cmdb_ci", sysparm_limit=1)
+        assert int(headers["X-Total-Count"]) == 30 + len(standin.tables["cmdb_ci_business_app"])
+
+    def test_latency(self):
+        """Configured latency is added to every response."""
+        with SnowStandIn(latency=0.2) as snow:
+            start = time.monotonic()
+            _get(snow, "/api/now/table/incident", sysparm_limit=1)
+            assert time.monotonic() - start >= 0.2
@@ -0,0 +1,193 @@
+"""
+Tests for validate.py, run against the fixture tree in fixtures/clean.
+
+Each broken case copies the clean tree and breaks one check.
+
+Run from the repository root:
+    python3 -m pytest personas/tests
+"""
+
+import importlib.util
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(os.path.dirname(TESTS_DIR), "validate.py")
+CLEAN = os.path.join(TESTS_DIR, "fixtures", "clean")
+
+_spec = importlib.util.spec_from_file_location("validate", SCRIPT)
+validate = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(validate)
+
+ANSI = re.compile(r"\033\[[0-9;]*m")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "personas"
+    shutil.copytree(CLEAN, root)
+    return root
+
+
+def _edit(root, rel, old, new):
+    path = root / rel
+    text = path.read_text()
+    assert old in text
+    path.write_text(text.replace(old, new))
+
+
+def _run(capsys, root, **kwargs):
+    code = validate.validate(root=str(root), jobs=1, **kwargs)
+    return code, ANSI.sub("", capsys.readouterr().out)
+
+
+def _failures(output):
+    return [line.strip()[2:] for line in output.splitlines() if line.strip().startswith("✗")]
+
+
+def _warnings(output):
+    return [line.strip()[2:] for line in output.splitlines() if line.strip().startswith("⚠")]
+
+
+def test_clean_tree_passes(tree, capsys):
+    code, output = _run(capsys, tree)
+    assert code == 0
+    assert _failures(output) == []
+    assert "Passed: 15" in output
+    assert "ALL CHECKS PASSED" in output
+
+
+def _index_entry_missing(root):
+    _edit(root, "index.md", "| Beta    | `engineering/beta.md`  | Second opinion |",
+          "| Beta    | `engineering/beta.md`  | Second opinion |\n| Gamma   | `engineering/gamma.md` | Third opinion  |")
+
+
+def _persona_not_indexed(root):
+    shutil.copy(root / "engineering" / "alpha.md", root / "engineering" / "gamma.md")
+
+
+def _participant_not_found(root):
+    _edit(root, "panels/review.md", "(../engineering/alpha.md)", "(../engineering/gamma.md)")
+
+
+def _persona_section_missing(root):
+    _edit(root, "engineering/alpha.md", "## Principles\n\n- Be specific\n\n", "")
+
+
+def _base_tools_missing(root):
+    _edit(root, "engineering/alpha.md", "> See [base tools](../_shared/base-tools.md)", "> See the base tools")
+
+
+def _tool_setup_missing(root):
+    _edit(root, "engineering/alpha.md", "[standard bootstrap procedure](../_shared/tool-setup.md)",
+          "standard bootstrap procedure")
+
+
+def _panel_section_missing(root):
+    _edit(root, "panels/review.md", "## Constraints\n\n- None\n\n", "")
+
+
+@pytest.mark.parametrize("breakage, message", [
+    (_index_entry_missing, "index → disk: engineering/gamma.md (NOT FOUND)"),
+    (_persona_not_indexed, "disk → index: engineering/gamma.md (NOT IN INDEX)"),
+    (_participant_not_found, "review.md → ../engineering/gamma.md (NOT FOUND)"),
+    (_persona_section_missing, "sections: engineering/alpha.md — missing: ## Principles"),
+    (_base_tools_missing, "base-tools ref: engineering/alpha.md (MISSING)"),
+    (_tool_setup_missing, "tool-setup ref: engineering/alpha.md (MISSING)"),
+    (_panel_section_missing, "panel sections: review.md — missing: ## Constraints"),
+], ids=lambda value: value.__name__.strip("_") if callable(value) else "")
+def test_broken_check_fails(tree, capsys, breakage, message):
+    breakage(tree)
+    code, output = _run(capsys, tree)
+    assert code == 1
+    assert _failures(output) == [message]
+    assert "Failed: 1" in output
+    assert "VALIDATION FAILED" in output
+
+
+def test_cli_exit_code(tree):
+    _panel_section_missing(tree)
+    result = subprocess.run(
+        [sys.executable, SCRIPT, "--root", str(tree), "--jobs", "1", "--quiet"],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 1
+    output = ANSI.sub("", result.stdout)
+    assert _failures(output) == ["panel sections: review.md — missing: ## Constraints"]
+    assert "✓" not in output
+
+
+def test_incremental_rechecks_dependent_panels(tree, tmp_path):
+    cache = str(tmp_path / "cache.json")
+    personas, panels = validate.discover(str(tree))
+
+    _, rechecked = validate.parse_incremental(str(tree), personas, panels, 1, cache)
+    assert rechecked == 4
+    _, rechecked = validate.parse_incremental(str(tree), personas, panels, 1, cache)
+    assert rechecked == 0
+
+    # review.md links alpha; design.md does not
+    _persona_section_missing(tree)
+    documents, rechecked = validate.parse_incremental(str(tree), personas, panels, 1, cache)
+    assert rechecked == 2
+    assert documents["engineering/alpha.md"].missing == ["## Principles"]
+
+
+def test_incremental_deleted_persona_fails_its_panels(tree, tmp_path, capsys):
+    cache = str(tmp_path / "cache.json")
+    assert _run(capsys, tree, incremental=True, cache_path=cache)[0] == 0
+
+    (tree / "engineering" / "beta.md").unlink()
+    code, output = _run(capsys, tree, incremental=True, cache_path=cache)
+    assert code == 1
+    assert _failures(output) == [
+        "index → disk: engineering/beta.md (NOT FOUND)",
+        "design.md → ../engineering/beta.md (NOT FOUND)",
+        "review.md → ../engineering/beta.md (NOT FOUND)",
+    ]
+
+
+def test_change_scope_includes_linking_panels(tree):
+    personas, panels = validate.discover(str(tree))
+    documents = validate.parse_all(str(tree), personas, panels, 1)
+    assert validate.change_scope(["engineering/alpha.md"], documents, panels) == {
+        "engineering/alpha.md", "panels/review.md",
+    }
+    assert validate.change_scope(["_shared/base-tools.md"], documents, panels) is None
+
+
+@pytest.mark.parametrize("only, code", [
+    (["engineering/beta.md"], 0),
+    (["engineering/alpha.md"], 1),
+], ids=["outside", "inside"])
+def test_only_downgrades_failures_outside_the_change(tree, capsys, only, code):
+    _persona_section_missing(tree)
+    result, output = _run(capsys, tree, only=only)
+    message = "sections: engineering/alpha.md — missing: ## Principles"
+    assert result == code
+    if code:
+        assert _failures(output) == [message]
+        assert _warnings(output) == []
+    else:
+        assert _failures(output) == []
+        assert _warnings(output) == [f"{message} (outside this change)"]
+        assert "ALL CHECKS PASSED" in output
+
+
+def test_only_counts_panels_linking_the_change(tree, capsys):
+    _panel_section_missing(tree)
+    assert _run(capsys, tree, only=["engineering/alpha.md"])[0] == 1
+    assert _run(capsys, tree, only=["panels/design.md"])[0] == 0
+
+
+def test_cli_only_as_the_hook_runs_it(tree, tmp_path):
+    _persona_section_missing(tree)
+    command = [sys.executable, SCRIPT, "--root", str(tree), "--jobs", "1", "--incremental",
+               "--cache", str(tmp_path / "cache.json"), "--quiet", "--only"]
+    assert subprocess.run(command + ["engineering/beta.md"], capture_output=True).returncode == 0
+    assert subprocess.run(command + ["engineering/alpha.md"], capture_output=True).returncode == 1
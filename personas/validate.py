@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""Validation engine for the AI persona framework.
+
+Checks structural integrity, cross-references, and format compliance, with
+the same checks, report and exit code as the original validate.sh:
+
+  1. Index-to-disk sync (index.md entries exist; personas on disk are indexed)
+  2. Panel participant links resolve
+  3. Persona section structure
+  4. Shared base-tools reference
+  5. Tool Setup standardization
+  6. Panel section structure
+
+The tree is walked once and every persona and panel is read and parsed once
+into a Document; the per-file checks then run over those models in a
+process pool. index.md is read once for the cross-reference checks.
+
+With --incremental, Documents are cached in .validate-cache.json keyed by
+each file's content hash (size and mtime short-cut the hashing). Only
+changed personas and panels are re-parsed, plus their dependents: panels
+whose ## Participants link to a changed, added or removed file. A change to
+index.md or anything under _shared/ re-checks every file. The report is the
+same as a full run.
+
+With --only FILE..., failures count only when they concern the listed files
+or their dependents (as above); the rest are reported as warnings. The
+pre-commit hook uses this with --root pointing at the staged snapshot, so a
+commit is judged on what it stages and is not blocked by failures it did not
+touch.
+
+Usage:
+    python3 validate.py [--root DIR] [--jobs N] [--incremental [--cache FILE]]
+                        [--only FILE...] [--quiet]
+
+Exits 1 if any counted check fails, else 0.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_FILE = os.path.join(SCRIPT_DIR, ".validate-cache.json")
+# Entries are keyed by relative path and content hash, so one cache serves
+# the working tree and the hook's staged snapshot alike
+CACHE_VERSION = 2
+
+REQUIRED_SECTIONS = (
+    "## Role", "## Allowed Tools", "## Tool Setup", "## Evaluate For",
+    "## Output Format", "## Principles", "## Anti-patterns",
+)
+PANEL_SECTIONS = (
+    "## Purpose", "## Participants", "## Process", "## Output Format",
+    "## Constraints", "## Conflict Resolution",
+)
+
+# Files under the persona tree that are not personas
+NON_PERSONAS = {"index.md", "panels-personas.md", "tools.yaml", "validate.sh", "validate.py"}
+
+INDEX_ENTRY = re.compile(r"`[^`]+\.md`")
+PARTICIPANT_LINK = re.compile(r"\(\.\./[^)]+\)")
+
+# Below this many files a pool costs more to start than it saves
+POOL_THRESHOLD = 32
+
+# kind: "persona" or "panel"; missing: required sections not present;
+# base_tools / tool_setup: shared references present; participants: link
+# targets from ## Participants, each with whether it resolves
+Document = namedtuple("Document", "rel kind missing base_tools tool_setup participants")
+
+
+def green(text):
+    print(f"\033[0;32m{text}\033[0m")
+
+
+def red(text):
+    print(f"\033[0;31m{text}\033[0m")
+
+
+def yellow(text):
+    print(f"\033[0;33m{text}\033[0m")
+
+
+class Report:
+    """Pass/fail/warn counters with the validate.sh output format.
+
+    With a scope, failures about files outside it are downgraded to warnings.
+    """
+
+    def __init__(self, quiet=False, scope=None):
+        self.quiet = quiet
+        self.scope = scope
+        self.passed = 0
+        self.failed = 0
+        self.warned = 0
+
+    def ok(self, message):
+        self.passed += 1
+        if not self.quiet:
+            green(f"  ✓ {message}")
+
+    def fail(self, message, rel=None):
+        if self.scope is not None and rel not in self.scope:
+            self.warn(f"{message} (outside this change)")
+            return
+        self.failed += 1
+        red(f"  ✗ {message}")
+
+    def warn(self, message):
+        self.warned += 1
+        yellow(f"  ⚠ {message}")
+
+
+def discover(root):
+    """Persona and panel paths relative to root, in validate.sh's order.
+
+    Personas are every .md outside _shared/, panels/ and tests/ directories
+    (sorted by full path, like `find | sort`); panels are panels/*.md
+    (sorted, like the shell glob).
+    """
+    personas = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        # tests/ holds validate.py's fixture trees, not personas
+        dirnames[:] = [d for d in dirnames if d not in ("_shared", "panels", "tests")]
+        for name in filenames:
+            if name.endswith(".md"):
+                path = os.path.join(dirpath, name)
+                personas.append(os.path.relpath(path, root))
+    personas.sort(key=lambda rel: os.path.join(root, rel).encode())
+    personas = [rel for rel in personas if rel not in NON_PERSONAS]
+
+    panels_dir = os.path.join(root, "panels")
+    panels = sorted(
+        f"panels/{name}" for name in os.listdir(panels_dir)
+        if name.endswith(".md") and not name.startswith(".")
+    ) if os.path.isdir(panels_dir) else []
+    return personas, panels
+
+
+def participant_lines(text):
+    """List items in the `## Participants` range (sed '/^## Participants/,/^## /p')."""
+    lines = []
+    in_range = False
+    for line in text.split("\n"):
+        if in_range:
+            if line.startswith("## "):
+                in_range = False
+        elif line.startswith("## Participants"):
+            in_range = True
+        else:
+            continue
+        if line.startswith("- "):
+            lines.append(line)
+    return lines
+
+
+def parse(args):
+    """Read one file and evaluate its per-file checks (runs in a worker)."""
+    root, rel, kind = args
+    with open(os.path.join(root, rel), encoding="utf-8", errors="surrogateescape") as f:
+        text = f.read()
+
+    if kind == "panel":
+        participants = []
+        for line in participant_lines(text):
+            matches = PARTICIPANT_LINK.findall(line)
+            if not matches:
+                continue
+            target = "\n".join(matches).replace("(", "").replace(")", "")
+            resolved = os.path.join(root, "panels", target)
+            participants.append((target, os.path.isfile(resolved)))
+        missing = [s for s in PANEL_SECTIONS if s not in text]
+        return Document(rel, kind, missing, False, False, participants)
+
+    missing = [s for s in REQUIRED_SECTIONS if s not in text]
+    return Document(
+        rel, kind, missing, "base-tools.md" in text, "tool-setup.md" in text, [],
+    )
+
+
+def parse_all(root, personas, panels, jobs):
+    """Documents for every persona and panel, keyed by relative path."""
+    work = [(root, rel, "persona") for rel in personas] + [(root, rel, "panel") for rel in panels]
+    if jobs <= 1 or len(work) < POOL_THRESHOLD:
+        documents = map(parse, work)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            documents = list(pool.map(parse, work, chunksize=max(1, len(work) // (jobs * 4))))
+    return {doc.rel: doc for doc in documents}
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _shared_files(root):
+    shared = []
+    for dirpath, _, filenames in os.walk(os.path.join(root, "_shared")):
+        for name in filenames:
+            shared.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(shared)
+
+
+def participant_path(target):
+    """A participant link target (relative to panels/) as a path relative to root."""
+    return os.path.normpath(os.path.join("panels", target))
+
+
+def parse_incremental(root, personas, panels, jobs, cache_path):
+    """Documents for every file, re-parsing only what changed since the cache.
+
+    Returns (documents, rechecked) where rechecked is the number of files
+    parsed this run.
+    """
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") != CACHE_VERSION:
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    cached = cache.get("files", {})
+
+    # Content hash of every input; the stat key avoids re-reading unchanged files
+    files = {}
+    changed = set()
+    for rel in ["index.md", *_shared_files(root), *personas, *panels]:
+        path = os.path.join(root, rel)
+        stat = _stat_key(path)
+        entry = cached.get(rel)
+        if entry and entry["stat"] == stat:
+            digest = entry["hash"]
+        else:
+            digest = _file_hash(path)
+        files[rel] = {"stat": stat, "hash": digest}
+        if not entry or entry["hash"] != digest:
+            changed.add(rel)
+        elif "doc" in entry:
+            files[rel]["doc"] = entry["doc"]
+    changed.update(set(cached) - set(files))  # removed files
+
+    if any(rel == "index.md" or rel.startswith("_shared/") for rel in changed):
+        dirty = set(personas) | set(panels)
+    else:
+        dirty = {rel for rel in changed if rel in files}
+        for rel in panels:
+            doc = files[rel].get("doc")
+            if doc and any(participant_path(target) in changed for target, _ in doc[5]):
+                dirty.add(rel)
+
+    documents = {}
+    for rel in [*personas, *panels]:
+        doc = files[rel].get("doc")
+        if rel not in dirty and doc is not None:
+            documents[rel] = Document(*doc[:5], [tuple(p) for p in doc[5]])
+        else:
+            dirty.add(rel)
+    fresh = parse_all(
+        root,
+        [rel for rel in personas if rel in dirty],
+        [rel for rel in panels if rel in dirty],
+        jobs,
+    )
+    documents.update(fresh)
+
+    for rel, doc in documents.items():
+        files[rel]["doc"] = list(doc)
+    cache = {"version": CACHE_VERSION, "files": files}
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        # An unwritable cache only costs a full parse next time
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return documents, len(fresh)
+
+
+def index_entries(index_text):
+    """Non-panel .md paths from index.md: the first `backticked` one per line."""
+    entries = []
+    for line in index_text.split("\n"):
+        match = INDEX_ENTRY.search(line)
+        if match:
+            entry = match.group(0).strip("`")
+            if "panels/" not in entry:
+                entries.append(entry)
+    return entries
+
+
+def change_scope(only, documents, panels):
+    """Files whose failures count for a change to the files in `only`.
+
+    That is those files plus panels linking to them, or None (everything)
+    when index.md or anything under _shared/ is among them.
+    """
+    only = {os.path.normpath(rel) for rel in only}
+    if any(rel == "index.md" or rel.startswith("_shared/") for rel in only):
+        return None
+    scope = set(only)
+    for rel in panels:
+        if any(participant_path(target) in only for target, _ in documents[rel].participants):
+            scope.add(rel)
+    return scope
+
+
+def validate(root=SCRIPT_DIR, jobs=None, incremental=False, cache_path=CACHE_FILE, quiet=False, only=None):
+    """Run every check, print the report and return the exit code."""
+    jobs = jobs or os.cpu_count() or 1
+
+    print("=== Persona Framework Validation ===")
+    print("")
+
+    with open(os.path.join(root, "index.md"), encoding="utf-8", errors="surrogateescape") as f:
+        index_text = f.read()
+    personas, panels = discover(root)
+    if incremental:
+        documents, _ = parse_incremental(root, personas, panels, jobs, cache_path)
+    else:
+        documents = parse_all(root, personas, panels, jobs)
+    report = Report(quiet=quiet, scope=None if only is None else change_scope(only, documents, panels))
+
+    print("--- 1. Index-to-disk sync ---")
+    for entry in index_entries(index_text):
+        if os.path.isfile(os.path.join(root, entry)):
+            report.ok(f"index → disk: {entry}")
+        else:
+            report.fail(f"index → disk: {entry} (NOT FOUND)", os.path.normpath(entry))
+    for rel in personas:
+        if rel in index_text:
+            report.ok(f"disk → index: {rel}")
+        else:
+            report.fail(f"disk → index: {rel} (NOT IN INDEX)", rel)
+    print("")
+
+    print("--- 2. Panel participant resolution ---")
+    for rel in panels:
+        name = os.path.basename(rel)
+        for target, exists in documents[rel].participants:
+            if exists:
+                report.ok(f"{name} → {os.path.basename(target)}")
+            else:
+                report.fail(f"{name} → {target} (NOT FOUND)", rel)
+    print("")
+
+    print("--- 3. Persona section structure ---")
+    for rel in personas:
+        missing = documents[rel].missing
+        if not missing:
+            report.ok(f"sections: {rel}")
+        else:
+            report.fail(f"sections: {rel} — missing: {' '.join(missing)}", rel)
+    print("")
+
+    print("--- 4. Shared base-tools reference ---")
+    for rel in personas:
+        if documents[rel].base_tools:
+            report.ok(f"base-tools ref: {rel}")
+        else:
+            report.fail(f"base-tools ref: {rel} (MISSING)", rel)
+    print("")
+
+    print("--- 5. Tool Setup standardization ---")
+    for rel in personas:
+        if documents[rel].tool_setup:
+            report.ok(f"tool-setup ref: {rel}")
+        else:
+            report.fail(f"tool-setup ref: {rel} (MISSING)", rel)
+    print("")
+
+    print("--- 6. Panel section structure ---")
+    for rel in panels:
+        name = os.path.basename(rel)
+        missing = documents[rel].missing
+        if not missing:
+            report.ok(f"panel sections: {name}")
+        else:
+            report.fail(f"panel sections: {name} — missing: {' '.join(missing)}", rel)
+    print("")
+
+    print("=== Summary ===")
+    green(f"  Passed: {report.passed}")
+    if report.failed > 0:
+        red(f"  Failed: {report.failed}")
+    else:
+        green(f"  Failed: {report.failed}")
+    if report.warned > 0:
+        yellow(f"  Warnings: {report.warned}")
+
+    print("")
+    if report.failed > 0:
+        red("VALIDATION FAILED")
+        return 1
+    green("ALL CHECKS PASSED")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the AI persona framework.")
+    parser.add_argument("--root", default=SCRIPT_DIR,
+                        help="Persona tree to check (default: this script's directory)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes for parsing (default: CPU count)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-check only files changed since the last run, and their dependents")
+    parser.add_argument("--cache", default=CACHE_FILE,
+                        help="Cache file for --incremental (default: personas/.validate-cache.json)")
+    parser.add_argument("--only", nargs="*", metavar="FILE",
+                        help="Fail only on these files (relative to the root) and their "
+                             "dependents; other failures are warnings")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Print only failures and the summary")
+    args = parser.parse_args()
+    sys.exit(validate(
+        root=os.path.abspath(args.root), jobs=args.jobs, incremental=args.incremental,
+        cache_path=args.cache, quiet=args.quiet, only=args.only,
+    ))
+
+
+if __name__ == "__main__":
+    main()